@@ -1,7 +1,6 @@
-from colossus.halo.concentration import *
-from colossus.cosmology import cosmology
-import astropy.cosmology as astropy_cosmo
-from scipy.interpolate import interp1d
+import numpy as np
+from threading import Lock
+from scipy.interpolate import CubicSpline
 from pyHalo.defaults import *
 
 cosmo_defaults = CosmoDefaults()
@@ -20,7 +19,18 @@ class Cosmology(object):
 
     density_to_MsunperMpc = 0.001 * M_sun**-1 * (100**3) * Mpc**3 # convert [g/cm^3] to [solarmasses / Mpc^3]
 
-    def __init__(self, astropy_instance=None, cosmo_kwargs={}):
+    def __init__(self, astropy_instance=None, cosmo_kwargs={}, z_max_table=None, z_step_table=None):
+
+        """
+
+        :param astropy_instance: an instance of an astropy cosmology; if None, a flat LambdaCDM cosmology is created with
+        the parameters in cosmo_kwargs
+        :param cosmo_kwargs: cosmological parameters (H0, Om0, Ob0, ns, sigma8, power_law); parameters that are not
+        specified are set to the defaults in defaults.py
+        :param z_max_table: the maximum redshift of the interpolation table of distances; the table is extended
+        automatically when a distance at a higher redshift is needed
+        :param z_step_table: the redshift spacing of the interpolation table of distances
+        """
 
         self.astropy = self._setup_astropy_cosmology(astropy_instance, cosmo_kwargs)
 
@@ -30,29 +40,112 @@ class Cosmology(object):
 
         self._age_today = self.astropy.age(0).value
 
-        self._DA_interp = self._interp_angular_diamter_distance()
-
-        self._DC_interp = self._interp_comoving_distance()
-
-        self._kpc_per_asec_interp = self._interp_kpc_per_asec()
+        # in a flat cosmology the angular diameter distance between two redshifts follows from the comoving distances
+        self._flat = self.astropy.Ok0 == 0
+
+        # the interpolation table of the comoving transverse distance is created the first time it is used; all distances
+        # below are computed from it
+        if z_max_table is None:
+            z_max_table = cosmo_defaults.distance_table_zmax
+        if z_step_table is None:
+            z_step_table = cosmo_defaults.distance_table_zstep
+        self._z_max_table = z_max_table
+        self._z_step_table = z_step_table
+        self._DM_interp_table = None
+        # the table is extended and rebuilt while holding this lock, so that threads sharing this instance never use a
+        # table that is being replaced
+        self._table_lock = Lock()
+
+        # the number of times the interpolation table was extended to a higher redshift, and the number of distance
+        # calculations that could not use the table and were evaluated exactly with astropy
+        self.table_extensions = 0
+        self.exact_evaluations = 0
 
     def D_A_z(self, z):
 
-        try:
-            return self._DA_interp(z)
-        except:
-            return self.D_A(0, z)
+        """
+        :param z: redshift (a number or an array)
+        :return: the angular diameter distance to redshift z in Mpc
+        """
+        z = np.asarray(z)
+        return self._comoving_transverse_distance(z) / (1 + z)
 
     def D_C_z(self, z):
 
-        try:
-            return self._DC_interp(z)
-        except:
-            return self.D_A_z(z) / self.scale_factor(z)
+        """
+        :param z: redshift (a number or an array)
+        :return: the comoving transverse distance to redshift z in Mpc
+        """
+        return self._comoving_transverse_distance(z)
 
     def kpc_proper_per_asec(self, z):
 
-        return self._kpc_per_asec_interp(z)
+        """
+        :param z: redshift (a number or an array)
+        :return: the proper distance in kpc corresponding to one arcsecond at redshift z
+        """
+        return 1000 * self.arcsec * self.D_A_z(z)
+
+    def _comoving_transverse_distance(self, z):
+
+        """
+        Evaluates the comoving transverse distance from the interpolation table, extending the table if z exceeds its
+        maximum redshift. Redshifts that cannot be interpolated (negative or not finite) are evaluated with astropy.
+        :param z: redshift (a number or an array)
+        :return: the comoving transverse distance in Mpc
+        """
+        z = np.asarray(z, dtype=float)
+        if z.ndim == 0:
+            z_min = z_max = z
+        elif z.size == 0:
+            return np.zeros(z.shape)
+        else:
+            z_min, z_max = z.min(), z.max()
+
+        if not (z_min >= 0 and np.isfinite(z_max)):
+            self.exact_evaluations += 1
+            return self.astropy.comoving_transverse_distance(z).value
+
+        return self._distance_table(z_max)(z)
+
+    def _distance_table(self, z_max):
+
+        """
+        Returns the interpolation table of the comoving transverse distance, extending it first if z_max exceeds its
+        maximum redshift
+        :param z_max: the highest redshift at which the table will be evaluated
+        :return: the interpolation table (an instance of CubicSpline)
+        """
+        with self._table_lock:
+            if z_max > self._z_max_table:
+                self._extend_table(z_max)
+            if self._DM_interp_table is None:
+                self._DM_interp_table = self._interp_comoving_transverse_distance()
+            return self._DM_interp_table
+
+    def _extend_table(self, z):
+
+        """
+        Doubles the maximum redshift of the interpolation table until it includes z; the table is recomputed the next
+        time it is used
+        :param z: redshift
+        """
+        z_max_table = self._z_max_table
+        while z_max_table < z:
+            z_max_table *= 2
+        self._z_max_table = z_max_table
+        self._DM_interp_table = None
+        self.table_extensions += 1
+
+    def __getstate__(self):
+        # the lock cannot be pickled, e.g. when an instance is sent to a worker process
+        state = self.__dict__.copy()
+        del state['_table_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._table_lock = Lock()
 
     @property
     def colossus(self):
@@ -72,11 +165,40 @@ class Cosmology(object):
 
     def D_A(self, z1, z2):
 
-        return self.astropy.angular_diameter_distance_z1z2(z1, z2).value
+        """
+        :param z1: the redshift of the first object (a number or an array)
+        :param z2: the redshift of the second object (a number or an array)
+        :return: the angular diameter distance between z1 and z2 in Mpc
+        """
+        if self._flat:
+            z2 = np.asarray(z2)
+            return (self._comoving_transverse_distance(z2) - self._comoving_transverse_distance(z1)) / (1 + z2)
+        else:
+            self.exact_evaluations += 1
+            return self.astropy.angular_diameter_distance_z1z2(z1, z2).value
+
+    def lensing_distances(self, z1, z2):
+
+        """
+        :param z1: the lens redshift (a number or an array)
+        :param z2: the source redshift (a number or an array)
+        :return: the angular diameter distances in Mpc to the lens, to the source, and between the lens and the source
+        """
+        if self._flat:
+            z1, z2 = np.asarray(z1), np.asarray(z2)
+            d_m_1 = self._comoving_transverse_distance(z1)
+            d_m_2 = self._comoving_transverse_distance(z2)
+            return d_m_1 / (1 + z1), d_m_2 / (1 + z2), (d_m_2 - d_m_1) / (1 + z2)
+        else:
+            return self.D_A_z(z1), self.D_A_z(z2), self.D_A(z1, z2)
 
     def D_C_transverse(self, z):
 
-        return self.astropy.comoving_transverse_distance(z).value
+        """
+        :param z: redshift (a number or an array)
+        :return: the comoving transverse distance to redshift z in Mpc
+        """
+        return self._comoving_transverse_distance(z)
 
     def E_z(self, z):
 
@@ -99,36 +221,12 @@ class Cosmology(object):
 
         return self.astropy.Odm(0.) * self.rho_crit(0.)
 
-    def _interp_kpc_per_asec(self):
-
-        zmin, zmax = 0.001, 4
-        z = np.arange(zmin, zmax + 0.025, 0.025)
-        kpc_per_asec = [self.astropy.arcsec_per_kpc_proper(zi).value ** -1 for zi in z]
-        kpc_per_asec = np.array(kpc_per_asec)
-
-        return interp1d(z, kpc_per_asec)
-
-    def _interp_angular_diamter_distance(self):
-
-        zmax = 4
-        zstep = lenscone_default.default_z_step
-        z = np.arange(zstep, zmax+zstep, zstep)
-        da = []
-        for zi in z:
-            da.append(self.D_A(0, zi))
-        da = np.array(da)
-        return interp1d(z, da)
-
-    def _interp_comoving_distance(self):
+    def _interp_comoving_transverse_distance(self):
 
-        zmax = 4
-        zstep = lenscone_default.default_z_step
-        z = np.arange(zstep, zmax + zstep, zstep)
-        dc = []
-        for zi in z:
-            dc.append(self.D_C_transverse(zi))
-        dc = np.array(dc)
-        return interp1d(z, dc)
+        n = int(np.ceil(self._z_max_table / self._z_step_table))
+        z = np.linspace(0., n * self._z_step_table, n + 1)
+        dm = self.astropy.comoving_transverse_distance(z).value
+        return CubicSpline(z, dm)
 
     def _setup_astropy_cosmology(self, astropy_instance, cosmo_kwargs):
 
@@ -136,6 +234,7 @@ class Cosmology(object):
 
             if astropy_instance is None:
 
+                import astropy.cosmology as astropy_cosmo
                 astropy_kwargs = {}
 
                 keys = ['H0', 'Om0', 'Ob0']
@@ -155,6 +254,7 @@ class Cosmology(object):
 
         if not hasattr(self,'colossus_cosmo'):
 
+            from colossus.cosmology import cosmology
             colossus_kwargs = {}
             keys = ['H0', 'Om0', 'Ob0', 'ns', 'sigma8', 'power_law']
             for key in keys:
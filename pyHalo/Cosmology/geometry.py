@@ -1,11 +1,14 @@
 import numpy as np
-from scipy.integrate import quad
+from pyHalo.instance_cache import InstanceCache
 #from pyHalo.defaults import *
 
 class Geometry(object):
 
     _delta_z_min = 1e-4
 
+    # nodes and weights of the Gauss-Legendre quadrature used to integrate the volume element over each redshift slice
+    _quadrature_nodes, _quadrature_weights = np.polynomial.legendre.leggauss(8)
+
     def __init__(self, cosmology, z_lens, z_source, opening_angle, geometry_type,
                  angle_pad=0.8):
 
@@ -26,17 +29,33 @@ class Geometry(object):
         self._arcsec = self._cosmo.arcsec
         self.kpc_per_arcsec_zlens = self._cosmo.kpc_proper_per_asec(self._zlens)
         self._reduced_to_phys = self._geometrytype._reduced_to_phys
+        self._hubble_distance = self._cosmo.astropy.hubble_distance.value
+        # volume elements computed for a list of lens planes, indexed by the redshifts, thicknesses, and radius
+        self._volume_elements = InstanceCache()
 
     def rendering_scale(self, z):
 
+        """
+        :param z: redshift (a number or an array)
+        :return: the factor that rescales the rendering radius at redshift z
+        """
         return self._geometrytype.rendering_scale(z)
 
     def kpc_per_arcsec(self, z):
 
+        """
+        :param z: redshift (a number or an array)
+        :return: the proper distance in kpc corresponding to one arcsecond at redshift z
+        """
         return self._cosmo.kpc_proper_per_asec(z)
 
     def angle_to_physicalradius(self, radius_arcsec, z):
 
+        """
+        :param radius_arcsec: angular radius in arcseconds
+        :param z: redshift (a number or an array)
+        :return: the physical radius in Mpc corresponding to radius_arcsec, rescaled by the rendering scale at z
+        """
         angle_radian = radius_arcsec * self._arcsec
 
         return angle_radian * self.rendering_scale(z) * self._cosmo.D_A_z(z)
@@ -46,6 +65,9 @@ class Geometry(object):
         """
         This is specific to the geometry, e.g. if you pick cone if will close behind the main
         deflector
+        :param radius_arcsec: angular radius in arcseconds
+        :param z: redshift (a number or an array)
+        :return: the comoving radius in Mpc
         """
         a_z = self._cosmo.scale_factor(z)
         return self.angle_to_physicalradius(radius_arcsec, z) / a_z
@@ -53,21 +75,51 @@ class Geometry(object):
     def volume_element_comoving(self, z, delta_z, radius=None):
         """
 
-        :param z: redshift
-        :param delta_z: thickness of the redshift pancake
+        :param z: redshift (a number or an array with one entry per lens plane)
+        :param delta_z: thickness of the redshift pancake (a number or an array with one entry per lens plane)
         :param radius: angular radius of the rendering area in arcseconds
         :return: volume element in comoving Mpc for small delta_z
+
+        The volume elements of all lens planes are computed at once, and stored for subsequent calls with the same
+        lens planes; the arrays returned for a list of lens planes are read only.
         """
 
         if radius is None:
             radius = 0.5*self.cone_opening_angle
 
-        if delta_z > self._delta_z_min:
-            func = self._volume_integrand_comoving
-            volume_element = quad(func, z, z+delta_z, args=(radius))[0]
-        else:
-            volume_element = self._volume_integrand_comoving(z, radius) * delta_z
+        z, delta_z = np.broadcast_arrays(np.asarray(z, dtype=float), np.asarray(delta_z, dtype=float))
+        key = (z.shape, tuple(z.ravel().tolist()), tuple(delta_z.ravel().tolist()), float(radius))
+        volume_element = self._volume_elements.get(key, lambda: self._volume_element_comoving(z, delta_z, radius))
 
+        if volume_element.ndim == 0:
+            return float(volume_element)
+        return volume_element
+
+    def _volume_element_comoving(self, z, delta_z, radius_arcsec):
+        """
+        Integrates the volume element over each redshift slice with a Gauss-Legendre quadrature evaluated for all slices
+        at once. The rendering area of a double cone changes slope at the main deflector redshift, so slices that
+        contain it are integrated separately in front of and behind the main deflector.
+
+        :param z: array of redshifts
+        :param delta_z: array of the thickness of each redshift slice
+        :param radius_arcsec: angular radius of the rendering area in arcseconds
+        :return: array of volume elements in comoving Mpc
+        """
+        z_min, z_max = z, z + delta_z
+        z_split = np.clip(self._zlens, z_min, z_max)
+        z_low = np.array([z_min, z_split])
+        z_high = np.array([z_split, z_max])
+        half_width = 0.5 * (z_high - z_low)
+        z_nodes = (z_low + half_width)[..., np.newaxis] + half_width[..., np.newaxis] * self._quadrature_nodes
+        integrand = self._volume_integrand_comoving(z_nodes.ravel(), radius_arcsec).reshape(z_nodes.shape)
+        volume_element = np.asarray(np.sum(half_width * np.sum(integrand * self._quadrature_weights, axis=-1), axis=0))
+
+        thin = delta_z <= self._delta_z_min
+        if np.any(thin):
+            volume_element = np.where(thin, self._volume_integrand_comoving(z, radius_arcsec) * delta_z,
+                                      volume_element)
+        volume_element.flags.writeable = False
         return volume_element
 
     def _volume_integrand_comoving(self, z, radius_arcsec):
@@ -76,11 +128,11 @@ class Geometry(object):
         :param theta:
         :param z_lens:
         :param z:
-        :return: integrand element in comoving Mpc (for use in scipy.integrate quad)
+        :return: integrand element in comoving Mpc
         """
         area_comoving = self.angle_to_comoving_area(radius_arcsec, z)
 
-        dR = self._cosmo.astropy.hubble_distance.value * self._cosmo.astropy.efunc(z) ** -1
+        dR = self._hubble_distance * self._cosmo.E_z(z) ** -1
 
         return area_comoving * dR
 
@@ -94,8 +146,7 @@ class Geometry(object):
         """
         computes the area corresponding to the angular radius of a plane at redshift z for a double cone with base at z_base
         :param radius_arcsec: lens cone opening angle in arcsec
-        :param z: redshift of plane
-        :param z_lens: redshift of main lens
+        :param z: redshift of plane (a number or an array)
         :return: comoving area
         """
 
@@ -106,10 +157,9 @@ class Geometry(object):
     def angle_to_physical_area(self, radius_arcsec, z):
         """
         computes the area corresponding to the angular radius of a plane at redshift z for a double cone with base at z_base
-        :param theta: lens cone opening angle in arcsec
-        :param z: redshift of plane
-        :param z_lens: redshift of main lens
-        :return: comoving area
+        :param radius_arcsec: lens cone opening angle in arcsec
+        :param z: redshift of plane (a number or an array)
+        :return: physical area
         """
 
         area_comoving = self.angle_to_comoving_area(radius_arcsec, z)
@@ -122,7 +172,7 @@ class Geometry(object):
 
         r_co_mpc = self.angle_to_comovingradius(radius_arcsec, z)
         r_co_kpc = r_co_mpc * 1000
-        asec_per_kpc = self._cosmo.astropy.arcsec_per_kpc_comoving(z).value
+        asec_per_kpc = 1 / (1000 * self._arcsec * self._cosmo.D_C_transverse(z))
 
         return r_co_kpc * asec_per_kpc
 
@@ -147,6 +197,11 @@ class Cylinder(object):
 
     def rendering_scale(self, z):
 
+        """
+        :param z: redshift (a number or an array)
+        :return: the factor that rescales the rendering radius at redshift z so that the comoving radius of the
+        cylinder is constant
+        """
         d_c = self._cosmo.D_C_transverse(z)
         xi = self.d_c_lens/d_c
 
@@ -175,14 +230,21 @@ class DoubleCone(object):
 
     def rendering_scale(self, z):
 
-        if z <= self._zlens:
-            return 1.
-        else:
-            D_dz = self._cosmo.D_A(self._zlens, z)
-            D_z = self._cosmo.D_A_z(z)
-            ratio = D_dz / D_z
-
-            return 1 - self._angle_pad * self._reduced_to_phys * ratio
+        """
+        :param z: redshift (a number or an array)
+        :return: the factor that rescales the rendering radius at redshift z; the double cone closes behind the
+        main deflector
+        """
+        z = np.asarray(z, dtype=float)
+        behind_lens = z > self._zlens
+        # planes in front of the main deflector are evaluated at the source redshift and then discarded
+        z_behind = np.where(behind_lens, z, self._zsource)
+        _, D_z, D_dz = self._cosmo.lensing_distances(self._zlens, z_behind)
+        ratio = D_dz / D_z
+        scale = np.where(behind_lens, 1 - self._angle_pad * self._reduced_to_phys * ratio, 1.)
+        if scale.ndim == 0:
+            return float(scale)
+        return scale
 
 # class DoubleConeCylindner(object):
 #
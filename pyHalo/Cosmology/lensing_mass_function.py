@@ -1,10 +1,33 @@
-from colossus.lss.mass_function import *
+import os
+import hashlib
+import numpy as np
 from pyHalo.Cosmology.geometry import *
 from scipy.interpolate import interp1d
 from pyHalo.defaults import *
-from colossus.lss.bias import twoHaloTerm
-from scipy.integrate import simps
+from scipy.integrate import simps, quad
+from scipy.interpolate import CubicSpline
+from pyHalo.cache_io import cached_table
 
+def massFunction(*args, **kwargs):
+
+    """
+    Evaluates the halo mass function with colossus (see colossus.lss.mass_function.massFunction); colossus is imported
+    the first time this function is called
+    """
+    from colossus.lss.mass_function import massFunction as colossus_mass_function
+    return colossus_mass_function(*args, **kwargs)
+
+def _default_cosmology_key():
+
+    """
+    :return: the hashable string of the colossus cosmology with the default cosmological parameters (see CosmoDefaults in
+    defaults.py), for which the lookup table of the sheth99 mass function shipped with pyHalo was computed
+    """
+    from colossus.cosmology import cosmology
+    params = {key: cosmo_default(key) for key in ['H0', 'Om0', 'Ob0', 'ns', 'sigma8', 'power_law']}
+    return cosmology.Cosmology(name='custom', **params)._getHashableString()
+
+_correlation_integral_tables = {}
 
 class LensingMassFunction(object):
 
@@ -27,7 +50,9 @@ class LensingMassFunction(object):
         :param cone_opening_angle: opening angle of lensing volume in arcseconds
         :param m_pivot: pivot mass of the mass function in M_sun
         :param mass_function_model (optional): the halo mass function model, default is Sheth-Tormen
-        :param use_lookup_table: Whether to use a precomputed lookup table for the normalization and slope of the mass function
+        :param use_lookup_table: Whether to use a precomputed lookup table for the normalization and slope of the mass function;
+        the table shipped with pyHalo is used for the default cosmology, pivot mass, and the sheth99 model, otherwise tables
+        are computed once and stored in the cache directory (see CacheDefaults in defaults.py)
         :param geometry_type: Type of lensing geometry (DOUBLE_CONE, CYLINDER)
         """
 
@@ -47,18 +72,25 @@ class LensingMassFunction(object):
 
         self.m_pivot = m_pivot
 
-        if use_lookup_table and m_pivot == 10**8:
+        if use_lookup_table and m_pivot == 10**8 and self._mass_function_model == 'sheth99' and \
+                self._default_cosmology():
 
-            if self._mass_function_model == 'sheth99':
-                from pyHalo.Cosmology.lookup_tables import lookup_sheth99 as table
-            else:
-                raise Exception('lookup table '+self._mass_function_model+' not found.')
+            from pyHalo.Cosmology.lookup_tables import lookup_sheth99 as table
 
             norm_z_dV = table.norm_z_dV
             plaw_index_z = table.plaw_index_z
             z_range = table.z_range
             delta_z = table.delta_z
 
+        elif use_lookup_table:
+
+            norm_z_dV, plaw_index_z, z_range, delta_z = self._build_from_cache(mlow, mhigh, zsource)
+
+            self._norm_z_dV = norm_z_dV
+            self._plaw_index_z = plaw_index_z
+            self._z_range = z_range
+            self._delta_z = delta_z
+
         else:
             # list ordering is by mass, with sublists consisting of different redshifts
             norm_z_dV, plaw_index_z, z_range, delta_z = self._build(mlow, mhigh, zsource)
@@ -76,6 +108,15 @@ class LensingMassFunction(object):
 
         self._z_range = z_range
 
+    def _default_cosmology(self):
+
+        """
+        :return: True if the current colossus cosmology, which is used to evaluate the mass function, has the default
+        cosmological parameters
+        """
+        from colossus.cosmology import cosmology
+        return cosmology.getCurrent()._getHashableString() == _default_cosmology_key()
+
     def dN_dMdV_comoving(self, M, z):
 
         """
@@ -174,13 +215,64 @@ class LensingMassFunction(object):
         :param rmax: Upper limit of the integral, this is computed based on redshift spacing during
         the rendering of halos
         :return: scaling factor applied to the normalization of the LOS mass function
+
+        The two halo term is the halo bias times the linear matter correlation function, which scales with redshift as
+        the square of the growth factor. The integral of the correlation function over r is therefore interpolated from
+        a table computed once for each cosmology (see correlation_function_integral), and only the halo bias and the
+        growth factor are evaluated for each host mass and redshift.
         """
 
-        mean_boost = 2 * quad(self.twohaloterm, rmin, rmax, args=(m200, z))[0] / (rmax - rmin)
+        correlation_integral = self.correlation_function_integral()
+        if rmin < correlation_integral.x_min or rmax > correlation_integral.x_max:
+            mean_boost = 2 * quad(self.twohaloterm, rmin, rmax, args=(m200, z))[0] / (rmax - rmin)
+        else:
+            from colossus.cosmology import cosmology
+            from colossus.lss.bias import haloBias
+            bias = haloBias(m200 * self.cosmo.h, z, '200c')
+            growth = cosmology.getCurrent().growthFactor(z)
+            integral = correlation_integral(rmax) - correlation_integral(rmin)
+            mean_boost = 2 * bias * growth ** 2 * integral / (rmax - rmin)
         # factor of two for symmetry in front/behind host halo
 
         return 1. + mean_boost
 
+    def correlation_function_integral(self, cache_directory=None):
+
+        """
+        Returns an interpolation of the integral of the linear matter correlation function at z = 0
+
+        I(r) = int_{r_0}^{r} xi(r^prime) dr^prime
+
+        where r is a comoving distance in Mpc, on a grid of r between 0.002 and 300 Mpc. The table is computed once for
+        each colossus cosmology, stored as a .npy file in the cache directory (see CacheDefaults in defaults.py), and
+        shared by all instances of LensingMassFunction in the process.
+
+        :param cache_directory: the directory where tables are stored; defaults to cache_default.directory
+        :return: an instance of CorrelationFunctionIntegral
+        """
+        from colossus.cosmology import cosmology
+        if cache_directory is None:
+            cache_directory = cache_default.directory
+        cosmology_key = cosmology.getCurrent()._getHashableString()
+        key = (cosmology_key, self.cosmo.h, cache_directory)
+
+        if key not in _correlation_integral_tables:
+            r = CorrelationFunctionIntegral.r_grid
+            key_hash = hashlib.sha1('_'.join([cosmology_key, repr(self.cosmo.h), repr(float(r[0])), repr(float(r[-1])),
+                                              str(len(r))]).encode('utf-8')).hexdigest()[0:16]
+            fname = os.path.join(cache_directory, 'correlation_integral_' + key_hash + '.npy')
+
+            def compute():
+                # integrate in log(r) the cubic spline interpolation of the correlation function on a fine grid
+                xi = cosmology.getCurrent().correlationFunction(r * self.cosmo.h, 0.)
+                integral = CubicSpline(np.log(r), xi * r).antiderivative()(np.log(r))
+                return np.array([r, integral - integral[0]])
+
+            table = cached_table(fname, compute, valid=lambda t: t.ndim == 2 and t.shape[0] == 2)
+            _correlation_integral_tables[key] = CorrelationFunctionIntegral(table[0], table[1])
+
+        return _correlation_integral_tables[key]
+
     def twohaloterm(self, r, M, z, mdef='200c'):
 
         """
@@ -193,6 +285,7 @@ class LensingMassFunction(object):
         :return:
         """
 
+        from colossus.lss.bias import twoHaloTerm
         h = self.cosmo.h
         M_h = M * h
         r_h = r * h
@@ -236,43 +329,134 @@ class LensingMassFunction(object):
 
         M = np.logspace(np.log10(mlow), np.log10(mhigh), 20)
 
-        norm, index, norm_scale = [], [], []
+        norm, index = self._mass_function_params(M, z_range)
 
-        for zi in z_range:
+        return norm, index, z_range, z_range[1] - z_range[0]
 
-            normi, indexi = self._mass_function_params(M, zi)
-            norm.append(normi)
-            index.append(indexi)
+    def _build_from_cache(self, mlow, mhigh, zsource, cache_directory=None):
 
-        return norm, index, z_range, z_range[1] - z_range[0]
+        """
+        Loads the normalization and slope of the mass function as a function of redshift from the cache directory,
+        computing them with _build and saving them first if they do not exist. Tables are stored as .npy files and
+        loaded with memory mapping.
+
+        :param mlow: low end of mass function
+        :param mhigh: high end of mass function
+        :param zsource: source redshift
+        :param cache_directory: the directory where tables are stored; defaults to cache_default.directory
+        :return: normalization, power law index, redshifts, and redshift spacing of the table
+        """
+        if cache_directory is None:
+            cache_directory = cache_default.directory
+        fname = os.path.join(cache_directory, self._table_filename(mlow, mhigh, zsource))
+
+        def compute():
+            norm_z_dV, plaw_index_z, z_range, _ = self._build(mlow, mhigh, zsource)
+            return np.array([z_range, norm_z_dV, plaw_index_z])
+
+        table = cached_table(fname, compute, valid=lambda t: t.ndim == 2 and t.shape[0] == 3)
+        z_range, norm_z_dV, plaw_index_z = table[0], table[1], table[2]
+        return norm_z_dV, plaw_index_z, z_range, z_range[1] - z_range[0]
+
+    def _table_filename(self, mlow, mhigh, zsource):
+
+        """
+        The name of the file that stores the table for the current colossus cosmology, mass function model, mass range,
+        pivot mass, and redshift range
+        :param mlow: low end of mass function
+        :param mhigh: high end of mass function
+        :param zsource: source redshift
+        :return: the file name
+        """
+        from colossus.cosmology import cosmology
+        key = '_'.join([cosmology.getCurrent()._getHashableString(), str(self._mass_function_model),
+                        repr(float(mlow)), repr(float(mhigh)), repr(float(self.m_pivot)),
+                        repr(float(lenscone_default.default_zstart)), repr(float(zsource))])
+        key_hash = hashlib.sha1(key.encode('utf-8')).hexdigest()[0:16]
+        return 'mass_function_' + str(self._mass_function_model) + '_' + key_hash + '.npy'
+
+    def _dN_dMdV_comoving_grid(self, M, z):
+
+        """
+        Evaluates dN_dMdV_comoving on a grid of masses and redshifts. The variance of the density field is computed once
+        at z = 0 and scaled by the linear growth factor, so colossus evaluates the model function f(sigma, z) once per
+        redshift and everything else once for the entire grid.
+
+        :param M: an array of masses (in physical units, no little h)
+        :param z: an array of redshifts
+        :return: differential number per unit mass per cubic Mpc (comoving) with shape (len(z), len(M))
+        [N * M_sun ^ -1 * Mpc ^ -3]
+        """
+        from colossus.cosmology import cosmology
+        from colossus.lss import peaks
+        from colossus.lss.mass_function import convertMassFunction
+
+        h = self.cosmo.h
+        # To M_sun / h units
+        M_h = M * h
+        colossus_cosmo = cosmology.getCurrent()
+        sigma = np.outer(colossus_cosmo.growthFactor(z), colossus_cosmo.sigma(peaks.lagrangianR(M_h), 0.))
+        f = np.array([massFunction(sigma_z, zi, q_in='sigma', q_out='f', model=self._mass_function_model)
+                      for (sigma_z, zi) in zip(sigma, z)])
+        # the logarithmic derivative of the variance does not depend on redshift
+        dndlogM = convertMassFunction(f, M_h, 0., 'f', 'dndlnM')
 
-    def _mass_function_params(self, M, zstart):
+        # thee factors of h for the (Mpc/h)^-3 to Mpc^-3 conversion
+        return dndlogM / M * h ** 3
+
+    def _mass_function_params(self, M, z):
 
         """
-        :param mlow: min mass in solar masses
-        :param mhigh: maximum mass in solar masses
-        :param zstart:
-        :param zend:
-        :param cone_opening_angle:
-        :param z_lens:
-        :param delta_theta_lens:
-        :return: number of halos between mlow and mhigh, normalization and power law index of the mass function
-        assumed parameterization is simple:
+        Fits the mass function at each redshift with the parameterization
+
+        dN / dMdV = norm * (M / m_pivot) ^ plaw_index
 
-        dN / dM = norm * (M / M_sun) ^ plaw_index
+        The linear fits in log space at all redshifts are solved with a single least-squares solve.
 
-        units of norm are therefore M_sun ^ -1
+        :param M: an array of masses in solar masses at which the mass function is fit
+        :param z: a redshift or an array of redshifts
+        :return: the normalization [M_sun ^ -1 * Mpc ^ -3] and power law index at each redshift
         """
 
-        dN_dMdV = self.dN_dMdV_comoving(M, zstart)
+        dN_dMdV = self._dN_dMdV_comoving_grid(M, np.atleast_1d(z))
 
-        coeffs = np.polyfit(np.log10(M / self.m_pivot), np.log10(dN_dMdV), 1)
+        log_m = np.log10(M / self.m_pivot)
+        design_matrix = np.column_stack((log_m, np.ones_like(log_m)))
+        coeffs = np.linalg.lstsq(design_matrix, np.log10(dN_dMdV).T, rcond=None)[0]
 
         plaw_index = coeffs[0]
         norm_dV = 10 ** coeffs[1]
 
+        if np.ndim(z) == 0:
+            return norm_dV[0], plaw_index[0]
         return norm_dV, plaw_index
 
+class CorrelationFunctionIntegral(object):
+
+    """
+    An interpolation of the cumulative integral of the linear matter correlation function over comoving distance
+    """
+
+    r_grid = np.logspace(np.log10(0.002), np.log10(300.), 2001)
+
+    def __init__(self, r, integral):
+
+        """
+
+        :param r: comoving distance in Mpc
+        :param integral: the integral of the correlation function from r[0] to r
+        """
+        self.x_min, self.x_max = r[0], r[-1]
+        self._interp = CubicSpline(np.log(r), integral)
+
+    def __call__(self, r):
+
+        """
+        :param r: comoving distance in Mpc
+        :return: the integral of the correlation function from x_min to r
+        """
+        return self._interp(np.log(r))
+
 def write_lookup_table():
 
     def write_to_file(fname, pname, values, mode):
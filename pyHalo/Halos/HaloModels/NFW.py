@@ -69,7 +69,7 @@ class NFWFieldHalo(Halo):
                                                          self._args['c_scatter'],
                                                          self._args['c_scatter_dex'],
                                                          self._args['kwargs_suppression'],
-                                                         self._args['suppression_model'])
+                                                         self._args['suppression_model'], rng=self.rng)
         return self._c
 
     @property
@@ -1,6 +1,5 @@
 from pyHalo.Halos.halo_base import Halo
 import numpy as np
-from lenstronomy.LensModel.Profiles.p_jaffe import PJaffe
 
 class PJaffeSubhalo(Halo):
     """
@@ -16,10 +15,17 @@ class PJaffeSubhalo(Halo):
         See documentation in base class (Halos/halo_base.py)
         """
         self._lens_cosmo = lens_cosmo_instance
-        self._prof = PJaffe()
         super(PJaffeSubhalo, self).__init__(mass, x, y, r3d, mdef, z, sub_flag,
                                             lens_cosmo_instance, args, unique_tag)
 
+    @property
+    def _prof(self):
+        """
+        The lenstronomy profile class, which is imported the first time it is needed
+        """
+        from lenstronomy.LensModel.Profiles.p_jaffe import PJaffe
+        return PJaffe()
+
     @property
     def params_physical(self):
         """
@@ -112,7 +118,7 @@ class PJaffeSubhalo(Halo):
                                                                   self._args['c_scatter'],
                                                                   self._args['c_scatter_dex'],
                                                                 self._args['kwargs_suppression'],
-                                                                self._args['suppression_model'])
+                                                                self._args['suppression_model'], rng=self.rng)
 
             self._profile_args = (concentration)
 
@@ -135,7 +141,7 @@ class PJaffeFieldhalo(PJaffeSubhalo):
                                                                   self._args['c_scatter'],
                                                                   self._args['c_scatter_dex'],
                                                                 self._args['kwargs_suppression'],
-                                                                self._args['suppression_model'])
+                                                                self._args['suppression_model'], rng=self.rng)
 
             self._profile_args = (concentration)
 
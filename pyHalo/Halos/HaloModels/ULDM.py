@@ -1,8 +1,5 @@
 from pyHalo.Halos.halo_base import Halo
-from lenstronomy.LensModel.Profiles.cnfw import CNFW
-from lenstronomy.LensModel.Profiles.uldm import Uldm
 from scipy.optimize import minimize
-import lenstronomy.Util.constants as const
 import numpy as np
 
 class ULDMFieldHalo(Halo):
@@ -41,7 +38,7 @@ class ULDMFieldHalo(Halo):
                                                                   self._args['c_scatter'],
                                                                   self._args['c_scatter_dex'],
                                                                 self._args['kwargs_suppression'],
-                                                                self._args['suppression_model'])
+                                                                self._args['suppression_model'], rng=self.rng)
         return self._c
 
     @property
@@ -89,6 +86,7 @@ class ULDMFieldHalo(Halo):
 
         :return: core radius 'theta_c' and core density 'kappa_0' in lensing units.
         """
+        import lenstronomy.Util.constants as const
         r_c = self._core_radius(m_log10, M, plaw) # in kpc
         rho_c = self._central_density(m_log10, r_c) # in M_solar/pc^3
         r_c *= 10**3 # in pc
@@ -142,6 +140,8 @@ class ULDMFieldHalo(Halo):
         the composite profile has the inputted virial mass.
         """
 
+        from lenstronomy.LensModel.Profiles.cnfw import CNFW
+        from lenstronomy.LensModel.Profiles.uldm import Uldm
         r200 = self._c * cnfw_params['Rs']
         rho0 = Uldm().density_lens(0,uldm_params['kappa_0'],
                                     uldm_params['theta_c'])
@@ -193,6 +193,8 @@ class ULDMFieldHalo(Halo):
 
         :return: Evaluated mass constraint equation for CNFW component profile
         """
+        from lenstronomy.LensModel.Profiles.cnfw import CNFW
+        from lenstronomy.LensModel.Profiles.uldm import Uldm
         r_core = beta * rs
         sigma_crit = self.lens_cosmo.sigmacrit
         args_nfw = (r, rs, alpha_rs*sigma_crit, r_core)
@@ -1,6 +1,5 @@
 from pyHalo.Halos.halo_base import Halo
 from pyHalo.Halos.HaloModels.TNFW import TNFWFieldHalo, TNFWSubhalo
-from lenstronomy.LensModel.Profiles.tnfw import TNFW
 import numpy as np
 
 
@@ -18,13 +17,20 @@ class coreTNFWBase(Halo):
         See documentation in base class (Halos/halo_base.py)
 
         """
-        self._tnfw_lenstronomy = TNFW()
         self._tnfw = tnfw_class
         self._lens_cosmo = lens_cosmo_instance
 
         super(coreTNFWBase, self).__init__(mass, x, y, r3d, mdef, z, sub_flag,
                                                 lens_cosmo_instance, args, unique_tag)
 
+    @property
+    def _tnfw_lenstronomy(self):
+        """
+        The lenstronomy profile class, which is imported the first time it is needed
+        """
+        from lenstronomy.LensModel.Profiles.tnfw import TNFW
+        return TNFW()
+
     @property
     def lenstronomy_ID(self):
         """
@@ -32,6 +38,17 @@ class coreTNFWBase(Halo):
         """
         return ['NumericalAlpha']
 
+    @property
+    def rng(self):
+        """
+        The random number generator of the TNFW profile used to compute the concentration
+        """
+        return self._tnfw.rng
+
+    @rng.setter
+    def rng(self, rng):
+        self._tnfw.rng = rng
+
     @property
     def params_physical(self):
         """
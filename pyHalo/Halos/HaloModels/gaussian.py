@@ -1,5 +1,4 @@
 from pyHalo.Halos.halo_base import Halo
-from lenstronomy.LensModel.Profiles.gaussian_kappa import GaussianKappa
 import numpy as np
 
 class Gaussian(Halo):
@@ -1,5 +1,4 @@
 from pyHalo.Halos.halo_base import Halo
-from lenstronomy.LensModel.Profiles.splcore import SPLCORE
 import numpy as np
 
 class PowerLawSubhalo(Halo):
@@ -12,11 +11,18 @@ class PowerLawSubhalo(Halo):
         """
         See documentation in base class (Halos/halo_base.py)
         """
-        self._prof = SPLCORE()
         self._lens_cosmo = lens_cosmo_instance
         super(PowerLawSubhalo, self).__init__(mass, x, y, r3d, mdef, z, sub_flag,
                                               lens_cosmo_instance, args, unique_tag)
 
+    @property
+    def _prof(self):
+        """
+        The lenstronomy profile class, which is imported the first time it is needed
+        """
+        from lenstronomy.LensModel.Profiles.splcore import SPLCORE
+        return SPLCORE()
+
     @property
     def params_physical(self):
         """
@@ -113,7 +119,7 @@ class PowerLawSubhalo(Halo):
                                                                   self._args['c_scatter'],
                                                                   self._args['c_scatter_dex'],
                                                                 self._args['kwargs_suppression'],
-                                                                self._args['suppression_model'])
+                                                                self._args['suppression_model'], rng=self.rng)
 
             gamma = self._args['log_slope_halo']
             x_core_halo = self._args['x_core_halo']
@@ -141,7 +147,7 @@ class PowerLawFieldHalo(PowerLawSubhalo):
                                                                   self._args['c_scatter'],
                                                                   self._args['c_scatter_dex'],
                                                                self._args['kwargs_suppression'],
-                                                               self._args['suppression_model'])
+                                                               self._args['suppression_model'], rng=self.rng)
             gamma = self._args['log_slope_halo']
             x_core_halo = self._args['x_core_halo']
             self._profile_args = (concentration, gamma, x_core_halo)
@@ -1,6 +1,7 @@
 import numpy as numpy
-from colossus.halo.concentration import concentration, peaks
 from pyHalo.defaults import halo_default
+from pyHalo.Halos.concentration_table import concentration_table
+from pyHalo.random_numbers import random_state
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -16,11 +17,13 @@ class Concentration(object):
         self._lens_cosmo = lens_cosmo
 
     def nfw_concentration(self, M, z, model, mdef, logmhm,
-                          scatter, scatter_amplitude, kwargs_suppresion, suppression_model):
+                          scatter, scatter_amplitude, kwargs_suppresion, suppression_model, lookup_table=None, rng=None):
 
         """
-        :param M: mass in units M_solar (no little h)
-        :param z: redshift
+        :param M: mass in units M_solar (no little h); a number or an array
+        :param z: redshift; a number, or an array with the same length as M. For arrays of redshifts, the
+        concentration-mass relation is evaluated once for each unique redshift with the masses of all halos at that
+        redshift, and the scatter and WDM suppression are applied to all halos at once
         :param model: the model for the concentration-mass relation
         if type dict, will assume a custom MC relation parameterized by c0, beta, zeta (see _NFW_concentration_custom)
         if string, will use the corresponding concentration model in colossus (see http://www.benediktdiemer.com/code/colossus/)
@@ -33,52 +36,57 @@ class Concentration(object):
         :param scatter_amplitude: the amplitude of the scatter in the mass-concentration relation in dex
         :param kwargs_suppresion: keyword arguments for the suppression function
         :param suppression_model: the type of suppression, either 'polynomial' or 'hyperbolic'
+        :param lookup_table: bool; if True, colossus models are evaluated with a precomputed lookup table that
+        reproduces the exact concentrations to a relative tolerance ConcentrationTable.tolerance (see
+        Halos/concentration_table.py). If False, the concentrations are computed exactly with colossus. Defaults to
+        halo_default.mc_lookup_table (False)
+        :param rng: a numpy Generator; defaults to pyHalo.random_numbers.random_state
         :return: the concentration of the NFW halo
         """
 
         h = self._lens_cosmo.cosmo.h
+        table = None
 
         if isinstance(model, dict):
 
             assert 'custom' in model.keys()
-
-            if isinstance(M, float) or isinstance(M, int):
-                M_h = M * h
-                _c = self.NFW_concentration_custom(M_h, z, model)
-            else:
-
-                if isinstance(z, numpy.ndarray) or isinstance(z, list):
-                    assert len(z) == len(M)
-                    _c = [self.NFW_concentration_custom(float(mi * h), z[i], model)
-                         for i, mi in enumerate(M)]
-                else:
-                    _c = [self.NFW_concentration_custom(float(mi * h), z, model)
-                         for i, mi in enumerate(M)]
+            function = lambda m_h, z_eval: self.NFW_concentration_custom(m_h, z_eval, model)
 
         else:
 
-            if isinstance(M, float) or isinstance(M, int):
-                M_h = M * self._lens_cosmo.cosmo.h
-                _c = concentration(M_h, mdef=mdef, model=model, z=z)
+            if lookup_table is None:
+                lookup_table = halo_default.mc_lookup_table
+            if lookup_table:
+                table = concentration_table(model, mdef)
 
+            if table is None:
+                from colossus.halo.concentration import concentration
+                function = lambda m_h, z_eval: concentration(m_h, mdef=mdef, model=model, z=z_eval)
             else:
+                function = table
+
+        if isinstance(M, float) or isinstance(M, int):
+            M_h = M * h
+            _c = function(M_h, z)
 
-                if isinstance(z, numpy.ndarray) or isinstance(z, list):
-                    assert len(z) == len(M)
-                    _c = []
-                    for (mi, zi) in zip(M, z):
-                        M_h = mi * self._lens_cosmo.cosmo.h
-                        _c.append(concentration(M_h, mdef=mdef, model=model, z=zi))
+        else:
 
+            M = numpy.array(M)
+            if isinstance(z, numpy.ndarray) or isinstance(z, list):
+                z = numpy.array(z)
+                assert len(z) == len(M)
+                if table is None:
+                    _c = self._evaluate_by_redshift(function, M * h, z)
                 else:
-                    M_h = M * self._lens_cosmo.cosmo.h
-                    _c = concentration(M_h, mdef=mdef, model=model, z=z)
+                    _c = table(M * h, z)
+            else:
+                _c = function(M * h, z)
 
         c = numpy.array(_c)
 
         if scatter:
             _log_c = numpy.log(c)
-            c = numpy.random.lognormal(_log_c, scatter_amplitude)
+            c = random_state(rng).lognormal(_log_c, scatter_amplitude)
 
         if logmhm is not None:
             rescale = WDM_concentration_suppresion_factor(M, z, logmhm, suppression_model, kwargs_suppresion)
@@ -87,6 +95,29 @@ class Concentration(object):
 
         return c * rescale
 
+    @staticmethod
+    def _evaluate_by_redshift(function, M_h, z):
+
+        """
+        Evaluates the mass-concentration relation for arrays of masses and redshifts, calling function once for each
+        unique redshift with the masses of all halos at that redshift
+        :param function: a function that returns the concentration given an array of masses (units M_sun / h) and
+        a redshift
+        :param M_h: array of halo masses in units M_sun / h
+        :param z: array of halo redshifts
+        :return: the concentration of each halo
+        """
+
+        c = numpy.empty(len(M_h))
+        z_unique, inverse = numpy.unique(z, return_inverse=True)
+        order = numpy.argsort(inverse, kind='stable')
+        bounds = numpy.searchsorted(inverse[order], numpy.arange(0, len(z_unique) + 1))
+        for k, z_k in enumerate(z_unique):
+            inds = order[bounds[k]:bounds[k + 1]]
+            c[inds] = function(M_h[inds], z_k)
+
+        return c
+
     def NFW_concentration_custom(self, M_h, z, kwargs_model):
 
         """
@@ -100,6 +131,7 @@ class Concentration(object):
         :return: The concentration of the halo
         """
 
+        from colossus.lss import peaks
         Mref_h = 10 ** 8 * self._lens_cosmo.cosmo.h
         nu = peaks.peakHeight(M_h, z)
         nu_ref = peaks.peakHeight(Mref_h, 0)
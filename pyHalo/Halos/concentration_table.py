@@ -0,0 +1,150 @@
+import os
+import hashlib
+import numpy as np
+from threading import Lock
+from scipy.interpolate import RectBivariateSpline
+from pyHalo.defaults import cache_default
+from pyHalo.cache_io import cached_table
+
+_tables = {}
+_tables_lock = Lock()
+
+class ConcentrationTable(object):
+    """
+    A lookup table of a colossus mass-concentration relation c(M, z), tabulated for one cosmology, model, and mass
+    definition on a grid of log10(M) and z. The table is computed once, saved as a .npy file in the cache directory
+    (see CacheDefaults in defaults.py), and loaded with memory mapping in subsequent sessions.
+
+    Concentrations are interpolated with a bicubic spline in log10(c). For the diemer19 model, the relative difference
+    between the interpolated and exact concentrations is less than 1e-4 (typically ~1e-5) inside the domain of
+    the table. Masses or redshifts outside the domain of the table are evaluated exactly, calling colossus once for
+    each unique redshift.
+
+    The table is only used if halo_default.mc_lookup_table is True, or if lookup_table=True is passed to
+    Concentration.nfw_concentration.
+    """
+
+    log10_mass_grid = np.linspace(3., 13., 201)  # units M_sun / h
+    z_grid = np.linspace(0., 10., 201)
+    tolerance = 1e-4
+
+    def __init__(self, model, mdef, log10_c):
+
+        """
+
+        :param model: the name of the concentration model in colossus
+        :param mdef: the mass definition
+        :param log10_c: log10 of the concentration evaluated on the grid z_grid x log10_mass_grid
+        """
+        self._model = model
+        self._mdef = mdef
+        self._interp = RectBivariateSpline(self.z_grid, self.log10_mass_grid, log10_c)
+
+    @classmethod
+    def from_cache(cls, model, mdef, cache_directory=None):
+
+        """
+        Loads the table for the current colossus cosmology from the cache directory, computing and saving it first
+        if it does not exist
+        :param model: the name of the concentration model in colossus
+        :param mdef: the mass definition
+        :param cache_directory: the directory where tables are stored; defaults to cache_default.directory
+        :return: an instance of ConcentrationTable, or None if the model cannot be tabulated on the grid
+        """
+        if cache_directory is None:
+            cache_directory = cache_default.directory
+        fname = os.path.join(cache_directory, cls.filename(model, mdef))
+        shape = (len(cls.z_grid), len(cls.log10_mass_grid))
+
+        log10_c = cached_table(fname, lambda: cls.compute_table(model, mdef), valid=lambda t: t.shape == shape)
+        if log10_c is None:
+            return None
+        return ConcentrationTable(model, mdef, log10_c)
+
+    @classmethod
+    def filename(cls, model, mdef):
+
+        """
+        The name of the file that stores the table for the current colossus cosmology
+        :param model: the name of the concentration model in colossus
+        :param mdef: the mass definition
+        :return: the file name
+        """
+        from colossus.cosmology import cosmology
+        key = '_'.join([cosmology.getCurrent()._getHashableString(), str(model), str(mdef),
+                        str((cls.log10_mass_grid[0], cls.log10_mass_grid[-1], len(cls.log10_mass_grid))),
+                        str((cls.z_grid[0], cls.z_grid[-1], len(cls.z_grid)))])
+        key_hash = hashlib.sha1(key.encode('utf-8')).hexdigest()[0:16]
+        return 'concentration_' + str(model) + '_' + str(mdef) + '_' + key_hash + '.npy'
+
+    @classmethod
+    def compute_table(cls, model, mdef):
+
+        """
+        Evaluates the mass-concentration relation on the grid with colossus
+        :param model: the name of the concentration model in colossus
+        :param mdef: the mass definition
+        :return: log10 of the concentration on the grid, or None if the model does not return
+        valid concentrations on the entire grid
+        """
+        from colossus.halo.concentration import concentration
+        m_h = 10 ** cls.log10_mass_grid
+        c = np.array([concentration(m_h, mdef=mdef, model=model, z=zi) for zi in cls.z_grid])
+        if not np.all(np.isfinite(c)) or np.any(c <= 0):
+            return None
+        return np.log10(c)
+
+    def in_domain(self, M_h, z):
+
+        """
+
+        :param M_h: halo mass in units M_sun / h
+        :param z: redshift
+        :return: True where the halo mass and redshift lie inside the domain of the table
+        """
+        log10_m = np.log10(M_h)
+        return (log10_m >= self.log10_mass_grid[0]) & (log10_m <= self.log10_mass_grid[-1]) & \
+               (z >= self.z_grid[0]) & (z <= self.z_grid[-1])
+
+    def __call__(self, M_h, z):
+
+        """
+
+        :param M_h: halo mass in units M_sun / h; a number or an array
+        :param z: redshift; a number, or an array with the same shape as M_h
+        :return: the concentration
+        """
+        M_h, z = np.broadcast_arrays(np.array(M_h, dtype=float), np.array(z, dtype=float))
+        c = np.empty(M_h.shape)
+        inside = self.in_domain(M_h, z)
+        if np.any(inside):
+            c[inside] = 10 ** self._interp.ev(z[inside], np.log10(M_h[inside]))
+        if not np.all(inside):
+            from colossus.halo.concentration import concentration
+            outside = np.logical_not(inside)
+            m_outside, z_outside = M_h[outside], z[outside]
+            c_outside = np.empty(len(m_outside))
+            z_unique, inverse = np.unique(z_outside, return_inverse=True)
+            for k, z_k in enumerate(z_unique):
+                same_z = inverse == k
+                c_outside[same_z] = concentration(m_outside[same_z], mdef=self._mdef, model=self._model, z=z_k)
+            c[outside] = c_outside
+        if c.ndim == 0:
+            return float(c)
+        return c
+
+def concentration_table(model, mdef):
+
+    """
+    Returns the lookup table for the current colossus cosmology, model, and mass definition. Tables are shared by all
+    instances of Concentration in the process; a table is created by one thread while the others wait for it.
+    :param model: the name of the concentration model in colossus
+    :param mdef: the mass definition
+    :return: an instance of ConcentrationTable, or None if the model cannot be tabulated
+    """
+    from colossus.cosmology import cosmology
+    key = (cosmology.getCurrent()._getHashableString(), model, mdef, cache_default.directory)
+    with _tables_lock:
+        if key not in _tables:
+            _tables[key] = ConcentrationTable.from_cache(model, mdef)
+        return _tables[key]
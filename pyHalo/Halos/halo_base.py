@@ -19,9 +19,12 @@ class Halo(ABC):
         :param sub_flag: bool; if True, the halo is treated as a main deflector subhalo
         :param lens_cosmo_instance: an instance of LensCosmo
         :param args: keyword arguments that include default settings for the halo
-        :param unique_tag: a random number with 16 decimal places that uniquely identifies each halo
+        :param unique_tag: an integer ID that uniquely identifies each halo (see HaloIDAllocator in single_realization)
         :param fixed_position: determiens whether halos can be moved around when aligning a realization with
         the rendering volume
+
+        Random properties of the halo are drawn with the attribute rng, set by the realization (see
+        pyHalo.random_numbers).
         """
 
         self.lens_cosmo = lens_cosmo_instance
@@ -37,6 +40,7 @@ class Halo(ABC):
         self.unique_tag = unique_tag
         self._rescale_norm = 1.
         self.fixed_position = fixed_position
+        self.rng = None
 
     def rescale_normalization(self, factor):
         """
@@ -95,7 +99,7 @@ class Halo(ABC):
 
         if not hasattr(self, '_z_infall'):
 
-            self._z_infall = self.lens_cosmo.z_accreted_from_zlens(self.mass, self.z)
+            self._z_infall = self.lens_cosmo.z_accreted_from_zlens(self.mass, self.z, self.rng)
 
         return self._z_infall
 
@@ -2,19 +2,20 @@ import numpy
 from scipy.interpolate import interp1d
 from scipy.special import erfc
 from pyHalo.Halos.concentration import Concentration
-import astropy.units as un
+from pyHalo.random_numbers import random_state
 
 class LensCosmo(object):
 
     def __init__(self, z_lens=None, z_source=None, cosmology=None):
 
         if cosmology is None:
-            from pyHalo.Cosmology.cosmology import Cosmology
-            cosmology = Cosmology()
+            from pyHalo.instance_cache import cosmology_instance
+            cosmology = cosmology_instance()
 
         self.cosmo = cosmology
         self.z_lens, self.z_source = z_lens, z_source
 
+        import astropy.units as un
         # critical density of the universe in M_sun h^2 Mpc^-3
         rhoc = un.Quantity(self.cosmo.astropy.critical_density(0), unit=un.Msun / un.Mpc ** 3).value
         self.rhoc = rhoc / self.cosmo.h ** 2
@@ -32,7 +33,7 @@ class LensCosmo(object):
 
         self._concentration = Concentration(self)
 
-        self._computed_zacc_pdf = False
+        self._zacc_pdfs = None
 
     def sigma_crit_mass(self, z, area):
 
@@ -86,7 +87,8 @@ class LensCosmo(object):
         return rN_physical_kpc
 
     def NFW_concentration(self, M, z, model='diemer19', mdef='200c', logmhm=None,
-                          scatter=True, scatter_amplitude=0.13, kwargs_suppresion=None, suppression_model=None):
+                          scatter=True, scatter_amplitude=0.13, kwargs_suppresion=None, suppression_model=None,
+                          lookup_table=None, rng=None):
 
         """
         Returns the concentration of an NFW halo (see method in the class Concentration)
@@ -104,12 +106,16 @@ class LensCosmo(object):
         :param kwargs_suppresion: keyword arguments for the suppression function
         :param suppression_model: the type of suppression, either 'polynomial' or 'hyperbolic'
         :param scatter_amplitude: the amplitude of the scatter in the mass-concentration relation in dex
+        :param lookup_table: bool; whether to evaluate colossus models with a precomputed lookup table
+        (see Halos/concentration_table.py); defaults to halo_default.mc_lookup_table
+        :param rng: a numpy Generator; defaults to pyHalo.random_numbers.random_state
         :return: the concentration of the NFW halo
 
         """
 
         return self._concentration.nfw_concentration(M, z, model, mdef, logmhm,
-                                                     scatter,scatter_amplitude, kwargs_suppresion, suppression_model)
+                                                     scatter,scatter_amplitude, kwargs_suppresion, suppression_model,
+                                                     lookup_table, rng)
 
     ###############################################################
     """ROUTINES BASED ON CERTAIN COSMOLOGICAL MODELS (E.G. WDM)"""
@@ -163,14 +169,12 @@ class LensCosmo(object):
 
         """
 
-        :param z1: redshift lens
-        :param z2: redshift source
+        :param z1: redshift lens (a number or an array)
+        :param z2: redshift source (a number or an array)
         :return: critical density for lensing in units of M_sun / Mpc ^ 2
         """
 
-        D_ds = self.cosmo.D_A(z1, z2)
-        D_d = self.cosmo.D_A_z(z1)
-        D_s = self.cosmo.D_A_z(z2)
+        D_d, D_s, D_ds = self.cosmo.lensing_distances(z1, z2)
 
         d_inv = D_s*D_ds**-1*D_d**-1
 
@@ -286,7 +290,7 @@ class LensCosmo(object):
         """
         Returns the cosmology-dependent factor to evaluate the Einstein radius of a point mass of mass M:
 
-        :param z: redshift
+        :param z: redshift (a number or an array)
         :return: The factor that when multiplied by sqrt(mass) gives the Einstein radius of a point mass
 
         R_ein = sqrt(M) * point_mass_factor_z(z)
@@ -294,9 +298,7 @@ class LensCosmo(object):
         """
         factor = 4 * self.cosmo.G * self.cosmo.c ** -2
 
-        dds = self.cosmo.D_A(z, self.z_source)
-        dd = self.cosmo.D_A_z(z)
-        ds = self.D_s
+        dd, ds, dds = self.cosmo.lensing_distances(z, self.z_source)
 
         factor *= dds / dd / ds
 
@@ -309,20 +311,21 @@ class LensCosmo(object):
     @property
     def _subhalo_accretion_pdfs(self):
 
-        if self._computed_zacc_pdf is False:
-
-            self._computed_zacc_pdf = True
-            self._mlist, self._dzvals, self._cdfs = self._Msub_cdfs(self.z_lens)
+        pdfs = self._zacc_pdfs
+        if pdfs is None:
+            pdfs = self._Msub_cdfs(self.z_lens)
+            # assigned in one step, so that threads sharing this instance never see partially computed pdfs
+            self._zacc_pdfs = pdfs
 
-        return self._mlist, self._dzvals, self._cdfs
+        return pdfs
 
-    def z_accreted_from_zlens(self, msub, zlens):
+    def z_accreted_from_zlens(self, msub, zlens, rng=None):
 
         mlist, dzvals, cdfs = self._subhalo_accretion_pdfs
 
         idx = self._mass_index(msub, mlist)
 
-        z_accreted = zlens + self._sample_cdf_single(cdfs[idx])
+        z_accreted = zlens + self._sample_cdf_single(cdfs[idx], rng)
 
         return z_accreted
 
@@ -379,9 +382,9 @@ class LensCosmo(object):
         return normalization * numpy.exp(-0.5 * ((z - z_lens) / z_decay) ** 2) \
                * numpy.exp(-z_decay_exp * (z - z_lens))
 
-    def _sample_cdf_single(self, cdf_interp):
+    def _sample_cdf_single(self, cdf_interp, rng=None):
 
-        u = numpy.random.uniform(0, 1)
+        u = random_state(rng).uniform(0, 1)
 
         try:
             output = float(cdf_interp(u))
@@ -1,4 +1,5 @@
 import numpy as np
+from pyHalo.random_numbers import random_state, random_generator
 
 class DeltaFunction(object):
 
@@ -9,14 +10,16 @@ class DeltaFunction(object):
     number of objects = density * volume / mass
     """
 
-    def __init__(self, mass, volume, rho, draw_poisson=True):
+    def __init__(self, mass, volume, rho, draw_poisson=True, rng=None):
         """
 
         :param mass: mass of objects to render
         :param volume: rendering volume
         :param rho: a density
         :param draw_poisson: whether or not to draw from a poisson distribution
+        :param rng: a numpy Generator or a seed; defaults to pyHalo.random_numbers.random_state
         """
+        self._rng = random_state(random_generator(rng))
         self.volume = volume
         self.mass = mass
         self.rho = rho
@@ -29,7 +32,7 @@ class DeltaFunction(object):
         """
         n = self.rho * self.volume / self.mass
         if self.draw_poisson:
-            n = int(np.random.poisson(n))
+            n = int(self._rng.poisson(n))
         else:
             n = int(np.round(n))
 
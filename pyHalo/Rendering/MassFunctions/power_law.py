@@ -1,53 +1,31 @@
 import numpy as np
 from pyHalo.Rendering.MassFunctions.mass_function_utilities import integrate_power_law_analytic
-from pyHalo.Rendering.MassFunctions.mass_function_utilities import WDM_suppression
+from pyHalo.random_numbers import random_state, random_generator
+from pyHalo.instance_cache import InstanceCache
+from pyHalo.defaults import cache_default
 
 class GeneralPowerLaw(object):
 
     """
     This class handles computations of a double power law mass function of the form
-    dn/dm = m^x * (1 + (a * m_c / m)^b)^c
+    dn/dm = m^x * (1 + a * (m_c / m)^b)^c
     where a, b, and c are constants, and m_c is a characteristic mass scale.
 
     The keywords for a, b, c are a_wdm, b_wdm, and c_wdm, respectively
 
     Lovell 2020 fit this mass function to simulations of Warm Dark Matter cosmologies and find
     (a, b, c) = (2.3, 0.8, -1) for central halos and (4.2, 2.5, -0.2) for subhalos
+
+    If log_mc is specified, the number of halos is drawn from the integral of the double power law and the masses are
+    sampled from its tabulated cumulative distribution (see SuppressedPowerLawTable).
     """
 
     def __init__(self, log_mlow, log_mhigh, power_law_index, draw_poisson, normalization,
-                 log_mc, a_wdm, b_wdm, c_wdm):
-
-        if a_wdm is None:
-            assert b_wdm is None, 'If one of a_wdm, b_wdm, or c_wdm is not specified (None), all parameters must be None'
-            assert c_wdm is None, 'If one of a_wdm, b_wdm, or c_wdm is not specified (None), all parameters must be None'
-        else:
-            assert b_wdm is not None, 'Must specify values for all three of a_wdm, b_wdm, c_wdm'
-            assert c_wdm is not None, 'Must specify values for all three of a_wdm, b_wdm, c_wdm'
-        if b_wdm is None:
-            assert a_wdm is None, 'If one of a_wdm, b_wdm, or c_wdm is not specified (None), all parameters must be None'
-            assert c_wdm is None, 'If one of a_wdm, b_wdm, or c_wdm is not specified (None), all parameters must be None'
-        else:
-            assert a_wdm is not None, 'Must specify values for all three of a_wdm, b_wdm, c_wdm'
-            assert c_wdm is not None, 'Must specify values for all three of a_wdm, b_wdm, c_wdm'
-        if c_wdm is None:
-            assert a_wdm is None, 'If one of a_wdm, b_wdm, or c_wdm is not specified (None), all parameters must be None'
-            assert b_wdm is None, 'If one of a_wdm, b_wdm, or c_wdm is not specified (None), all parameters must be None'
-        else:
-            assert a_wdm is not None, 'Must specify values for all three of a_wdm, b_wdm, c_wdm'
-            assert b_wdm is not None, 'Must specify values for all three of a_wdm, b_wdm, c_wdm'
+                 log_mc, a_wdm, b_wdm, c_wdm, rng=None):
 
-        if normalization < 0:
-            raise Exception('normalization cannot be < 0.')
-        if c_wdm is not None and c_wdm > 0:
-            raise ValueError('c_wdm should be a negative number (otherwise mass function gets steeper (unphysical)')
-        if a_wdm is not None and a_wdm < 0:
-            raise ValueError('a_wdm should be a positive number for suppression factor: '
-                             '( 1 + (a_wdm * m/m_c)^b_wdm)^c_wdm')
+        _check_parameters(normalization, log_mc, a_wdm, b_wdm, c_wdm)
 
-        if np.any([a_wdm is None, b_wdm is None, c_wdm is None]):
-            assert log_mc is None, 'If log_mc is specified, must also specify kwargs for a_wdm, b_wdm, c_wdm.' \
-                                   '(See documentation in pyHalo/Rendering/MassFunctions/Powerlaw/broken_powerlaw'
+        self._rng = random_state(random_generator(rng))
 
         self._log_mc = log_mc
         self._a_wdm = a_wdm
@@ -61,12 +39,18 @@ class GeneralPowerLaw(object):
 
         self._nhalos_mean_unbroken = integrate_power_law_analytic(normalization, 10 ** log_mlow, 10 ** log_mhigh, 0,
                                                                   power_law_index)
+        if log_mc is None:
+            self._table = None
+        else:
+            self._table = suppressed_power_law_table(log_mlow, log_mhigh, power_law_index, log_mc, a_wdm, b_wdm,
+                                                     c_wdm)
+            self._nhalos_mean = normalization * self._table.integral
 
     def draw(self):
 
         """
         Draws samples from a double power law distribution between mL and mH of the form
-        m ^ power_law_index * (1 + (a*mc / m)^b )^c
+        m ^ power_law_index * (1 + a * (mc / m)^b )^c
 
         Physically, the second term multiplying m^power_law_index can be a suppression in the mass function on small
         scales.
@@ -79,16 +63,15 @@ class GeneralPowerLaw(object):
         :return:
         """
 
-        m = self._sample(self.draw_poisson, self._index, self._mH, self._mL, self._nhalos_mean_unbroken)
+        if self._table is None:
+            return self._sample(self.draw_poisson, self._index, self._mH, self._mL, self._nhalos_mean_unbroken)
 
-        if len(m) == 0 or self._log_mc is None:
-            return m
-
-        factor = WDM_suppression(m, 10 ** self._log_mc, self._a_wdm, self._b_wdm, self._c_wdm)
-        u = np.random.rand(int(len(m)))
-        inds = np.where(u < factor)
+        if self.draw_poisson:
+            N = self._rng.poisson(self._nhalos_mean)
+        else:
+            N = int(np.round(self._nhalos_mean))
 
-        return m[inds]
+        return self._table.sample(self._rng.random(N))
 
     def _sample(self, draw_poisson, index, mH, mL, n_draw):
 
@@ -103,11 +86,11 @@ class GeneralPowerLaw(object):
         """
 
         if draw_poisson:
-            N = np.random.poisson(n_draw)
+            N = self._rng.poisson(n_draw)
         else:
             N = int(round(np.round(n_draw)))
 
-        x = np.random.rand(N)
+        x = self._rng.random(N)
         if index == -1:
             norm = np.log(mH / mL)
             X = mL * np.exp(norm * x)
@@ -117,3 +100,240 @@ class GeneralPowerLaw(object):
                     (1 + index) ** -1)
 
         return np.array(X)
+
+class GeneralPowerLawPlanes(object):
+
+    """
+    Same as GeneralPowerLaw, but draws the halo masses on many lens planes at once. The mass range, power law index,
+    and normalization are arrays with one entry per lens plane; the parameters of the suppression term are shared by
+    all lens planes.
+    """
+
+    def __init__(self, log_mlow, log_mhigh, power_law_index, draw_poisson, normalization,
+                 log_mc, a_wdm, b_wdm, c_wdm, rng=None):
+
+        """
+
+        :param log_mlow: log10 of the minimum halo mass on each lens plane
+        :param log_mhigh: log10 of the maximum halo mass on each lens plane
+        :param power_law_index: the logarithmic slope of the mass function on each lens plane
+        :param draw_poisson: bool; whether to draw the number of halos on each plane from a Poisson distribution
+        :param normalization: the normalization of the mass function on each lens plane
+        :param log_mc: log10 of the characteristic mass scale of the suppression term
+        :param a_wdm: the a parameter of the suppression term
+        :param b_wdm: the b parameter of the suppression term
+        :param c_wdm: the c parameter of the suppression term
+        :param rng: a numpy Generator or a seed; defaults to pyHalo.random_numbers.random_state
+        """
+
+        normalization = np.array(normalization, dtype=float)
+        _check_parameters(normalization, log_mc, a_wdm, b_wdm, c_wdm)
+
+        self._rng = random_state(random_generator(rng))
+
+        self._log_mc = log_mc
+        self._a_wdm = a_wdm
+        self._b_wdm = b_wdm
+        self._c_wdm = c_wdm
+
+        self.draw_poisson = draw_poisson
+        shape = normalization.shape
+        self._index = np.broadcast_to(np.array(power_law_index, dtype=float), shape)
+        self._mL = np.broadcast_to(10 ** np.array(log_mlow, dtype=float), shape)
+        self._mH = np.broadcast_to(10 ** np.array(log_mhigh, dtype=float), shape)
+
+        factor = 1 + self._index
+        factor_nonzero = np.where(factor == 0, 1., factor)
+        integral = np.where(factor == 0, np.log(self._mH / self._mL),
+                            (self._mH ** factor_nonzero - self._mL ** factor_nonzero) / factor_nonzero)
+        self._nhalos_mean_unbroken = normalization * integral
+
+        if log_mc is None:
+            self._tables = None
+        else:
+            log_mlow = np.broadcast_to(np.array(log_mlow, dtype=float), shape)
+            log_mhigh = np.broadcast_to(np.array(log_mhigh, dtype=float), shape)
+            self._tables = [suppressed_power_law_table(log_mlow_i, log_mhigh_i, index_i, log_mc, a_wdm, b_wdm, c_wdm)
+                            for (log_mlow_i, log_mhigh_i, index_i) in zip(log_mlow, log_mhigh, self._index)]
+            self._nhalos_mean = normalization * np.array([table.integral for table in self._tables])
+
+    def draw(self):
+
+        """
+        Draws the number of halos on every lens plane, and then samples all halo masses at once from the mass function
+        on their lens plane
+        :return: the halo masses, and the index of the lens plane of each halo
+        """
+
+        nhalos_mean = self._nhalos_mean_unbroken if self._tables is None else self._nhalos_mean
+        if self.draw_poisson:
+            n = self._rng.poisson(nhalos_mean)
+        else:
+            n = np.round(nhalos_mean).astype(int)
+
+        plane_index = np.repeat(np.arange(0, len(n)), n)
+        x = self._rng.random(len(plane_index))
+
+        if self._tables is not None:
+            return SuppressedPowerLawTable.sample_tables(self._tables, plane_index, x), plane_index
+
+        index, mL, mH = self._index[plane_index], self._mL[plane_index], self._mH[plane_index]
+
+        m = np.empty(len(x))
+        log_uniform = index == -1
+        m[log_uniform] = mL[log_uniform] * np.exp(np.log(mH[log_uniform] / mL[log_uniform]) * x[log_uniform])
+        power_law = np.logical_not(log_uniform)
+        p = 1 + index[power_law]
+        m[power_law] = (x[power_law] * (mH[power_law] ** p - mL[power_law] ** p) + mL[power_law] ** p) ** (1 / p)
+
+        return m, plane_index
+
+class SuppressedPowerLawTable(object):
+
+    """
+    The cumulative distribution of a double power law mass function
+
+    dn/dm = m^x * (1 + a * (m_c / m)^b)^c
+
+    between m_low and m_high, tabulated on a grid of log(m). Between grid points the mass function is interpolated as a
+    power law, so that the cumulative distribution can be inverted analytically in each interval. Masses are sampled by
+    inverting the cumulative distribution, so every uniform random number gives a halo (unlike drawing from the
+    unsuppressed power law and rejecting halos with probability given by the suppression term).
+
+    The interpolation is exact for an unsuppressed power law. With suppression (c < 0), log(dn/dm) is concave in
+    log(m), and the interpolated mass function underestimates the exact one by a relative amount of at most
+    |c| b^2 h^2 / 32, where h = ln(m_high / m_low) / num_intervals. Over four decades in mass this is 8e-6 for
+    (b, c) = (0.8, -1.3) and 3e-5 for the ULDM-like suppression (b, c) = (1.1, -2.2); the error of the cumulative
+    distribution, and of the halo masses drawn from it, is smaller.
+    """
+
+    num_intervals = 512
+
+    def __init__(self, log_mlow, log_mhigh, power_law_index, log_mc, a_wdm, b_wdm, c_wdm):
+
+        """
+
+        :param log_mlow: log10 of the minimum halo mass
+        :param log_mhigh: log10 of the maximum halo mass
+        :param power_law_index: the logarithmic slope of the mass function
+        :param log_mc: log10 of the characteristic mass scale of the suppression term
+        :param a_wdm: the a parameter of the suppression term
+        :param b_wdm: the b parameter of the suppression term
+        :param c_wdm: the c parameter of the suppression term
+        """
+        log_m = np.linspace(np.log(10 ** log_mlow), np.log(10 ** log_mhigh), self.num_intervals + 1)
+        # the mass function per unit log(m), m * dn/dm
+        log_dn_dlogm = (1 + power_law_index) * log_m + c_wdm * np.log1p(a_wdm * np.exp(b_wdm * (np.log(10 ** log_mc)
+                                                                                                - log_m)))
+        self.log_m_min = log_m[0]
+        self.step = log_m[1] - log_m[0]
+        # the logarithmic slope of m * dn/dm, and its integral over log(m), in each interval
+        self.slope = np.diff(log_dn_dlogm) / self.step
+        integral = np.exp(log_dn_dlogm[0:-1]) * self.step * _expm1_ratio(self.slope * self.step)
+        cumulative = np.append(0., np.cumsum(integral))
+        self.integral = cumulative[-1]
+        self.cdf = cumulative / self.integral
+
+    def sample(self, u):
+
+        """
+        :param u: uniform random numbers between 0 and 1
+        :return: halo masses with the distribution of the tabulated mass function
+        """
+        return self.sample_tables([self], np.zeros(len(u), dtype=int), u)
+
+    @staticmethod
+    def sample_tables(tables, table_index, u):
+
+        """
+        Samples halo masses from many tabulated distributions at once
+        :param tables: a list of instances of SuppressedPowerLawTable
+        :param table_index: the index of the table from which to sample each halo
+        :param u: uniform random numbers between 0 and 1, one for each halo
+        :return: halo masses
+        """
+        if len(u) == 0:
+            return np.array([])
+
+        table_index = np.asarray(table_index)
+        num_intervals = len(tables[0].slope)
+        cdf = np.array([table.cdf for table in tables])
+        # the cumulative distributions of all tables are concatenated, with the distribution of table i offset by i,
+        # and each uniform random number is located in the distribution of its table with one search
+        cdf_flat = (cdf + np.arange(0, len(tables))[:, np.newaxis]).ravel()
+        interval = np.searchsorted(cdf_flat, u + table_index, side='right') - 1 - table_index * (num_intervals + 1)
+        interval = np.clip(interval, 0, num_intervals - 1)
+
+        cdf_low, cdf_high = cdf[table_index, interval], cdf[table_index, interval + 1]
+        width = cdf_high - cdf_low
+        t = np.clip((u - cdf_low) / np.where(width > 0, width, 1.), 0., 1.)
+
+        log_m_min = np.array([table.log_m_min for table in tables])[table_index]
+        step = np.array([table.step for table in tables])[table_index]
+        slope_step = np.array([table.slope for table in tables])[table_index, interval] * step
+        # invert the integral of a power law in m * dn/dm within the interval
+        small_slope = np.absolute(slope_step) < 1e-8
+        slope_step_nonzero = np.where(small_slope, 1., slope_step)
+        fraction = np.where(small_slope, t, np.log1p(t * np.expm1(slope_step)) / slope_step_nonzero)
+
+        return np.exp(log_m_min + step * (interval + fraction))
+
+_suppressed_power_law_tables = InstanceCache(cache_default.mass_function_table_cache_size)
+
+def suppressed_power_law_table(log_mlow, log_mhigh, power_law_index, log_mc, a_wdm, b_wdm, c_wdm):
+
+    """
+    Returns an instance of SuppressedPowerLawTable, reusing a cached instance created with the same parameters
+    (see SuppressedPowerLawTable for a description of the arguments)
+    """
+    key = tuple(float(value) for value in (log_mlow, log_mhigh, power_law_index, log_mc, a_wdm, b_wdm, c_wdm))
+    return _suppressed_power_law_tables.get(key, lambda: SuppressedPowerLawTable(*key))
+
+def _expm1_ratio(x):
+
+    """
+    :return: (exp(x) - 1) / x, with the limit 1 at x = 0
+    """
+    small = np.absolute(x) < 1e-8
+    return np.where(small, 1 + 0.5 * x, np.expm1(x) / np.where(small, 1., x))
+
+def _check_parameters(normalization, log_mc, a_wdm, b_wdm, c_wdm):
+
+    """
+    Checks the normalization and the parameters of the suppression term of a double power law mass function
+    :param normalization: the normalization of the mass function (a number or an array)
+    :param log_mc: log10 of the characteristic mass scale
+    :param a_wdm: the a parameter of the suppression term
+    :param b_wdm: the b parameter of the suppression term
+    :param c_wdm: the c parameter of the suppression term
+    """
+    if a_wdm is None:
+        assert b_wdm is None, 'If one of a_wdm, b_wdm, or c_wdm is not specified (None), all parameters must be None'
+        assert c_wdm is None, 'If one of a_wdm, b_wdm, or c_wdm is not specified (None), all parameters must be None'
+    else:
+        assert b_wdm is not None, 'Must specify values for all three of a_wdm, b_wdm, c_wdm'
+        assert c_wdm is not None, 'Must specify values for all three of a_wdm, b_wdm, c_wdm'
+    if b_wdm is None:
+        assert a_wdm is None, 'If one of a_wdm, b_wdm, or c_wdm is not specified (None), all parameters must be None'
+        assert c_wdm is None, 'If one of a_wdm, b_wdm, or c_wdm is not specified (None), all parameters must be None'
+    else:
+        assert a_wdm is not None, 'Must specify values for all three of a_wdm, b_wdm, c_wdm'
+        assert c_wdm is not None, 'Must specify values for all three of a_wdm, b_wdm, c_wdm'
+    if c_wdm is None:
+        assert a_wdm is None, 'If one of a_wdm, b_wdm, or c_wdm is not specified (None), all parameters must be None'
+        assert b_wdm is None, 'If one of a_wdm, b_wdm, or c_wdm is not specified (None), all parameters must be None'
+    else:
+        assert a_wdm is not None, 'Must specify values for all three of a_wdm, b_wdm, c_wdm'
+        assert b_wdm is not None, 'Must specify values for all three of a_wdm, b_wdm, c_wdm'
+
+    if np.any(np.array(normalization) < 0):
+        raise Exception('normalization cannot be < 0.')
+    if c_wdm is not None and c_wdm > 0:
+        raise ValueError('c_wdm should be a negative number (otherwise mass function gets steeper (unphysical)')
+    if a_wdm is not None and a_wdm < 0:
+        raise ValueError('a_wdm should be a positive number for suppression factor: '
+                         '(1 + a_wdm * (m_c / m)^b_wdm)^c_wdm')
+
+    if np.any([a_wdm is None, b_wdm is None, c_wdm is None]):
+        assert log_mc is None, 'If log_mc is specified, must also specify kwargs for a_wdm, b_wdm, c_wdm.' \
+                               '(See documentation in pyHalo/Rendering/MassFunctions/Powerlaw/broken_powerlaw'
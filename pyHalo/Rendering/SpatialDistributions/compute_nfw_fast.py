@@ -1,7 +1,13 @@
 from scipy.integrate import quad
 from scipy.interpolate import interp1d
 from time import time
+import os
+import hashlib
 import numpy as np
+from threading import Lock
+from pyHalo.defaults import cache_default
+from pyHalo.cache_io import cached_table
+from pyHalo.random_numbers import random_state
 
 """
 The functions and classes in this module are used only to compute a set of lookup tables for the NFW profile that I
@@ -154,59 +160,129 @@ for something else.
 #         np.savetxt('x2d_values_3D.txt', x2d_values_3D)
 #         np.savetxt('c_values_3D.txt', c_values_3D)
 #
+_fast_nfw_samplers = {}
+_fast_nfw_samplers_lock = Lock()
+
+def fast_nfw_sampler(file_path):
+
+    """
+    Returns the instance of FastNFW created from the lookup tables in file_path. The instance is created once and then
+    shared by all samplers in the process
+    :param file_path: the directory with the lookup tables
+    :return: an instance of FastNFW
+    """
+    with _fast_nfw_samplers_lock:
+        if file_path not in _fast_nfw_samplers:
+            _fast_nfw_samplers[file_path] = FastNFW(file_path)
+        return _fast_nfw_samplers[file_path]
+
+def load_lookup_table(file_path, name):
+
+    """
+    Loads the lookup table file_path + name + '.txt' as a read-only memory mapped array. The text file is converted
+    to a binary .npy file the first time it is loaded. A .npy file in file_path is used if it exists; otherwise the
+    converted table is stored in the pyHalo cache directory (see CacheDefaults in defaults.py)
+    :param file_path: the directory with the lookup tables
+    :param name: the name of the table
+    :return: the lookup table
+    """
+    fname_npy = file_path + name + '.npy'
+    if os.path.exists(fname_npy):
+        return np.load(fname_npy, mmap_mode='r')
+
+    fname_txt = file_path + name + '.txt'
+    stat = os.stat(fname_txt)
+    key = os.path.abspath(fname_txt) + '_' + str(stat.st_size) + '_' + str(stat.st_mtime)
+    key_hash = hashlib.sha1(key.encode('utf-8')).hexdigest()[0:16]
+    cache_directory = os.path.join(cache_default.directory, 'nfw_tables')
+    fname_cache = os.path.join(cache_directory, name + '_' + key_hash + '.npy')
+    return cached_table(fname_cache, lambda: np.loadtxt(fname_txt))
+
+def _stack_inverse_cdfs(cdfs, domains):
+
+    """
+    Stacks a set of tabulated cumulative distribution functions into one monotonic array, so that the inverse of any
+    row can be evaluated for many samples at once with a single call to np.searchsorted
+    :param cdfs: array with shape (n_rows, n_points); each row is a CDF normalized to one
+    :param domains: array with the same shape as cdfs that gives the coordinates where each CDF is tabulated
+    :return: the stacked CDFs, the flattened domains, the offset added to each row, and the number of points per row
+    """
+    n_rows, n_points = cdfs.shape
+    offsets = 2. * np.arange(0, n_rows)
+    stacked_cdfs = (cdfs + offsets[:, np.newaxis]).ravel()
+    return stacked_cdfs, np.array(domains).ravel(), offsets, n_points
+
+def _evaluate_inverse_cdfs(u, rows, stacked_cdfs, stacked_domains, offsets, n_points):
+
+    """
+    Evaluates the inverse CDF of row rows[i] at u[i] by linear interpolation, for all samples at once
+    :param u: array of uniform random numbers between 0 and 1
+    :param rows: array of the rows in the lookup table to use for each sample
+    :param stacked_cdfs, stacked_domains, offsets, n_points: the output of _stack_inverse_cdfs
+    :return: the samples
+    """
+    u_stacked = u + offsets[rows]
+    idx = np.searchsorted(stacked_cdfs, u_stacked, side='right') - 1
+    idx = np.clip(idx, rows * n_points, (rows + 1) * n_points - 2)
+    cdf_low, cdf_high = stacked_cdfs[idx], stacked_cdfs[idx + 1]
+    dcdf = cdf_high - cdf_low
+    weight = np.zeros_like(u_stacked)
+    nonzero = dcdf > 0
+    weight[nonzero] = (u_stacked[nonzero] - cdf_low[nonzero]) / dcdf[nonzero]
+    return stacked_domains[idx] + weight * (stacked_domains[idx + 1] - stacked_domains[idx])
+
 class LookupProjected(object):
 
     def __init__(self, fpath):
 
-        lookup_table = []
-
-        c_values = np.loadtxt(fpath + 'c_values_2D.txt')
-        domains = np.loadtxt(fpath + 'domains_2D.txt')
-        cdfs = np.loadtxt(fpath + 'cdfs_2D.txt')
+        c_values = load_lookup_table(fpath, 'c_values_2D')
+        domains = load_lookup_table(fpath, 'domains_2D')
+        cdfs = load_lookup_table(fpath, 'cdfs_2D')
 
         self.c_min = c_values[0]
         self.c_max = c_values[-1]
         self._c_step = c_values[1] - c_values[0]
 
-        for i in range(0, len(c_values)):
+        self._c_lookup = c_values
+        self._lookup_table = _stack_inverse_cdfs(cdfs, domains)
 
-            cdf_proj_inverted = interp1d(cdfs[i,:], domains[i,:])
-            lookup_table.append(cdf_proj_inverted)
+    def _row_index(self, c):
 
-        self._c_lookup = c_values
-        self._lookup_table = lookup_table
+        return int(np.argmin(np.absolute(c - self._c_lookup)))
 
-    def __call__(self, c):
+    def sample(self, c, N, rng=None):
+
+        """
+        Samples N projected radii (in units of the scale radius) from the projected NFW profile with concentration c
+        :param c: the concentration
+        :param N: the number of samples
+        :param rng: a numpy Generator; defaults to pyHalo.random_numbers.random_state
+        :return: an array of N projected radii
+        """
         assert c >= self.c_min and c <= self.c_max
+        rows = np.full(int(N), self._row_index(c))
+        u = random_state(rng).random(int(N))
+        return _evaluate_inverse_cdfs(u, rows, *self._lookup_table)
 
-        dc = np.absolute(c - self._c_lookup) / self._c_step
-        idx = np.argmin(dc)
-        u = np.random.rand()
-        return self._lookup_table[idx](u)
+    def __call__(self, c):
+
+        return self.sample(c, 1)[0]
 
 class Lookup3D(object):
 
     def __init__(self, fpath):
 
-        x2d_values = np.loadtxt(fpath + 'x2d_values_3D.txt')
-        c_values = np.loadtxt(fpath + 'c_values_3D.txt')
+        x2d_values = load_lookup_table(fpath, 'x2d_values_3D')
+        c_values = load_lookup_table(fpath, 'c_values_3D')
 
-        domains = np.loadtxt(fpath + 'domains_3D.txt')
-        cdfs = np.loadtxt(fpath + 'cdfs_3D.txt')
+        domains = load_lookup_table(fpath, 'domains_3D')
+        cdfs = load_lookup_table(fpath, 'cdfs_3D')
 
         self.c_min = c_values[0]
         self.c_max = c_values[-1]
         self.x2d_min = x2d_values[0]
         self.x2d_max = x2d_values[-1]
 
-        lookup_table = []
-
-        for i in range(0, len(c_values)):
-
-            domain, cdf = domains[i,:], cdfs[i,:]
-            cdf_inverted = interp1d(cdf, domain)
-            lookup_table.append(cdf_inverted)
-
         for i in range(0, len(x2d_values)):
             if i==0:
                 x2d0 = x2d_values[i]
@@ -232,24 +308,61 @@ class Lookup3D(object):
 
         self._c_lookup = c_values
         self._x2d_lookup = x2d_values
-        self._lookup_table = lookup_table
-
-    def __call__(self, x2d_sample_function, c):
-
+        self._lookup_table = _stack_inverse_cdfs(cdfs, domains)
+        self._row_grid = self._nearest_row_grid()
+
+    def _nearest_row_grid(self):
+
+        """
+        Tabulates the row of the lookup table closest to each point on the regular (x2d, c) grid, so that the row for
+        a sample can be found by rounding its coordinates to the nearest grid point
+        :return: an array of row indexes with shape (n_x2d, n_c)
+        """
+        x2d_grid = np.arange(self.x2d_min, self.x2d_max + 0.5 * self._x2d_step, self._x2d_step)
+        c_grid = np.arange(np.min(self._c_lookup), np.max(self._c_lookup) + 0.5 * self._c_step, self._c_step)
+        row_grid = np.empty((len(x2d_grid), len(c_grid)), dtype=int)
+        for i, x2di in enumerate(x2d_grid):
+            dx2d = np.absolute(x2di - self._x2d_lookup) / self._x2d_step
+            for j, cj in enumerate(c_grid):
+                dc = np.absolute(cj - self._c_lookup) / self._c_step
+                row_grid[i, j] = np.argmin(dc ** 2 + dx2d ** 2)
+        return row_grid
+
+    def _row_indexes(self, x2d, c):
+
+        i = np.rint((x2d - self.x2d_min) / self._x2d_step).astype(int)
+        j = np.rint((c - np.min(self._c_lookup)) / self._c_step).astype(int)
+        i = np.clip(i, 0, self._row_grid.shape[0] - 1)
+        j = np.clip(j, 0, self._row_grid.shape[1] - 1)
+        return self._row_grid[i, j]
+
+    def sample(self, x2d_sampler, c, N, rng=None):
+
+        """
+        Samples N positions (in units of the scale radius) from the NFW profile with concentration c
+        :param x2d_sampler: an instance of LookupProjected used to sample projected radii
+        :param c: the concentration
+        :param N: the number of samples
+        :param rng: a numpy Generator; defaults to pyHalo.random_numbers.random_state
+        :return: arrays of N projected radii and N coordinates along the line of sight
+        """
         assert c > self.c_min and c < self.c_max
 
-        while True:
-            x2d_sample = x2d_sample_function(c)
-            if x2d_sample >= self.x2d_min and x2d_sample <= self.x2d_max:
-                break
+        rng = random_state(rng)
+        x2d = x2d_sampler.sample(c, N, rng)
+        redraw = np.where((x2d < self.x2d_min) | (x2d > self.x2d_max))[0]
+        while len(redraw) > 0:
+            x2d[redraw] = x2d_sampler.sample(c, len(redraw), rng)
+            redraw = redraw[np.where((x2d[redraw] < self.x2d_min) | (x2d[redraw] > self.x2d_max))[0]]
+
+        rows = self._row_indexes(x2d, c)
+        u = rng.random(int(N))
+        return x2d, _evaluate_inverse_cdfs(u, rows, *self._lookup_table)
 
-        dc = np.absolute(c - self._c_lookup) / self._c_step
-        dx2d = np.absolute(x2d_sample - self._x2d_lookup) / self._x2d_step
-        dr = (dc ** 2 + dx2d ** 2) ** 0.5
-        idx = np.argmin(dr)
+    def __call__(self, x2d_sample_function, c):
 
-        u = np.random.rand()
-        return x2d_sample, self._lookup_table[idx](u)
+        x2d, xz = self.sample(x2d_sample_function, c, 1)
+        return x2d[0], xz[0]
 
 class FastNFW(object):
 
@@ -258,21 +371,16 @@ class FastNFW(object):
         self.lookup2 = LookupProjected(file_path)
         self.lookup = Lookup3D(file_path)
 
-    def sample(self, c, N):
+    def sample(self, c, N, rng=None):
 
-        x, y, z = [], [], []
-        theta = np.random.uniform(0, 2 * np.pi, N)
+        rng = random_state(rng)
+        theta = rng.uniform(0, 2 * np.pi, N)
         sign = np.ones(N)
-        u_sign = np.random.rand(N)
+        u_sign = rng.random(N)
         sign[np.where(u_sign > 0.5)] *= -1
-        for signi, ti in zip(sign, theta):
-            x2d, xz = self.lookup(self.lookup2, c)
-            xz *= signi
-            x.append(x2d * np.cos(ti))
-            y.append(x2d * np.sin(ti))
-            z.append(xz)
-
-        return np.array(x), np.array(y), np.array(z)
+        x2d, xz = self.lookup.sample(self.lookup2, c, N, rng)
+
+        return x2d * np.cos(theta), x2d * np.sin(theta), xz * sign
 
 # c_min, c_max, c_step = 1, 16, 1.
 # x2d_min, x2d_max, x2d_step = 0.001, 3., 0.1
@@ -1,4 +1,5 @@
 import numpy as np
+from pyHalo.random_numbers import random_state
 
 
 class Correlated2D(object):
@@ -15,7 +16,7 @@ class Correlated2D(object):
         self._geo = geometry
         self._smooth_scale = smooth_scale
 
-    def draw(self, n, r_max, density, z_plane, shift_x=0., shift_y=0.):
+    def draw(self, n, r_max, density, z_plane, shift_x=0., shift_y=0., rng=None):
 
         """
 
@@ -28,8 +29,10 @@ class Correlated2D(object):
         from (0, 0) to (shift_x, shift_y)
         :param shift_y: moves the center of rendered points
         from (0, 0) to (shift_x, shift_y)
+        :param rng: a numpy Generator; defaults to pyHalo.random_numbers.random_state
         :return: x and y samples
         """
+        rng = random_state(rng)
         norm = np.sum(density)
         if norm == 0:
             raise Exception('2D probability distribution not normalizable')
@@ -45,7 +48,7 @@ class Correlated2D(object):
         x_coordinates_arcsec = np.linspace(-r_max, r_max, s)
         y_coordinates_arcsec = np.linspace(-r_max, r_max, s)
 
-        inds = np.random.choice(values, p=p, size=n, replace=True)
+        inds = rng.choice(values, p=p, size=n, replace=True)
         locations = pairs.reshape(-1, 2)[inds]
         x_sample_pixel, y_sample_pixel = locations[:, 0], locations[:, 1]
 
@@ -53,8 +56,8 @@ class Correlated2D(object):
         y_sample_arcsec = y_coordinates_arcsec[y_sample_pixel]
 
         smoothing = self._smooth_scale * r_max / s
-        x_sample_arcsec += np.random.normal(0., smoothing, len(x_sample_arcsec))
-        y_sample_arcsec += np.random.normal(0., smoothing, len(y_sample_arcsec))
+        x_sample_arcsec += rng.normal(0., smoothing, len(x_sample_arcsec))
+        y_sample_arcsec += rng.normal(0., smoothing, len(y_sample_arcsec))
 
         kpc_per_asec = self._geo.kpc_per_arcsec(z_plane)
 
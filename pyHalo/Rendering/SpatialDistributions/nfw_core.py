@@ -1,6 +1,6 @@
 import numpy as np
-from lenstronomy.LensModel.Profiles.cnfw import CNFW
-from pyHalo.Rendering.SpatialDistributions.compute_nfw_fast import FastNFW
+from pyHalo.Rendering.SpatialDistributions.compute_nfw_fast import fast_nfw_sampler
+from pyHalo.random_numbers import random_state
 import inspect
 
 local_path = inspect.getfile(inspect.currentframe())[0:-11] + 'nfw_tables/'
@@ -24,6 +24,7 @@ class ProjectedNFW(object):
         :param r200: the virial radius of the host dark matter halo [kpc]
         """
 
+        from lenstronomy.LensModel.Profiles.cnfw import CNFW
         self._cnfw_profile = CNFW()
 
         self.rmax2d_kpc = rendering_radius
@@ -39,9 +40,9 @@ class ProjectedNFW(object):
         self._norm = self._cnfw_profile._F(self._xmin, self.xtidal)
 
     @classmethod
-    def from_keywords_master(self, keywords_master, lens_cosmo, geometry):
+    def from_keywords_master(self, keywords_master, lens_cosmo, geometry, rng=None):
 
-        keywords = self.keywords(keywords_master, lens_cosmo, geometry)
+        keywords = self.keywords(keywords_master, lens_cosmo, geometry, rng)
 
         rendering_radius, Rs, r_core_host, r200 = keywords['rendering_radius'], \
                                                   keywords['Rs'], \
@@ -51,7 +52,7 @@ class ProjectedNFW(object):
         return ProjectedNFW(rendering_radius, Rs, r_core_host, r200)
 
     @staticmethod
-    def keywords(keywords_master, lenscosmo, geometry):
+    def keywords(keywords_master, lenscosmo, geometry, rng=None):
 
         args_spatial = {}
         kpc_per_arcsec_zlens = geometry.kpc_per_arcsec_zlens
@@ -72,7 +73,8 @@ class ProjectedNFW(object):
                                                                         scatter=True,
                                                                         scatter_amplitude=keywords_master['c_scatter_dex'],
                                                                         suppression_model=keywords_master['suppression_model'],
-                                                                        kwargs_suppresion=keywords_master['kwargs_suppression'])
+                                                                        kwargs_suppresion=keywords_master['kwargs_suppression'],
+                                                                        rng=rng)
 
             if 'host_Rs' not in keywords_master.keys():
                 host_Rs = lenscosmo.NFW_params_physical(keywords_master['host_m200'],
@@ -125,18 +127,19 @@ class ProjectedNFW(object):
 
         return p
 
-    def draw(self, N, rescale=1.0, center_x=0., center_y=0.):
+    def draw(self, N, rescale=1.0, center_x=0., center_y=0., rng=None):
 
         if N == 0:
             return [], [], [], []
+        rng = random_state(rng)
         n = 0
 
         while True:
 
-            _x_kpc, _y_kpc, _r2d, _r3d = self._draw_uniform(N, rescale, center_x, center_y)
+            _x_kpc, _y_kpc, _r2d, _r3d = self._draw_uniform(N, rescale, center_x, center_y, rng)
 
             prob = self._projected_pdf(_r2d)
-            u = np.random.uniform(size=len(prob))
+            u = rng.uniform(size=len(prob))
             keep = np.where(u < prob)[0]
 
             if n == 0:
@@ -155,16 +158,17 @@ class ProjectedNFW(object):
 
         return x_kpc[0:N], y_kpc[0:N], r3d[0:N]
 
-    def _draw_uniform(self, N, rescale=1.0, center_x=0., center_y=0.):
+    def _draw_uniform(self, N, rescale=1.0, center_x=0., center_y=0., rng=None):
 
         if N == 0:
             return [], [], [], []
 
-        angle = np.random.uniform(0, 2 * np.pi, int(N))
+        rng = random_state(rng)
+        angle = rng.uniform(0, 2 * np.pi, int(N))
 
         rmax = self.xmax_2d * rescale
 
-        r = np.random.uniform(0, rmax ** 2, int(N))
+        r = rng.uniform(0, rmax ** 2, int(N))
 
         x_arcsec = r ** .5 * np.cos(angle)
         y_arcsec = r ** .5 * np.sin(angle)
@@ -173,7 +177,7 @@ class ProjectedNFW(object):
         y_arcsec += center_y
 
         x_kpc, y_kpc = x_arcsec * self._rs_kpc, y_arcsec * self._rs_kpc
-        u = np.random.uniform(self._xmin, 0.999999, len(x_kpc))
+        u = rng.uniform(self._xmin, 0.999999, len(x_kpc))
         z_units_rs = self.cdf(u)
         z_kpc = z_units_rs * self._rs_kpc
 
@@ -197,23 +201,23 @@ class NFW3DFast(object):
 
         self._c = rmax3d/Rs
 
-        self.sampler = FastNFW(local_path)
+        self.sampler = fast_nfw_sampler(local_path)
 
-    def _draw(self, N, zlens):
+    def _draw(self, N, zlens, rng=None):
 
-        x, y, z = self.sampler.sample(self._c, N)
+        x, y, z = self.sampler.sample(self._c, N, rng)
         r2 = np.sqrt(x**2 + y**2)
         keep = np.where(r2 <= self._rmax2d/self._Rs)[0]
 
         return x[keep], y[keep], z[keep]
 
-    def draw(self, N, zlens):
+    def draw(self, N, zlens, rng=None):
 
-        x, y, z = self._draw(N, zlens)
+        x, y, z = self._draw(N, zlens, rng)
 
         while len(x) < N:
 
-            _x, _y, _z = self._draw(N, zlens)
+            _x, _y, _z = self._draw(N, zlens, rng)
             x = np.append(x, _x)
             y = np.append(y, _y)
             z = np.append(z, _z)
@@ -274,23 +278,23 @@ class NFW3DCoreRejectionSampling(object):
         p2 = self._eval_rho_core(x, 0.)
         return p1/p2
 
-    def _draw(self, N, zlens):
+    def _draw(self, N, zlens, rng=None):
 
-        x, y, r3 = self.nfw.draw(N, zlens)
+        x, y, r3 = self.nfw.draw(N, zlens, rng)
         x3 = r3/self._Rs
         #prob = np.array([self.p_x(x3i, self._xcore) for x3i in x3])
         prob = np.array(self.p_x(x3, self._xcore))
-        u = np.random.rand(N)
+        u = random_state(rng).random(N)
         keep = np.where(u < prob)[0]
 
         return x[keep], y[keep], r3[keep]
 
-    def draw(self, N, zlens):
+    def draw(self, N, zlens, rng=None):
 
-        x, y, r3 = self._draw(N, zlens)
+        x, y, r3 = self._draw(N, zlens, rng)
 
         while len(x) < N:
-            _x, _y, _r3 = self._draw(N, zlens)
+            _x, _y, _r3 = self._draw(N, zlens, rng)
             x = np.append(x, _x)
             y = np.append(y, _y)
             r3 = np.append(r3, _r3)
@@ -1,4 +1,5 @@
 import numpy as np
+from pyHalo.random_numbers import random_state
 
 
 class LensConeUniform(object):
@@ -31,7 +32,7 @@ class LensConeUniform(object):
 
         self._uni = Uniform(0.5 * cone_opening_angle, geometry)
 
-    def draw(self, N, z_plane, center_x=0, center_y=0):
+    def draw(self, N, z_plane, center_x=0, center_y=0, rng=None):
 
         """
         Generates samples in two dimensions out to a maximum radius r = 0.5 * cone_opening_angle * f(z)
@@ -40,6 +41,7 @@ class LensConeUniform(object):
         :param z_plane: the redshift where the objects are being placed (used to compute the conversion to physical kpc)
         :param center_x: the x-center of the rendering area [arcsec]
         :param center_y: the y-center of the rendering area [arcsec]
+        :param rng: a numpy Generator; defaults to pyHalo.random_numbers.random_state
         :return: the x and y coordinates sampled in 2D [kpc]
         """
         if N == 0:
@@ -48,10 +50,31 @@ class LensConeUniform(object):
         rescale = self._cosmo_geometry.rendering_scale(z_plane)
 
         x_kpc, y_kpc = self._uni.draw(N, z_plane, rescale=rescale,
-                                        center_x=center_x, center_y=center_y)
+                                        center_x=center_x, center_y=center_y, rng=rng)
 
         return x_kpc, y_kpc
 
+    def draw_planes(self, plane_index, z_planes, center_x=0, center_y=0, rng=None, rescale=None):
+
+        """
+        Generates samples for objects on many lens planes at once, out to a maximum radius
+        r = 0.5 * cone_opening_angle * f(z) on each plane, where f(z) = geometry.rendering_scale(z)
+        :param plane_index: the index of the lens plane of each object
+        :param z_planes: the redshift of each lens plane
+        :param center_x: the x-center of the rendering area [arcsec]
+        :param center_y: the y-center of the rendering area [arcsec]
+        :param rng: a numpy Generator; defaults to pyHalo.random_numbers.random_state
+        :param rescale: the value of f(z) on each lens plane; if None, it is computed from the geometry
+        :return: the x and y coordinates sampled in 2D [arcsec]
+        """
+        if len(plane_index) == 0:
+            return np.array([]), np.array([])
+
+        if rescale is None:
+            rescale = self._cosmo_geometry.rendering_scale(np.array(z_planes, dtype=float))
+
+        return self._uni.draw_angular(len(plane_index), rescale[plane_index], center_x, center_y, rng)
+
 class Uniform(object):
 
     """
@@ -68,7 +91,7 @@ class Uniform(object):
         self.rmax2d_arcsec = rmax2d_arcsec
         self._geo = geometry
 
-    def draw(self, N, z_plane, rescale=1.0, center_x=0, center_y=0):
+    def draw(self, N, z_plane, rescale=1.0, center_x=0, center_y=0, rng=None):
 
         """
         Generate samples distributed uniformly in two dimensions
@@ -77,23 +100,40 @@ class Uniform(object):
         :param rescale: rescales the maximum rendering radius
         :param center_x: the x-center of the rendering area [arcsec]
         :param center_y: the y-center of the rendering area [arcsec]
+        :param rng: a numpy Generator; defaults to pyHalo.random_numbers.random_state
         :return: the x and y coordinates sampled in 2D [kpc]
         """
         if N == 0:
             return [], []
 
-        angle = np.random.uniform(0, 2 * np.pi, int(N))
+        x_arcsec, y_arcsec = self.draw_angular(N, rescale, center_x, center_y, rng)
+        kpc_per_asec = self._geo.kpc_per_arcsec(z_plane)
+        x_kpc, y_kpc = x_arcsec * kpc_per_asec, y_arcsec * kpc_per_asec
+
+        return np.array(x_kpc), np.array(y_kpc)
+
+    def draw_angular(self, N, rescale=1.0, center_x=0, center_y=0, rng=None):
+
+        """
+        Generate samples distributed uniformly in two dimensions
+        :param N: number of objects to generate
+        :param rescale: rescales the maximum rendering radius; a number, or an array with one entry per object
+        :param center_x: the x-center of the rendering area [arcsec]
+        :param center_y: the y-center of the rendering area [arcsec]
+        :param rng: a numpy Generator; defaults to pyHalo.random_numbers.random_state
+        :return: the x and y coordinates sampled in 2D [arcsec]
+        """
+        rng = random_state(rng)
+        angle = rng.uniform(0, 2 * np.pi, int(N))
 
         rmax = self.rmax2d_arcsec * rescale
 
-        r = np.random.uniform(0, rmax ** 2, int(N))
+        r = rng.uniform(0, rmax ** 2, int(N))
 
         x_arcsec = r ** .5 * np.cos(angle)
         y_arcsec = r ** .5 * np.sin(angle)
 
         x_arcsec += center_x
         y_arcsec += center_y
-        kpc_per_asec = self._geo.kpc_per_arcsec(z_plane)
-        x_kpc, y_kpc = x_arcsec * kpc_per_asec, y_arcsec * kpc_per_asec
 
-        return np.array(x_kpc), np.array(y_kpc)
+        return x_arcsec, y_arcsec
@@ -1,10 +1,10 @@
 import numpy as np
-from lenstronomy.LensModel.lens_model import LensModel
 from pyHalo.Rendering.rendering_class_base import RenderingClassBase
 from pyHalo.Rendering.SpatialDistributions.correlated import Correlated2D
 from pyHalo.Rendering.MassFunctions.delta import DeltaFunction
 from pyHalo.Cosmology.geometry import Geometry
 from pyHalo.single_realization import realization_at_z
+from pyHalo.random_numbers import random_generator
 
 class CorrelatedStructure(RenderingClassBase):
 
@@ -13,15 +13,17 @@ class CorrelatedStructure(RenderingClassBase):
     at each lens plane
     """
 
-    def __init__(self, kwargs_rendering, realization, r_max_arcsec):
+    def __init__(self, kwargs_rendering, realization, r_max_arcsec, rng=None):
 
         """
 
         :param kwargs_rendering: keyword arguments that specify the mass function model
         :param realization: an instance of Realization used to compute the convergence at each lens plane
         :param r_max_arcsec: the radius of area at which the halos are rendered
+        :param rng: a numpy Generator or a seed; defaults to pyHalo.random_numbers.random_state
         """
 
+        self._rng = random_generator(rng)
         self.kwargs_rendering = kwargs_rendering
         self._realization = realization
         self.cylinder_geometry = Geometry(self._realization.lens_cosmo.cosmo,
@@ -65,16 +67,19 @@ class CorrelatedStructure(RenderingClassBase):
             delta_z.append(plane_redshifts[i + 1] - plane_redshifts[i])
         delta_z.append(self._realization.lens_cosmo.z_source - plane_redshifts[-1])
 
+        # the rendering radius and comoving distance of each lens plane
+        z_planes = np.array(plane_redshifts, dtype=float)
+        rendering_radii = self._rmax * self.cylinder_geometry.rendering_scale(z_planes)
+        comoving_distances = self.cylinder_geometry._cosmo.D_C_transverse(z_planes)
+
         for x_image_interp, y_image_interp in zip(x_center_interp_list, y_center_interp_list):
 
-            for z, dz in zip(plane_redshifts, delta_z):
+            for z, dz, rendering_radius, d in zip(plane_redshifts, delta_z, rendering_radii, comoving_distances):
 
                 if dz > 0.2:
                     print('WARNING: redshift spacing is possibly too large due to the few number of halos '
                           'in the lens model!')
 
-                rendering_radius = self._rmax * self.cylinder_geometry.rendering_scale(z)
-                d = self.cylinder_geometry._cosmo.D_C_transverse(z)
                 x_angle = x_image_interp(d)
                 y_angle = y_image_interp(d)
                 _m, _x, _y, halo_inds, rescale_factor = self.render_at_z(z, x_angle, y_angle,
@@ -117,7 +122,7 @@ class CorrelatedStructure(RenderingClassBase):
         n_halos = len(m)
         if n_halos > 0:
             x_kpc, y_kpc = self.spatial_distribution_model.draw(n_halos, rendering_radius, pdf, z,
-                                                                angular_coordinate_x, angular_coordinate_y)
+                                                                angular_coordinate_x, angular_coordinate_y, self._rng)
 
 
             x_arcsec = x_kpc / kpc_per_asec
@@ -140,7 +145,7 @@ class CorrelatedStructure(RenderingClassBase):
             rho = self.kwargs_rendering['mass_fraction'] * mass_in_area
             volume = 1.
             mass = 10 ** self.kwargs_rendering['logM']
-            mass_function = DeltaFunction(mass, volume, rho)
+            mass_function = DeltaFunction(mass, volume, rho, rng=self._rng)
 
         else:
             raise Exception('no other mass function for correlated structure currently implemented')
@@ -163,6 +168,7 @@ class CorrelatedStructure(RenderingClassBase):
         if len(lens_model_list) == 0:
             return np.array([]), np.array([]), []
 
+        from lenstronomy.LensModel.lens_model import LensModel
         lens_model = LensModel(lens_model_list, numerical_alpha_class=numerical_interp)
         npix = int(2 * rendering_radius / arcsec_per_pixel)
         _r = np.linspace(-rendering_radius, rendering_radius, npix)
@@ -11,8 +11,12 @@ class HaloPopulation(object):
     adds to the lens model.
     """
 
+    # population models whose rendering classes compute a plan (see Rendering.rendering_plan); creating them does not
+    # draw random numbers
+    planned_models = ['LINE_OF_SIGHT', 'LINE_OF_SIGHT_NOSHEET', 'TWO_HALO']
+
     def __init__(self, model_list, keywords_master, lens_cosmo, geometry, halo_mass_function=None,
-                 lens_plane_redshift_list=None, redshift_spacings=None):
+                 lens_plane_redshift_list=None, redshift_spacings=None, rng=None, model_plans=None):
 
         """
 
@@ -24,26 +28,61 @@ class HaloPopulation(object):
         :param lens_plane_redshift_list: a list of redshifts at which to render halos
         :param redshift_spacings: a list of redshift increments between each lens plane (should be the same length as
         lens_plane_redshifts)
+        :param rng: a numpy Generator; defaults to pyHalo.random_numbers.random_state
+        :param model_plans: a list with the plan of each population model (see Rendering.rendering_plan); if None, the
+        models compute these quantities when they render halos
         """
         self.rendering_classes = []
 
-        for population_model in model_list:
-            if population_model == 'LINE_OF_SIGHT':
-                model = LineOfSight(keywords_master, halo_mass_function, geometry, lens_cosmo,
-                                    lens_plane_redshift_list, redshift_spacings)
-            elif population_model == 'LINE_OF_SIGHT_NOSHEET':
-                model = LineOfSightNoSheet(keywords_master, halo_mass_function, geometry, lens_cosmo,
-                                    lens_plane_redshift_list, redshift_spacings)
-            elif population_model == 'SUBHALOS':
-                model = Subhalos(keywords_master, geometry, lens_cosmo)
-            elif population_model == 'TWO_HALO':
-                model = TwoHaloContribution(keywords_master, halo_mass_function, geometry, lens_cosmo,
-                                            lens_plane_redshift_list, redshift_spacings)
-            else:
-                raise Exception('model '+str(population_model)+' not recognized. ')
+        if model_plans is None:
+            model_plans = [None] * len(model_list)
 
+        for population_model, model_plan in zip(model_list, model_plans):
+            model = self._create_model(population_model, keywords_master, lens_cosmo, geometry, halo_mass_function,
+                                       lens_plane_redshift_list, redshift_spacings, rng, model_plan)
             self.rendering_classes.append(model)
 
+    @staticmethod
+    def _create_model(population_model, keywords_master, lens_cosmo, geometry, halo_mass_function,
+                      lens_plane_redshift_list, redshift_spacings, rng, model_plan=None):
+
+        if population_model == 'LINE_OF_SIGHT':
+            model = LineOfSight(keywords_master, halo_mass_function, geometry, lens_cosmo,
+                                lens_plane_redshift_list, redshift_spacings, rng, model_plan)
+        elif population_model == 'LINE_OF_SIGHT_NOSHEET':
+            model = LineOfSightNoSheet(keywords_master, halo_mass_function, geometry, lens_cosmo,
+                                lens_plane_redshift_list, redshift_spacings, rng, model_plan)
+        elif population_model == 'SUBHALOS':
+            model = Subhalos(keywords_master, geometry, lens_cosmo, rng)
+        elif population_model == 'TWO_HALO':
+            model = TwoHaloContribution(keywords_master, halo_mass_function, geometry, lens_cosmo,
+                                        lens_plane_redshift_list, redshift_spacings, rng, model_plan)
+        else:
+            raise Exception('model '+str(population_model)+' not recognized. ')
+        return model
+
+    @classmethod
+    def model_plans(cls, model_list, keywords_master, lens_cosmo, geometry, halo_mass_function=None,
+                    lens_plane_redshift_list=None, redshift_spacings=None, convergence_sheet_correction=True):
+
+        """
+        Computes the quantities that are the same for every realization for each population model (see
+        Rendering.rendering_plan); the plan of models not in planned_models is an empty dictionary
+
+        See the documentation of __init__ for a description of the arguments
+        :param convergence_sheet_correction: bool; whether to include the convergence of the negative mass sheets
+        :return: a list with one dictionary of arrays per population model
+        """
+        model_plans = []
+        for population_model in model_list:
+            if population_model in cls.planned_models:
+                model = cls._create_model(population_model, keywords_master, lens_cosmo, geometry, halo_mass_function,
+                                          lens_plane_redshift_list, redshift_spacings, None)
+                model_plans.append(model.plan(convergence_sheet_correction))
+            else:
+                model_plans.append({})
+        return model_plans
+
     def render(self):
 
         """
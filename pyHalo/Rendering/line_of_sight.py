@@ -1,10 +1,11 @@
 import numpy as np
 from copy import deepcopy
-from pyHalo.Rendering.MassFunctions.power_law import GeneralPowerLaw
+from pyHalo.Rendering.MassFunctions.power_law import GeneralPowerLaw, GeneralPowerLawPlanes
 from pyHalo.Rendering.MassFunctions.delta import DeltaFunction
 from pyHalo.Rendering.SpatialDistributions.uniform import LensConeUniform
 from pyHalo.Rendering.MassFunctions.mass_function_utilities import integrate_power_law_quad, integrate_power_law_analytic
 from pyHalo.Rendering.rendering_class_base import RenderingClassBase
+from pyHalo.random_numbers import random_generator
 
 class LineOfSightNoSheet(RenderingClassBase):
     """
@@ -13,7 +14,7 @@ class LineOfSightNoSheet(RenderingClassBase):
     """
 
     def __init__(self, keywords_master, halo_mass_function, geometry, lens_cosmo,
-                 lens_plane_redshifts, delta_z_list):
+                 lens_plane_redshifts, delta_z_list, rng=None, plan=None):
 
         """
 
@@ -24,6 +25,9 @@ class LineOfSightNoSheet(RenderingClassBase):
         :param lens_plane_redshifts: a list of redshifts at which to render halos
         :param delta_z_list: a list of redshift increments between each lens plane (should be the same length as
         lens_plane_redshifts)
+        :param rng: a numpy Generator or a seed; defaults to pyHalo.random_numbers.random_state
+        :param plan: a dictionary of the arrays returned by the plan method, computed once for many realizations (see
+        Rendering.rendering_plan); if None, they are computed when rendering halos
         """
 
         self._rendering_kwargs = self.keyword_parse_render(keywords_master)
@@ -37,36 +41,96 @@ class LineOfSightNoSheet(RenderingClassBase):
         self.geometry = geometry
         self._lens_plane_redshifts = lens_plane_redshifts
         self._delta_z_list = delta_z_list
+        self._rng = random_generator(rng)
+        self._plan = plan
         super(LineOfSightNoSheet, self).__init__()
 
+    def plan(self, convergence_sheet_correction=True):
+
+        """
+        Computes the quantities on each lens plane that are the same for every realization
+        :param convergence_sheet_correction: not used by this class
+        :return: a dictionary with the volume element and rendering scale of each lens plane, and for the POWER_LAW
+        mass function type the normalization, logarithmic slope, and mass range of the mass function on each plane
+        """
+        z = np.array(self._lens_plane_redshifts, dtype=float)
+        plan = {'volume_element': np.array(self.geometry.volume_element_comoving(z, self._delta_z_list)),
+                'rendering_scale': np.array(self.geometry.rendering_scale(z))}
+
+        if self._rendering_kwargs['mass_function_LOS_type'] == 'POWER_LAW':
+            norm, plaw_index = self._normalization_slope_planes()
+            log_mlow, log_mhigh = self._mass_range_planes()
+            plan.update({'norm': norm, 'plaw_index': plaw_index, 'log_mlow': log_mlow, 'log_mhigh': log_mhigh})
+
+        return plan
+
+    def _rendering_plan(self):
+
+        """
+        :return: the plan passed to the class, or a plan computed for this realization
+        """
+        if self._plan is None:
+            return self.plan(convergence_sheet_correction=False)
+        return self._plan
+
     def render(self):
 
         """
         Generates halo masses and positions for objects along the line of sight
         (except for halos from the two-halo contribution)
+
+        The halos on all lens planes are rendered at once: the mass function parameters and number of halos are
+        computed as arrays with one entry per plane, and masses and positions are sampled for all halos with the index
+        of the lens plane of each halo
         :return: mass (in Msun), x (arcsec), y (arcsec), r3d (kpc), redshift
         """
 
-        masses = np.array([])
-        x = np.array([])
-        y = np.array([])
-        redshifts = np.array([])
-
-        for z, dz in zip(self._lens_plane_redshifts, self._delta_z_list):
-            m = self.render_masses_at_z(z, dz)
-            nhalos = len(m)
-            _x, _y = self.render_positions_at_z(z, nhalos)
-            _z = np.array([z] * len(_x))
-            masses = np.append(masses, m)
-            x = np.append(x, _x)
-            y = np.append(y, _y)
-            redshifts = np.append(redshifts, _z)
+        plan = self._rendering_plan()
+        masses, plane_index = self.render_masses_planes(plan)
+        x, y = self.spatial_distribution_model.draw_planes(plane_index, self._lens_plane_redshifts,
+                                                           rescale=plan['rendering_scale'], rng=self._rng)
+        redshifts = np.array(self._lens_plane_redshifts, dtype=float)[plane_index]
 
         subhalo_flag = [False] * len(masses)
         r3d = np.array([None] * len(masses))
 
         return masses, x, y, r3d, redshifts, subhalo_flag
 
+    def render_masses_planes(self, plan=None):
+
+        """
+        Generates the halo masses on every lens plane
+        :param plan: the quantities on each lens plane returned by the plan method; if None, uses the plan passed to
+        the class or computes it
+        :return: halo masses in units Msun, and the index of the lens plane of each halo
+        """
+        if plan is None:
+            plan = self._rendering_plan()
+
+        if self._rendering_kwargs['mass_function_LOS_type'] == 'POWER_LAW':
+
+            mfunc = GeneralPowerLawPlanes(plan['log_mlow'], plan['log_mhigh'], plan['plaw_index'],
+                                          self._rendering_kwargs['draw_poisson'], plan['norm'],
+                                          self._rendering_kwargs['log_mc'], self._rendering_kwargs['a_wdm'],
+                                          self._rendering_kwargs['b_wdm'], self._rendering_kwargs['c_wdm'],
+                                          rng=self._rng)
+            return mfunc.draw()
+
+        elif self._rendering_kwargs['mass_function_LOS_type'] == 'DELTA':
+
+            rho = self._rendering_kwargs['mass_fraction'] * self.lens_cosmo.cosmo.rho_dark_matter_crit
+            masses, plane_index = [], []
+            for i, volume in enumerate(plan['volume_element']):
+                mfunc = DeltaFunction(10 ** self._rendering_kwargs['logM'], volume, rho, rng=self._rng)
+                m = mfunc.draw()
+                masses.append(m)
+                plane_index.append(np.full(len(m), i, dtype=int))
+            return np.concatenate(masses), np.concatenate(plane_index)
+
+        else:
+            raise Exception(
+                'mass function type ' + str(self._rendering_kwargs['mass_function_LOS_type']) + ' not recognized')
+
     def render_positions_at_z(self, z, nhalos):
 
         """
@@ -77,7 +141,7 @@ class LineOfSightNoSheet(RenderingClassBase):
         For line of sight halos it is set to None.
         """
 
-        x_kpc, y_kpc = self.spatial_distribution_model.draw(nhalos, z)
+        x_kpc, y_kpc = self.spatial_distribution_model.draw(nhalos, z, rng=self._rng)
 
         if len(x_kpc) > 0:
             kpc_per_asec = self.geometry.kpc_per_arcsec(z)
@@ -109,13 +173,13 @@ class LineOfSightNoSheet(RenderingClassBase):
 
             mfunc = GeneralPowerLaw(log_mlow, log_mhigh, plaw_index, args['draw_poisson'],
                                     norm, args['log_mc'], args['a_wdm'], args['b_wdm'],
-                                    args['c_wdm'])
+                                    args['c_wdm'], rng=self._rng)
 
         elif self._rendering_kwargs['mass_function_LOS_type'] == 'DELTA':
 
             volume = self.geometry.volume_element_comoving(z, delta_z)
             rho = self._rendering_kwargs['mass_fraction'] * self.lens_cosmo.cosmo.rho_dark_matter_crit
-            mfunc = DeltaFunction(10 ** self._rendering_kwargs['logM'], volume, rho)
+            mfunc = DeltaFunction(10 ** self._rendering_kwargs['logM'], volume, rho, rng=self._rng)
 
         else:
             raise Exception(
@@ -172,15 +236,44 @@ class LineOfSightNoSheet(RenderingClassBase):
 
         return args_mfunc
 
-    def _normalization_slope(self, z, delta_z):
+    def _normalization_slope(self, z, delta_z, volume_element_comoving=None):
 
         los_norm = self._redshift_dependent_normalization(z, self._rendering_kwargs['LOS_normalization'])
-        volume_element_comoving = self.geometry.volume_element_comoving(z, delta_z)
+        if volume_element_comoving is None:
+            volume_element_comoving = self.geometry.volume_element_comoving(z, delta_z)
+        plaw_index = self.halo_mass_function.plaw_index_z(z) + self._rendering_kwargs['delta_power_law_index']
+        norm_dv = self.halo_mass_function.norm_at_z_density(z, plaw_index, self._rendering_kwargs['m_pivot'])
+        norm = los_norm * norm_dv * volume_element_comoving
+        return norm, plaw_index
+
+    def _normalization_slope_planes(self):
+
+        """
+        Evaluates the normalization and logarithmic slope of the mass function on every lens plane
+        :return: arrays of the normalization and slope with one entry per lens plane
+        """
+        z = np.array(self._lens_plane_redshifts, dtype=float)
+        los_norm = np.array([self._redshift_dependent_normalization(zi, self._rendering_kwargs['LOS_normalization'])
+                             for zi in z], dtype=float)
+        volume_element_comoving = self.geometry.volume_element_comoving(z, self._delta_z_list)
         plaw_index = self.halo_mass_function.plaw_index_z(z) + self._rendering_kwargs['delta_power_law_index']
         norm_dv = self.halo_mass_function.norm_at_z_density(z, plaw_index, self._rendering_kwargs['m_pivot'])
         norm = los_norm * norm_dv * volume_element_comoving
         return norm, plaw_index
 
+    def _mass_range_planes(self):
+
+        """
+        Evaluates the minimum and maximum halo mass on every lens plane
+        :return: arrays of log10 of the minimum and maximum halo mass with one entry per lens plane
+        """
+        mass_range = [self._redshift_dependent_mass_range(z, self._rendering_kwargs['log_mlow'],
+                                                          self._rendering_kwargs['log_mhigh'])
+                      for z in self._lens_plane_redshifts]
+        log_mlow = np.array([mass_range_i[0] for mass_range_i in mass_range], dtype=float)
+        log_mhigh = np.array([mass_range_i[1] for mass_range_i in mass_range], dtype=float)
+        return log_mlow, log_mhigh
+
     @staticmethod
     def keys_convergence_sheets(keywords_master):
         return {}
@@ -198,7 +291,7 @@ class LineOfSight(LineOfSightNoSheet):
     """
 
     def __init__(self, keywords_master, halo_mass_function, geometry, lens_cosmo,
-                 lens_plane_redshifts, delta_z_list):
+                 lens_plane_redshifts, delta_z_list, rng=None, plan=None):
 
         """
 
@@ -209,10 +302,31 @@ class LineOfSight(LineOfSightNoSheet):
         :param lens_plane_redshifts: a list of redshifts at which to render halos
         :param delta_z_list: a list of redshift increments between each lens plane (should be the same length as
         lens_plane_redshifts)
+        :param rng: a numpy Generator or a seed; defaults to pyHalo.random_numbers.random_state
+        :param plan: a dictionary of the arrays returned by the plan method, computed once for many realizations (see
+        Rendering.rendering_plan); if None, they are computed when rendering halos
         """
         self._convergence_sheet_kwargs = self.keys_convergence_sheets(keywords_master)
         super(LineOfSight, self).__init__(keywords_master, halo_mass_function, geometry, lens_cosmo,
-                 lens_plane_redshifts, delta_z_list)
+                 lens_plane_redshifts, delta_z_list, rng, plan)
+
+    def plan(self, convergence_sheet_correction=True):
+
+        """
+        Computes the quantities on each lens plane that are the same for every realization
+        :param convergence_sheet_correction: bool; whether to include the negative convergence sheets
+        :return: a dictionary with the quantities computed by LineOfSightNoSheet.plan, and if
+        convergence_sheet_correction is True and the mass function type is POWER_LAW, the convergence (sheet_kappa)
+        and redshift (sheet_redshifts) of the negative convergence sheets
+        """
+        plan = super(LineOfSight, self).plan(convergence_sheet_correction)
+
+        if convergence_sheet_correction and self._rendering_kwargs['mass_function_LOS_type'] == 'POWER_LAW':
+            kwargs_sheets, _, redshifts = self.convergence_sheet_correction()
+            plan['sheet_kappa'] = np.array([-kwargs['kappa'] for kwargs in kwargs_sheets], dtype=float)
+            plan['sheet_redshifts'] = np.array(redshifts, dtype=float)
+
+        return plan
 
     @staticmethod
     def keys_convergence_sheets(keywords_master):
@@ -248,10 +362,18 @@ class LineOfSight(LineOfSightNoSheet):
         :return:
         """
 
+        if kwargs_mass_sheets is None and self._plan is not None and 'sheet_kappa' in self._plan:
+            kwargs_out = [{'kappa': -kappa} for kappa in self._plan['sheet_kappa']]
+            return kwargs_out, ['CONVERGENCE'] * len(kwargs_out), list(self._plan['sheet_redshifts'])
+
         kw_mass_sheets = self._convergence_sheet_kwargs
 
         if kwargs_mass_sheets is not None:
             kw_mass_sheets.update(kwargs_mass_sheets)
+            if self._plan is not None:
+                # the convergence sheets in the plan were computed with the previous keyword arguments
+                self._plan = {key: value for (key, value) in self._plan.items()
+                              if key not in ['sheet_kappa', 'sheet_redshifts']}
 
         log_mass_sheet_correction_min, log_mass_sheet_correction_max = \
             kw_mass_sheets['log_mass_sheet_min'], kw_mass_sheets['log_mass_sheet_max']
@@ -259,13 +381,17 @@ class LineOfSight(LineOfSightNoSheet):
         kappa_scale = kw_mass_sheets['kappa_scale']
 
         lens_plane_redshifts = self._lens_plane_redshifts[0::2]
-        delta_zs = 2 * self._delta_z_list[0::2]
+        delta_zs = 2 * np.array(self._delta_z_list[0::2], dtype=float)
+
+        # the volume elements of all lens planes are computed at once
+        volume_elements = self.geometry.volume_element_comoving(np.array(lens_plane_redshifts, dtype=float),
+                                                                delta_zs)
 
         kwargs_out = []
         profile_names_out = []
         redshifts = []
 
-        for z, delta_z in zip(lens_plane_redshifts, delta_zs):
+        for z, delta_z, volume_element in zip(lens_plane_redshifts, delta_zs, volume_elements):
 
             if z < kw_mass_sheets['zmin']:
                 continue
@@ -276,7 +402,7 @@ class LineOfSight(LineOfSightNoSheet):
                 z, log_mass_sheet_correction_min, log_mass_sheet_correction_max
             )
             kappa = self._convergence_at_z(z, delta_z, log_mass_sheet_correction_min, log_mass_sheet_correction_max,
-                                           kappa_scale)
+                                           kappa_scale, volume_element)
 
             if kappa > 0:
 
@@ -287,9 +413,9 @@ class LineOfSight(LineOfSightNoSheet):
         return kwargs_out, profile_names_out, redshifts
 
     def _convergence_at_z(self, z, delta_z, log_sheet_min,
-                             log_sheet_max, kappa_scale):
+                             log_sheet_max, kappa_scale, volume_element_comoving=None):
 
-        norm, plaw_index = self._normalization_slope(z, delta_z)
+        norm, plaw_index = self._normalization_slope(z, delta_z, volume_element_comoving)
 
         m_low = 10 ** log_sheet_min
         m_high = 10 ** log_sheet_max
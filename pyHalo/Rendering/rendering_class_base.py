@@ -61,6 +61,15 @@ class RenderingClassBase(ABC):
 
         return log_mlow, log_mhigh
 
+    def plan(self, convergence_sheet_correction=True):
+        """
+        Computes the quantities used to render halos that are the same for every realization (see
+        Rendering.rendering_plan); rendering classes that do not precompute anything return an empty dictionary
+        :param convergence_sheet_correction: bool; whether to include the negative convergence sheets
+        :return: a dictionary of arrays
+        """
+        return {}
+
     @abstractmethod
     def render(self, *args, **kwargs):
         ...
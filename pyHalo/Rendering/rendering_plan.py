@@ -0,0 +1,135 @@
+import hashlib
+import numpy as np
+
+class RenderingPlan(object):
+
+    """
+    This class stores the quantities used to render halos that are the same for every realization of a lens system
+    created with the same population models and keyword arguments: the lens plane redshifts and thicknesses, and for
+    each population model the arrays returned by the plan method of its rendering class (e.g. the normalization and
+    slope of the line-of-sight mass function and the convergence of the negative mass sheets on each lens plane).
+
+    A plan is created with pyHalo.rendering_plan and can be passed to pyHalo.render, so that each realization only
+    performs the random draws. Population models that draw random quantities when they are created (e.g. SUBHALOS, if
+    the host halo concentration is not specified) have an empty plan and are computed for each realization.
+
+    The plan stores a fingerprint of the keyword arguments and the cosmology it was created with (see
+    plan_fingerprint), and check raises an exception if it is used with different ones.
+    """
+
+    def __init__(self, zlens, zsource, population_model_list, plane_redshifts, delta_z, model_plans, fingerprint):
+
+        """
+
+        :param zlens: the lens redshift
+        :param zsource: the source redshift
+        :param population_model_list: a list of population models (e.g. ['SUBHALOS', 'LINE_OF_SIGHT'])
+        :param plane_redshifts: the redshifts of the lens planes
+        :param delta_z: the thickness of each lens plane
+        :param model_plans: a list with one dictionary of arrays per population model
+        :param fingerprint: the output of plan_fingerprint for the keyword arguments and cosmology of the plan
+        """
+        if len(model_plans) != len(population_model_list):
+            raise Exception('the rendering plan must have one entry per population model')
+        self.zlens = zlens
+        self.zsource = zsource
+        self.population_model_list = list(population_model_list)
+        self.plane_redshifts = np.array(plane_redshifts, dtype=float)
+        self.delta_z = np.array(delta_z, dtype=float)
+        self.model_plans = model_plans
+        self.fingerprint = str(fingerprint)
+
+    def check(self, zlens, zsource, population_model_list, plane_redshifts, fingerprint):
+
+        """
+        Raises an exception if the plan was created for a different lens system, list of population models, lens
+        planes, keyword arguments, or cosmology
+        :param zlens: the lens redshift
+        :param zsource: the source redshift
+        :param population_model_list: a list of population models
+        :param plane_redshifts: the redshifts of the lens planes
+        :param fingerprint: the output of plan_fingerprint for the keyword arguments and cosmology used to render
+        """
+        if zlens != self.zlens or zsource != self.zsource:
+            raise Exception('the rendering plan was created for a lens system at redshifts ' + str(self.zlens) + ', '
+                            + str(self.zsource) + ', not ' + str(zlens) + ', ' + str(zsource))
+        if list(population_model_list) != self.population_model_list:
+            raise Exception('the rendering plan was created for the population models ' +
+                            str(self.population_model_list) + ', not ' + str(population_model_list))
+        plane_redshifts = np.array(plane_redshifts, dtype=float)
+        if plane_redshifts.shape != self.plane_redshifts.shape or \
+                not np.allclose(plane_redshifts, self.plane_redshifts):
+            raise Exception('the rendering plan was created for different lens plane redshifts')
+        if str(fingerprint) != self.fingerprint:
+            raise Exception('the rendering plan was created with different keyword arguments or a different cosmology')
+
+    def save(self, fname):
+
+        """
+        Saves the plan as a numpy .npz file
+        :param fname: the file name
+        """
+        arrays = {'zlens': np.array(self.zlens), 'zsource': np.array(self.zsource),
+                  'population_model_list': np.array(self.population_model_list, dtype=str),
+                  'plane_redshifts': self.plane_redshifts, 'delta_z': self.delta_z,
+                  'fingerprint': np.array(self.fingerprint)}
+        for i, model_plan in enumerate(self.model_plans):
+            for key, value in model_plan.items():
+                arrays['model_' + str(i) + '/' + key] = np.asarray(value)
+        with open(fname, 'wb') as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, fname):
+
+        """
+        Loads a plan saved with the save method
+        :param fname: the file name
+        :return: an instance of RenderingPlan
+        """
+        with np.load(fname, allow_pickle=False) as f:
+            population_model_list = [str(model) for model in f['population_model_list']]
+            model_plans = [{} for _ in population_model_list]
+            for key in f.files:
+                if key.startswith('model_'):
+                    index, name = key[6:].split('/', 1)
+                    model_plans[int(index)][name] = f[key]
+            return RenderingPlan(float(f['zlens']), float(f['zsource']), population_model_list,
+                                 f['plane_redshifts'], f['delta_z'], model_plans, str(f['fingerprint']))
+
+def plan_fingerprint(keywords_master, cosmology, kwargs_halo_mass_function):
+
+    """
+    Computes a hash of the quantities that determine a rendering plan, other than the redshifts and population models.
+    Functions and other objects in the keyword arguments are identified by their module and name.
+    :param keywords_master: the keyword arguments for the population models, including default values
+    :param cosmology: an instance of Cosmology
+    :param kwargs_halo_mass_function: keyword arguments for the LensingMassFunction class
+    :return: a string
+    """
+    key = '_'.join([_canonical(keywords_master), repr(cosmology.astropy),
+                    cosmology.colossus._getHashableString(), _canonical(kwargs_halo_mass_function)])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def _canonical(value):
+
+    """
+    Converts a value to a string that is the same in every process for equal values
+    :param value: a number, string, array, list, dictionary, or other object
+    :return: a string
+    """
+    if isinstance(value, dict):
+        items = sorted(value.items(), key=lambda item: str(item[0]))
+        return '{' + ','.join([repr(str(key)) + ':' + _canonical(v) for (key, v) in items]) + '}'
+    elif isinstance(value, (list, tuple)):
+        return '[' + ','.join([_canonical(v) for v in value]) + ']'
+    elif isinstance(value, np.ndarray):
+        return 'array' + _canonical(value.tolist())
+    elif isinstance(value, np.generic):
+        return repr(value.item())
+    elif value is None or isinstance(value, (bool, int, float, complex, str)):
+        return repr(value)
+    elif callable(value):
+        return str(getattr(value, '__module__', '')) + '.' + str(getattr(value, '__qualname__', type(value).__name__))
+    else:
+        return type(value).__module__ + '.' + type(value).__qualname__
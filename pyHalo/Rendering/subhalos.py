@@ -3,6 +3,7 @@ from pyHalo.Rendering.MassFunctions.power_law import GeneralPowerLaw
 from pyHalo.Rendering.SpatialDistributions.nfw_core import ProjectedNFW
 from pyHalo.Rendering.MassFunctions.mass_function_utilities import integrate_power_law_analytic, integrate_power_law_quad
 from pyHalo.Rendering.rendering_class_base import RenderingClassBase
+from pyHalo.random_numbers import random_generator
 
 class Subhalos(RenderingClassBase):
 
@@ -10,14 +11,17 @@ class Subhalos(RenderingClassBase):
     This class generates subhalos, or objects that have been accreted onto the host halo of the main deflector.
     """
 
-    def __init__(self, keywords_master, geometry, lens_cosmo):
+    def __init__(self, keywords_master, geometry, lens_cosmo, rng=None):
 
         """
         :param keywords_master: a dictionary of keyword arguments to be passed to each model class
         :param geometry: an instance of Geometry (see Cosmology.geometry)
         :param lens_cosmo: an instance of LensCosmo (see Halos.lens_cosmo)
+        :param rng: a numpy Generator or a seed; defaults to pyHalo.random_numbers.random_state
         """
 
+        self._rng = random_generator(rng)
+
         self._zlens = lens_cosmo.z_lens
         self._z_source = lens_cosmo.z_source
         self.geometry = geometry
@@ -30,7 +34,8 @@ class Subhalos(RenderingClassBase):
                             ' Currently only HOST_NFW is implemented.')
 
         elif keywords_master['subhalo_spatial_distribution'] == 'HOST_NFW':
-            self.spatial_distribution_model = ProjectedNFW.from_keywords_master(keywords_master, lens_cosmo, geometry)
+            self.spatial_distribution_model = ProjectedNFW.from_keywords_master(keywords_master, lens_cosmo, geometry,
+                                                                                 rng)
 
         else:
             raise Exception('subhalo_spatial_distribution ' + str(keywords_master['subhalo_spatial_distribution']) +
@@ -57,7 +62,7 @@ class Subhalos(RenderingClassBase):
         if nhalos == 0:
             return np.array([]), np.array([]), np.array([])
 
-        x_kpc, y_kpc, r3d_kpc = self.spatial_distribution_model.draw(nhalos)
+        x_kpc, y_kpc, r3d_kpc = self.spatial_distribution_model.draw(nhalos, rng=self._rng)
 
         x_arcsec = np.array(x_kpc) / self.geometry.kpc_per_arcsec_zlens
         y_arcsec = np.array(y_kpc) / self.geometry.kpc_per_arcsec_zlens
@@ -75,7 +80,8 @@ class Subhalos(RenderingClassBase):
                                                            self._rendering_kwargs['log_mc'],
                                                            self._rendering_kwargs['a_wdm'],
                                                            self._rendering_kwargs['b_wdm'],
-                                                           self._rendering_kwargs['c_wdm'])
+                                                           self._rendering_kwargs['c_wdm'],
+                                                           rng=self._rng)
         m = mfunc.draw()
 
         return m
@@ -3,6 +3,7 @@ import numpy as np
 from copy import deepcopy
 from pyHalo.Rendering.MassFunctions.power_law import GeneralPowerLaw
 from pyHalo.Rendering.rendering_class_base import RenderingClassBase
+from pyHalo.random_numbers import random_generator
 
 class TwoHaloContribution(RenderingClassBase):
 
@@ -13,8 +14,23 @@ class TwoHaloContribution(RenderingClassBase):
     b * corr, where the product is the average value computed over 2*dz, where dz is the spacing of the redshift planes
     adjacent the redshift plane of the main deflector.
     """
-    def __init__(self, keywords_master, halo_mass_function, geometry, lens_cosmo, lens_plane_redshifts, delta_z_list):
+    def __init__(self, keywords_master, halo_mass_function, geometry, lens_cosmo, lens_plane_redshifts, delta_z_list,
+                 rng=None, plan=None):
 
+        """
+
+        :param keywords_master: a dictionary of keyword arguments to be passed to each model class
+        :param halo_mass_function: an instance of LensingMassFunction (see Cosmology.lensing_mass_function)
+        :param geometry: an instance of Geometry (see Cosmology.geometry)
+        :param lens_cosmo: an instance of LensCosmo (see Halos.lens_cosmo)
+        :param lens_plane_redshifts: a list of redshifts at which to render halos
+        :param delta_z_list: a list of redshift increments between each lens plane
+        :param rng: a numpy Generator or a seed; defaults to pyHalo.random_numbers.random_state
+        :param plan: a dictionary of the arrays returned by the plan method, computed once for many realizations (see
+        Rendering.rendering_plan); if None, they are computed when rendering halos
+        """
+        self._rng = random_generator(rng)
+        self._plan = plan
         self._rendering_kwargs = self.keyword_parse_render(keywords_master)
         self.halo_mass_function = halo_mass_function
         self.geometry = geometry
@@ -24,6 +40,23 @@ class TwoHaloContribution(RenderingClassBase):
         self._delta_z_list = delta_z_list
         super(TwoHaloContribution, self).__init__()
 
+    def plan(self, convergence_sheet_correction=True):
+
+        """
+        Computes the quantities that are the same for every realization
+        :param convergence_sheet_correction: not used by this class
+        :return: a dictionary with the normalization, logarithmic slope, and mass range of the two-halo term mass
+        function at the main deflector redshift
+        """
+        z = self.lens_cosmo.z_lens
+        idx = np.argmin(abs(np.array(self._lens_plane_redshifts) - z))
+        delta_z = self._delta_z_list[idx]
+        norm, slope = self._norm_slope(z, delta_z)
+        log_mlow, log_mhigh = self._redshift_dependent_mass_range(z, self._rendering_kwargs['log_mlow'],
+                                                                  self._rendering_kwargs['log_mhigh'])
+        return {'norm': np.array(norm, dtype=float), 'slope': np.array(slope, dtype=float),
+                'log_mlow': np.array(log_mlow, dtype=float), 'log_mhigh': np.array(log_mhigh, dtype=float)}
+
     def render(self):
 
         """
@@ -31,11 +64,12 @@ class TwoHaloContribution(RenderingClassBase):
         :return: mass (in Msun), x (arcsec), y (arcsec), r3d (kpc), redshift
         """
 
-        idx = np.argmin(abs(np.array(self._lens_plane_redshifts) - self.lens_cosmo.z_lens))
-
-        delta_z = self._delta_z_list[idx]
+        plan = self._plan
+        if plan is None:
+            plan = self.plan(convergence_sheet_correction=False)
 
-        m = self.render_masses_at_z(self.lens_cosmo.z_lens, delta_z)
+        m = self._render_masses(float(plan['norm']), float(plan['slope']), float(plan['log_mlow']),
+                                float(plan['log_mhigh']))
         x, y = self.render_positions_at_z(self.lens_cosmo.z_lens, len(m))
         subhalo_flag = [False] * len(m)
         redshifts = [self.lens_cosmo.z_lens] * len(m)
@@ -52,11 +86,23 @@ class TwoHaloContribution(RenderingClassBase):
         """
 
         norm, slope = self._norm_slope(z, delta_z)
+        log_mlow, log_mhigh = self._redshift_dependent_mass_range(z, self._rendering_kwargs['log_mlow'],
+                                                                  self._rendering_kwargs['log_mhigh'])
+        return self._render_masses(norm, slope, log_mlow, log_mhigh)
+
+    def _render_masses(self, norm, slope, log_mlow, log_mhigh):
+
+        """
+        :param norm: the normalization of the mass function
+        :param slope: the logarithmic slope of the mass function
+        :param log_mlow: log10 of the minimum halo mass
+        :param log_mhigh: log10 of the maximum halo mass
+        :return: halo masses in units Msun
+        """
         args = deepcopy(self._rendering_kwargs)
-        log_mlow, log_mhigh = self._redshift_dependent_mass_range(z, args['log_mlow'], args['log_mhigh'])
         mfunc = GeneralPowerLaw(log_mlow, log_mhigh, slope, args['draw_poisson'],
                                 norm, args['log_mc'], args['a_wdm'], args['b_wdm'],
-                                args['c_wdm'])
+                                args['c_wdm'], rng=self._rng)
         m = mfunc.draw()
 
         return m
@@ -71,7 +117,7 @@ class TwoHaloContribution(RenderingClassBase):
         For line of sight halos it is set to None.
         """
 
-        x_kpc, y_kpc = self.spatial_distribution_model.draw(nhalos, z)
+        x_kpc, y_kpc = self.spatial_distribution_model.draw(nhalos, z, rng=self._rng)
         if len(x_kpc) > 0:
             kpc_per_asec = self.geometry.kpc_per_arcsec(z)
             x_arcsec = x_kpc * kpc_per_asec ** -1
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import numpy as np
+
+"""
+This module reads and writes the lookup tables that pyHalo stores as .npy files in the cache directory (see
+CacheDefaults in defaults.py), such as the tables of concentrations, of the normalization and slope of the halo mass
+function, and of the NFW cumulative distributions.
+"""
+
+def load_table(fname, valid=None):
+
+    """
+    Loads a table saved as a .npy file as a read-only memory mapped array
+    :param fname: the path of the file
+    :param valid: a function that returns True if the loaded table can be used (e.g. it has the expected shape)
+    :return: the table, or None if the file does not exist, cannot be read, or does not pass the check
+    """
+    if not os.path.exists(fname):
+        return None
+    try:
+        table = np.load(fname, mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    if valid is not None and not valid(table):
+        return None
+    return table
+
+def save_table(fname, table):
+
+    """
+    Saves a table as a .npy file, creating its directory if necessary. The table is written to a temporary file first,
+    with a unique name in the same directory, so that other processes and threads never load a partially written table.
+    :param fname: the path of the file
+    :param table: a numpy array
+    :return: True if the table was saved, False if the file could not be written
+    """
+    try:
+        os.makedirs(os.path.dirname(fname), exist_ok=True)
+        fd, fname_temp = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(fname))
+    except OSError:
+        return False
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, table)
+        # mkstemp creates files that only the owner can read
+        os.chmod(fname_temp, 0o644)
+        os.replace(fname_temp, fname)
+    except OSError:
+        if os.path.exists(fname_temp):
+            os.remove(fname_temp)
+        return False
+    return True
+
+def cached_table(fname, compute, valid=None):
+
+    """
+    Loads a table saved as a .npy file with memory mapping, computing and saving it first if it does not exist
+    :param fname: the path of the file
+    :param compute: a function with no arguments that returns the table, or None if it cannot be computed
+    :param valid: a function that returns True if a table loaded from the file can be used
+    :return: the table (memory mapped if it could be saved), or None if compute returns None
+    """
+    table = load_table(fname, valid)
+    if table is not None:
+        return table
+
+    table = compute()
+    if table is None:
+        return None
+    if save_table(fname, table):
+        saved_table = load_table(fname)
+        if saved_table is not None:
+            return saved_table
+    return table
@@ -30,6 +30,11 @@ class CosmoDefaults(object):
         self.ns = 0.965
         self.power_law = False
 
+        # maximum redshift and redshift spacing of the interpolation table of distances in Cosmology; the table is
+        # extended automatically to higher redshifts when needed
+        self.distance_table_zmax = 4.
+        self.distance_table_zstep = 0.02
+
         self._cosmo_param_dictionary = {'H0': self.H0, 'Ob0': self.Ob0, 'Om0': self.Om0,
                                         'Odm0': self.omega_DM, 'sigma8': self.sigma8, 'flat': self.curvature,
                                         'ns': self.ns, 'power_law': self.power_law}
@@ -77,6 +82,28 @@ class DMHaloDefaults(object):
         self.kwargs_suppression = {'c_scale': 60., 'c_power': -0.17,
                                    'c_power_inner': 1.0, 'mc_suppression_redshift_evolution': True}
 
+        # evaluate colossus mass-concentration relations with a precomputed lookup table
+        # (see Halos/concentration_table.py) instead of the exact colossus calculation; the table reproduces the exact
+        # concentrations to a relative tolerance of 1e-4, and is computed and saved in cache_default.directory the
+        # first time it is used
+        self.mc_lookup_table = False
+
+class CacheDefaults(object):
+
+    def __init__(self):
+
+        import os
+        # precomputed lookup tables are stored in this directory; it can be changed by setting the
+        # environment variable PYHALO_CACHE_DIR
+        self.directory = os.environ.get('PYHALO_CACHE_DIR',
+                                        os.path.join(os.path.expanduser('~'), '.cache', 'pyHalo'))
+        # the number of instances of Cosmology, LensCosmo, and LensingMassFunction kept in memory and reused for
+        # realizations with the same redshifts and cosmology (see instance_cache.py)
+        self.instance_cache_size = 16
+        # the number of tabulated cumulative distributions of the suppressed (e.g. warm dark matter) halo mass function
+        # kept in memory (see Rendering/MassFunctions/power_law.py)
+        self.mass_function_table_cache_size = 512
+
 class RealizationDefaults(object):
 
     def __init__(self):
@@ -121,6 +148,7 @@ lenscone_default = LensConeDefaults()
 truncation_default = TruncationDefaults()
 halo_default = DMHaloDefaults()
 realization_default = RealizationDefaults()
+cache_default = CacheDefaults()
 print_defaults = False
 
 def set_default_kwargs(profile_params, zsource):
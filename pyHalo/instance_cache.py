@@ -0,0 +1,191 @@
+from collections import OrderedDict, namedtuple
+from threading import RLock
+from pyHalo.defaults import cache_default
+
+"""
+This module keeps least-recently-used caches of the objects that are expensive to create and do not change once they
+are created (instances of Cosmology, LensCosmo, and LensingMassFunction), so that creating many realizations of the
+same lens system, e.g. with the preset models in an inference loop, does not repeat this setup. The size of each cache
+is cache_default.instance_cache_size, and cache_info returns the hits and misses of each cache.
+"""
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+class InstanceCache(object):
+
+    """
+    A thread-safe least-recently-used cache of instances indexed by a hashable key. Instances are created while holding
+    the lock of the cache, so threads that request the same key at the same time share one instance.
+    """
+
+    def __init__(self, maxsize=None):
+
+        """
+
+        :param maxsize: the maximum number of stored instances; defaults to cache_default.instance_cache_size
+        """
+        if maxsize is None:
+            maxsize = cache_default.instance_cache_size
+        self.maxsize = maxsize
+        self._instances = OrderedDict()
+        self._lock = RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, create):
+
+        """
+        Returns the instance stored under key, creating it with create() if it is not in the cache
+        :param key: a hashable key
+        :param create: a function with no arguments that returns a new instance
+        :return: the instance
+        """
+        with self._lock:
+            if key in self._instances:
+                self.hits += 1
+                self._instances.move_to_end(key)
+                return self._instances[key]
+            self.misses += 1
+
+            instance = create()
+
+            if self.maxsize > 0:
+                self._instances[key] = instance
+                self._instances.move_to_end(key)
+                while len(self._instances) > self.maxsize:
+                    self._instances.popitem(last=False)
+            return instance
+
+    def __getstate__(self):
+        # the lock cannot be pickled, e.g. when an object that holds a cache is sent to a worker process
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = RLock()
+
+    def cache_info(self):
+
+        """
+        :return: the number of hits and misses, the maximum size, and the current size of the cache
+        """
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._instances))
+
+    def clear(self):
+
+        """
+        Removes all instances from the cache and resets the statistics
+        """
+        with self._lock:
+            self._instances.clear()
+            self.hits = 0
+            self.misses = 0
+
+class _Identity(object):
+
+    """
+    Wraps an object that cannot be hashed by value so that it can be used in a cache key; two wrappers are equal only if
+    they wrap the same object. The wrapper holds a reference to the object, so its id cannot be reused while the key
+    exists.
+    """
+    __slots__ = ['obj']
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __hash__(self):
+        return id(self.obj)
+
+    def __eq__(self, other):
+        return isinstance(other, _Identity) and other.obj is self.obj
+
+def _hashable(value):
+
+    """
+    Converts keyword arguments to a hashable cache key; dictionaries and lists are converted to tuples, and objects that
+    cannot be hashed are compared by identity
+    :param value: the value to convert
+    :return: a hashable representation of value
+    """
+    if isinstance(value, dict):
+        return tuple(sorted([(key, _hashable(v)) for key, v in value.items()]))
+    elif isinstance(value, (list, tuple)):
+        return tuple([_hashable(v) for v in value])
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return _Identity(value)
+
+_cosmology_cache = InstanceCache()
+_lens_cosmo_cache = InstanceCache()
+_lensing_mass_function_cache = InstanceCache()
+
+def cosmology_instance(cosmology_kwargs={}):
+
+    """
+    Returns an instance of Cosmology created with the keyword arguments cosmology_kwargs, reusing a cached instance
+    created with the same arguments; with the default arguments, this returns the instance with the default cosmology
+    shared by all classes that need one when none is specified. Creating an instance of Cosmology sets the current colossus cosmology, so the
+    colossus cosmology of a cached instance is set again when it is reused.
+    :param cosmology_kwargs: keyword arguments for the Cosmology class
+    :return: an instance of Cosmology
+    """
+    from pyHalo.Cosmology.cosmology import Cosmology
+    from colossus.cosmology import cosmology as colossus_cosmology
+    cosmo = _cosmology_cache.get(_hashable(cosmology_kwargs), lambda: Cosmology(**cosmology_kwargs))
+    colossus_cosmology.setCurrent(cosmo.colossus)
+    return cosmo
+
+def lens_cosmo_instance(z_lens, z_source, cosmology):
+
+    """
+    Returns an instance of LensCosmo, reusing a cached instance for the same redshifts and instance of Cosmology
+    :param z_lens: the lens redshift
+    :param z_source: the source redshift
+    :param cosmology: an instance of Cosmology
+    :return: an instance of LensCosmo
+    """
+    from pyHalo.Halos.lens_cosmo import LensCosmo
+    key = (z_lens, z_source, _Identity(cosmology))
+    return _lens_cosmo_cache.get(key, lambda: LensCosmo(z_lens, z_source, cosmology))
+
+def lensing_mass_function_instance(cosmology, zlens, zsource, mlow, mhigh, cone_opening_angle, **kwargs):
+
+    """
+    Returns an instance of LensingMassFunction, reusing a cached instance created with the same arguments and instance
+    of Cosmology
+    :param cosmology: an instance of Cosmology
+    :param zlens: the lens redshift
+    :param zsource: the source redshift
+    :param mlow: low end of the mass function
+    :param mhigh: high end of the mass function
+    :param cone_opening_angle: opening angle of the lensing volume in arcseconds
+    :param kwargs: additional keyword arguments for the LensingMassFunction class
+    :return: an instance of LensingMassFunction
+    """
+    from pyHalo.Cosmology.lensing_mass_function import LensingMassFunction
+    key = (_Identity(cosmology), zlens, zsource, mlow, mhigh, cone_opening_angle, _hashable(kwargs))
+    create = lambda: LensingMassFunction(cosmology, zlens, zsource, mlow, mhigh,
+                                         cone_opening_angle=cone_opening_angle, **kwargs)
+    return _lensing_mass_function_cache.get(key, create)
+
+def cache_info():
+
+    """
+    :return: a dictionary with the statistics (an instance of CacheInfo) of the caches of Cosmology, LensCosmo, and
+    LensingMassFunction instances
+    """
+    return {'cosmology': _cosmology_cache.cache_info(),
+            'lens_cosmo': _lens_cosmo_cache.cache_info(),
+            'lensing_mass_function': _lensing_mass_function_cache.cache_info()}
+
+def clear_caches():
+
+    """
+    Removes all cached instances
+    """
+    for cache in [_cosmology_cache, _lens_cosmo_cache, _lensing_mass_function_cache]:
+        cache.clear()
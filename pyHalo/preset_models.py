@@ -6,9 +6,10 @@ presented here show what each keyword argument accepted by pyHalo does.
 """
 from pyHalo.pyhalo import pyHalo
 from pyHalo.realization_extensions import RealizationExtensions
-from pyHalo.Cosmology.cosmology import Cosmology
+from pyHalo.instance_cache import cosmology_instance
 import numpy as np
 from pyHalo.utilities import de_broglie_wavelength
+from pyHalo.random_numbers import random_generator
 
 def preset_model_from_name(name):
     """
@@ -30,7 +31,7 @@ def preset_model_from_name(name):
 def CDM(z_lens, z_source, sigma_sub=0.025, shmf_log_slope=-1.9, cone_opening_angle_arcsec=6., log_mlow=6.,
         log_mhigh=10., LOS_normalization=1., log_m_host=13.3, r_tidal='0.25Rs',
         mass_definition='TNFW', c0=None, log10c0=None,
-        beta=None, zeta=None, **kwargs_other):
+        beta=None, zeta=None, rng=None, **kwargs_other):
 
     """
     This specifies the keywords for a CDM halo mass function model with a subhalo mass function described by a power law
@@ -70,6 +71,7 @@ def CDM(z_lens, z_source, sigma_sub=0.025, shmf_log_slope=-1.9, cone_opening_ang
     :param log10c0: logarithmic amplitude of the mass-concentration relation at 10^8 (only if c0_mcrelation is None)
     :param beta: logarithmic slope of the mass-concentration-relation pivoting around 10^8
     :param zeta: modifies the redshift evolution of the mass-concentration-relation
+    :param rng: a numpy Generator or an integer seed; defaults to pyHalo.random_numbers.random_state
 
     :return: a realization of CDM halos
     """
@@ -101,9 +103,11 @@ def CDM(z_lens, z_source, sigma_sub=0.025, shmf_log_slope=-1.9, cone_opening_ang
 
     # this will use the default cosmology. parameters can be found in defaults.py
     pyhalo = pyHalo(z_lens, z_source)
+    rng = random_generator(rng)
     # Using the render method will result a list of realizations
-    realization_subs = pyhalo.render(['SUBHALOS'], kwargs_model_subhalos, nrealizations=1)[0]
-    realization_line_of_sight = pyhalo.render(['LINE_OF_SIGHT', 'TWO_HALO'], kwargs_model_field, nrealizations=1)[0]
+    realization_subs = pyhalo.render(['SUBHALOS'], kwargs_model_subhalos, nrealizations=1, rng=rng)[0]
+    realization_line_of_sight = pyhalo.render(['LINE_OF_SIGHT', 'TWO_HALO'], kwargs_model_field, nrealizations=1,
+                                              rng=rng)[0]
 
     cdm_realization = realization_line_of_sight.join(realization_subs, join_rendering_classes=True)
 
@@ -113,7 +117,7 @@ def WDM(z_lens, z_source, log_mc, log_mlow=6., log_mhigh=10., a_wdm_los=2.3, b_w
                   a_wdm_sub=4.2, b_wdm_sub=2.5, c_wdm_sub=-0.2, cone_opening_angle_arcsec=6.,
                   sigma_sub=0.025, LOS_normalization=1., log_m_host= 13.3, power_law_index=-1.9, r_tidal='0.25Rs',
                     kwargs_suppression_mc_relation_field=None, suppression_model_field=None, kwargs_suppression_mc_relation_sub=None,
-                  suppression_model_sub=None, **kwargs_other):
+                  suppression_model_sub=None, rng=None, **kwargs_other):
 
     """
 
@@ -181,6 +185,7 @@ def WDM(z_lens, z_source, log_mc, log_mlow=6., log_mhigh=10., a_wdm_los=2.3, b_w
     ###################################################################################################
 
     :param kwargs_other: any other optional keyword arguments
+    :param rng: a numpy Generator or an integer seed; defaults to pyHalo.random_numbers.random_state
 
     :return: a realization of WDM halos
     """
@@ -210,9 +215,11 @@ def WDM(z_lens, z_source, log_mc, log_mlow=6., log_mhigh=10., a_wdm_los=2.3, b_w
 
     # this will use the default cosmology. parameters can be found in defaults.py
     pyhalo = pyHalo(z_lens, z_source)
+    rng = random_generator(rng)
     # Using the render method will result a list of realizations
-    realization_subs = pyhalo.render(['SUBHALOS'], kwargs_model_subhalos, nrealizations=1)[0]
-    realization_line_of_sight = pyhalo.render(['LINE_OF_SIGHT', 'TWO_HALO'], kwargs_model_field, nrealizations=1)[0]
+    realization_subs = pyhalo.render(['SUBHALOS'], kwargs_model_subhalos, nrealizations=1, rng=rng)[0]
+    realization_line_of_sight = pyhalo.render(['LINE_OF_SIGHT', 'TWO_HALO'], kwargs_model_field, nrealizations=1,
+                                              rng=rng)[0]
 
     wdm_realization = realization_line_of_sight.join(realization_subs, join_rendering_classes=True)
 
@@ -222,7 +229,8 @@ def WDM(z_lens, z_source, log_mc, log_mlow=6., log_mhigh=10., a_wdm_los=2.3, b_w
 def SIDM(z_lens, z_source, cross_section_name, cross_section_class, kwargs_cross_section,
          kwargs_core_collapse_profile, deflection_angle_function, central_density_function, evolution_timescale_function,
          velocity_dispersion_function, t_sub=10, t_field=100, log_mlow=6., log_mhigh=10., cone_opening_angle_arcsec=6., sigma_sub=0.025,
-         LOS_normalization=1., log_m_host=13.3, power_law_index=-1.9, r_tidal='0.25Rs', mdef='coreTNFW', **kwargs_other):
+         LOS_normalization=1., log_m_host=13.3, power_law_index=-1.9, r_tidal='0.25Rs', mdef='coreTNFW', rng=None,
+         **kwargs_other):
 
     """
     This generates realizations of self-interacting dark matter (SIDM) halos, inluding both cored and core-collapsed
@@ -255,6 +263,7 @@ def SIDM(z_lens, z_source, cross_section_name, cross_section_class, kwargs_cross
     to account for tidal stripping of halos that pass close to the central galaxy
     :param kwargs_other: any addition keyword arguments
     :param mdef: the halo mass definition
+    :param rng: a numpy Generator or an integer seed; defaults to pyHalo.random_numbers.random_state
     :return: an instance of Realization that contains cored and core collapsed halos
     """
 
@@ -263,8 +272,9 @@ def SIDM(z_lens, z_source, cross_section_name, cross_section_class, kwargs_cross
                        'numerical_deflection_angle_class': deflection_angle_function}
     kwargs_sidm.update(kwargs_other)
 
+    rng = random_generator(rng)
     realization_no_core_collapse = CDM(z_lens, z_source, sigma_sub, power_law_index, cone_opening_angle_arcsec, log_mlow,
-                              log_mhigh, LOS_normalization, log_m_host, r_tidal, mdef, **kwargs_sidm)
+                              log_mhigh, LOS_normalization, log_m_host, r_tidal, mdef, rng=rng, **kwargs_sidm)
 
     ext = RealizationExtensions(realization_no_core_collapse)
 
@@ -280,7 +290,7 @@ def ULDM(z_lens, z_source, log10_m_uldm, log10_fluc_amplitude=-0.8, fluctuation_
                   c_scale=21.42, c_power=-0.42, c_power_inner=1.62, cone_opening_angle_arcsec=6.,
                   sigma_sub=0.025, LOS_normalization=1., log_m_host= 13.3, power_law_index=-1.9, r_tidal='0.25Rs',
                   mass_definition='ULDM', uldm_plaw=1/3, scale_nfw=False, flucs=True,
-                  flucs_shape='aperture', flucs_args={}, n_cut=50000, r_ein=1.0, **kwargs_other):
+                  flucs_shape='aperture', flucs_args={}, n_cut=50000, r_ein=1.0, rng=None, **kwargs_other):
 
     """
     This generates realizations of ultra-light dark matter (ULDM), including the ULDM halo mass function and halo density profiles,
@@ -380,6 +390,7 @@ def ULDM(z_lens, z_source, log10_m_uldm, log10_fluc_amplitude=-0.8, fluctuation_
     :param n_cut: Number of fluctuations above which to start cancelling
     :param r_ein: the Einstein radius in arcseconds
     :param kwargs_other: any other optional keyword arguments
+    :param rng: a numpy Generator or an integer seed; defaults to pyHalo.random_numbers.random_state
     :return: a realization of ULDM halos
     """
     # constants
@@ -391,7 +402,8 @@ def ULDM(z_lens, z_source, log10_m_uldm, log10_fluc_amplitude=-0.8, fluctuation_
 
     #compute M_min as described in documentation
     a = lambda z: (1+z)**(-1)
-    O_m = lambda z: Cosmology().astropy.Om(z)
+    astropy_cosmo = cosmology_instance().astropy
+    O_m = lambda z: astropy_cosmo.Om(z)
     zeta = lambda z: (18*np.pi**2 + 82*(O_m(z)-1) - 39*(O_m(z)-1)**2) / O_m(z)
     m_min = lambda z: a(z)**(-3/4) * (zeta(z)/zeta(0))**(1/4) * M_min0
     log_m_min = lambda z: np.log10(m_min(z))
@@ -429,9 +441,11 @@ def ULDM(z_lens, z_source, log10_m_uldm, log10_fluc_amplitude=-0.8, fluctuation_
 
     # this will use the default cosmology. parameters can be found in defaults.py
     pyhalo = pyHalo(z_lens, z_source)
+    rng = random_generator(rng)
     # Using the render method will result a list of realizations
-    realization_subs = pyhalo.render(['SUBHALOS'], kwargs_model_subhalos, nrealizations=1)[0]
-    realization_line_of_sight = pyhalo.render(['LINE_OF_SIGHT', 'TWO_HALO'], kwargs_model_field, nrealizations=1)[0]
+    realization_subs = pyhalo.render(['SUBHALOS'], kwargs_model_subhalos, nrealizations=1, rng=rng)[0]
+    realization_line_of_sight = pyhalo.render(['LINE_OF_SIGHT', 'TWO_HALO'], kwargs_model_field, nrealizations=1,
+                                              rng=rng)[0]
     uldm_realization = realization_line_of_sight.join(realization_subs, join_rendering_classes=True)
 
     if flucs: # add fluctuations to realization
@@ -461,7 +475,8 @@ def ULDM(z_lens, z_source, log10_m_uldm, log10_fluc_amplitude=-0.8, fluctuation_
 
         r_perp = r_ein * uldm_realization.lens_cosmo.cosmo.kpc_proper_per_asec(z_lens)
         sigma_crit = uldm_realization.lens_cosmo.get_sigma_crit_lensing(z_lens, z_source)
-        c_host = uldm_realization.lens_cosmo.NFW_concentration(10**log_m_host, z_lens, scatter=True)
+        c_host = uldm_realization.lens_cosmo.NFW_concentration(10**log_m_host, z_lens, scatter=True,
+                                                               rng=uldm_realization.rng)
         rhos, rs, _ = uldm_realization.lens_cosmo.NFW_params_physical(10**log_m_host, c_host, z_lens)
         x = r_perp / rs
         if x < 1:
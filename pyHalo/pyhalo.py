@@ -1,8 +1,15 @@
 from pyHalo.pyhalo_base import pyHaloBase
 from pyHalo.single_realization import Realization
 from pyHalo.Rendering.halo_population import HaloPopulation
+from pyHalo.Rendering.rendering_plan import RenderingPlan, plan_fingerprint
 from pyHalo.defaults import set_default_kwargs
-from pyHalo.Halos.lens_cosmo import LensCosmo
+from pyHalo.instance_cache import lens_cosmo_instance
+from pyHalo.random_numbers import spawn_generators
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from collections import deque
+import os
+
+_worker_args = {}
 
 
 class pyHalo(pyHaloBase):
@@ -30,35 +37,192 @@ class pyHalo(pyHaloBase):
         """
         super(pyHalo, self).__init__(zlens, zsource, cosmology_kwargs, kwargs_halo_mass_function)
 
+    def rendering_plan(self, population_model_list, model_keywords, convergence_sheet_correction=True):
+
+        """
+        Computes the quantities used to render halos that are the same for every realization created with the same
+        population models and keyword arguments, such as the lens plane redshifts, volume elements, and the
+        normalization and slope of the mass function and convergence of the negative mass sheets on each lens plane.
+        The plan can be passed to render to create many realizations without recomputing these quantities, and can be
+        saved to a file (see Rendering.rendering_plan).
+
+        :param population_model_list: a list of population models (e.g. ['SUBHALOS', 'LINE_OF_SIGHT'])
+        :param model_keywords: keyword arguments for the population models
+        :param convergence_sheet_correction: bool; whether to include the negative convergence sheets
+        :return: an instance of RenderingPlan
+        """
+        halo_mass_function, geometry, keywords_master, lens_cosmo, plane_redshifts, redshift_spacing = \
+            self._rendering_setup(model_keywords)
+        return self._rendering_plan(population_model_list, keywords_master, lens_cosmo, geometry,
+                                    halo_mass_function, plane_redshifts, redshift_spacing,
+                                    convergence_sheet_correction)
+
     def render(self, population_model_list, model_keywords, nrealizations=1,
-               convergence_sheet_correction=True):
+               convergence_sheet_correction=True, backend='serial', nworkers=None, seed=None, rng=None,
+               rendering_plan=None):
+
+        """
+        Generates realizations of dark matter halos
+
+        :param population_model_list: a list of population models (e.g. ['SUBHALOS', 'LINE_OF_SIGHT'])
+        :param model_keywords: keyword arguments for the population models
+        :param nrealizations: the number of realizations to generate
+        :param convergence_sheet_correction: bool; whether to add negative convergence sheets to the realizations
+        :param backend: how to distribute the realizations; 'serial', 'threads', or 'processes'
+        :param nworkers: the number of threads or processes; defaults to the number of CPUs
+        :param seed: a root seed (an integer or a numpy.random.SeedSequence); see pyHalo.random_numbers.spawn_generators
+        :param rng: a numpy Generator from which the root seed is drawn; cannot be combined with seed
+        :param rendering_plan: an instance of RenderingPlan created with rendering_plan for the same population models
+        and keyword arguments; if None, a plan is computed once for all the realizations when nrealizations > 1
+        :return: a list of realizations
+        """
+        return list(self.render_iter(population_model_list, model_keywords, nrealizations,
+                                     convergence_sheet_correction, backend, nworkers, seed, rng, rendering_plan))
+
+    def render_iter(self, population_model_list, model_keywords, nrealizations=1,
+                    convergence_sheet_correction=True, backend='serial', nworkers=None, seed=None, rng=None,
+                    rendering_plan=None):
 
+        """
+        Same as render, but returns an iterator that yields the realizations one at a time, in order, without holding
+        all of them in memory. With the 'threads' and 'processes' backends, at most 2 * nworkers realizations are
+        rendered ahead of the one that is consumed.
+
+        Notes:
+        With the 'threads' backend, the worker threads share the instances of Cosmology, LensCosmo, Geometry, and
+        LensingMassFunction, and the tables that are computed when they are first used (e.g. the distance table of
+        Cosmology and the concentration lookup tables) are created by one thread while the others wait.
+        With the 'processes' backend, the keyword arguments, lens_cosmo, geometry, and mass function are sent to each
+        worker process once, so they must be picklable (e.g. no lambda functions for a redshift-dependent
+        normalization). Keyword arguments that are set while rendering (such as a host halo concentration drawn when it
+        is not specified) are not shared between worker processes.
+
+        See the documentation of render for a description of the arguments
+        :return: an iterator over realizations
+        """
+
+        halo_mass_function, geometry, keywords_master, lens_cosmo, plane_redshifts, redshift_spacing = \
+            self._rendering_setup(model_keywords)
+
+        if rendering_plan is not None:
+            rendering_plan.check(self.zlens, self.zsource, population_model_list, plane_redshifts,
+                                 plan_fingerprint(keywords_master, self.cosmology, self._halo_mass_function_args))
+            model_plans = rendering_plan.model_plans
+        elif nrealizations > 1:
+            model_plans = self._rendering_plan(population_model_list, keywords_master, lens_cosmo, geometry,
+                                               halo_mass_function, plane_redshifts, redshift_spacing,
+                                               convergence_sheet_correction).model_plans
+        else:
+            # a single realization computes only the quantities it uses, when it uses them
+            model_plans = None
+
+        if seed is None and rng is None and backend == 'serial':
+            generators = [None] * nrealizations
+        else:
+            generators = spawn_generators(nrealizations, seed, rng)
+
+        args = (population_model_list, keywords_master, lens_cosmo, geometry, halo_mass_function,
+                plane_redshifts, redshift_spacing, model_plans)
+
+        def _realization(population):
+            return self._realization_from_population(population, keywords_master, lens_cosmo, geometry,
+                                                     convergence_sheet_correction)
+
+        if backend == 'serial':
+            for rng_realization in generators:
+                yield _realization(_render_population(*args, rng_realization))
+            return
+
+        if nworkers is None:
+            nworkers = os.cpu_count() or 1
+
+        if backend == 'threads':
+            executor = ThreadPoolExecutor(max_workers=nworkers)
+            submit = lambda r: executor.submit(_render_population, *args, r)
+        elif backend == 'processes':
+            executor = ProcessPoolExecutor(max_workers=nworkers, initializer=_initialize_worker, initargs=(args,))
+            submit = lambda r: executor.submit(_render_population_in_worker, r)
+        else:
+            raise Exception('backend ' + str(backend) + ' not recognized; must be serial, threads, or processes')
+
+        with executor:
+            pending = deque()
+            for rng_realization in generators:
+                pending.append(submit(rng_realization))
+                if len(pending) >= 2 * nworkers:
+                    yield _realization(pending.popleft().result())
+            while len(pending) > 0:
+                yield _realization(pending.popleft().result())
+
+    def _rendering_setup(self, model_keywords):
+
+        """
+        Creates the objects shared by all realizations
+        :param model_keywords: keyword arguments for the population models
+        :return: the halo mass function, geometry, keyword arguments with default values, LensCosmo instance, and the
+        redshifts and thickness of the lens planes
+        """
         halo_mass_function = self.build_LOS_mass_function(model_keywords)
         geometry = self.halo_mass_function.geometry
         keywords_master = set_default_kwargs(model_keywords, self.zsource)
 
-        lens_cosmo = LensCosmo(self.zlens, self.zsource, self.cosmology)
+        lens_cosmo = lens_cosmo_instance(self.zlens, self.zsource, self.cosmology)
         plane_redshifts, redshift_spacing = self.lens_plane_redshifts(keywords_master)
+        return halo_mass_function, geometry, keywords_master, lens_cosmo, plane_redshifts, redshift_spacing
+
+    def _rendering_plan(self, population_model_list, keywords_master, lens_cosmo, geometry, halo_mass_function,
+                        plane_redshifts, redshift_spacing, convergence_sheet_correction):
+
+        model_plans = HaloPopulation.model_plans(population_model_list, keywords_master, lens_cosmo, geometry,
+                                                 halo_mass_function, plane_redshifts, redshift_spacing,
+                                                 convergence_sheet_correction)
+        fingerprint = plan_fingerprint(keywords_master, self.cosmology, self._halo_mass_function_args)
+        return RenderingPlan(self.zlens, self.zsource, population_model_list, plane_redshifts, redshift_spacing,
+                             model_plans, fingerprint)
+
+    @staticmethod
+    def _realization_from_population(population, keywords_master, lens_cosmo, geometry,
+                                     convergence_sheet_correction):
+
+        """
+        Creates a realization from the output of _render_population
+        """
+        masses, x_arcsec, y_arcsec, r3d, redshifts, subhalo_flag, rendering_classes, rng = population
 
-        realization_list = []
+        mdefs = [keywords_master['mdef_subs'] if flag else keywords_master['mdef_los'] for flag in subhalo_flag]
 
-        for n in range(nrealizations):
+        realization = Realization(masses, x_arcsec, y_arcsec, r3d, mdefs, redshifts, subhalo_flag, lens_cosmo,
+                                  kwargs_realization=keywords_master, mass_sheet_correction=convergence_sheet_correction,
+                                  rendering_classes=rendering_classes, geometry=geometry, rng=rng)
+        return realization
 
-            population_model = HaloPopulation(population_model_list, keywords_master, lens_cosmo, geometry,
-                                              halo_mass_function, plane_redshifts, redshift_spacing)
+def _render_population(population_model_list, keywords_master, lens_cosmo, geometry, halo_mass_function,
+                       plane_redshifts, redshift_spacing, model_plans, rng):
 
-            masses, x_arcsec, y_arcsec, r3d, redshifts, subhalo_flag = population_model.render()
+    """
+    Renders the halo population of one realization
+    :param model_plans: the plan of each population model (see Rendering.rendering_plan), or None
+    :param rng: a numpy Generator; defaults to pyHalo.random_numbers.random_state
+    :return: the halo masses, x and y coordinates, 3D positions, redshifts, subhalo flags, the rendering classes, and
+    rng after the random draws
+    """
+    population_model = HaloPopulation(population_model_list, keywords_master, lens_cosmo, geometry,
+                                      halo_mass_function, plane_redshifts, redshift_spacing, rng, model_plans)
+
+    masses, x_arcsec, y_arcsec, r3d, redshifts, subhalo_flag = population_model.render()
+
+    return masses, x_arcsec, y_arcsec, r3d, redshifts, subhalo_flag, population_model.rendering_classes, rng
 
-            mdefs = []
-            for i in range(0, len(masses)):
-                if subhalo_flag[i]:
-                    mdefs += [keywords_master['mdef_subs']]
-                else:
-                    mdefs += [keywords_master['mdef_los']]
+def _initialize_worker(args):
+
+    """
+    Stores the arguments shared by all realizations in a worker process
+    """
+    from colossus.cosmology import cosmology as colossus_cosmology
+    _worker_args['args'] = args
+    lens_cosmo = args[2]
+    colossus_cosmology.setCurrent(lens_cosmo.cosmo.colossus)
 
-            realization = Realization(masses, x_arcsec, y_arcsec, r3d, mdefs, redshifts, subhalo_flag, lens_cosmo,
-                                      kwargs_realization=keywords_master, mass_sheet_correction=convergence_sheet_correction,
-                                      rendering_classes=population_model.rendering_classes, geometry=geometry)
-            realization_list.append(realization)
+def _render_population_in_worker(rng):
 
-        return realization_list
+    return _render_population(*_worker_args['args'], rng)
@@ -1,5 +1,4 @@
-from pyHalo.Cosmology.cosmology import Cosmology
-from pyHalo.Cosmology.lensing_mass_function import LensingMassFunction
+from pyHalo.instance_cache import cosmology_instance, lensing_mass_function_instance
 import numpy as np
 from pyHalo.defaults import *
 from scipy.interpolate import interp1d
@@ -58,7 +57,7 @@ class pyHaloBase(object):
 
         self.zlens = zlens
         self.zsource = zsource
-        self.cosmology = Cosmology(**self._cosmology_kwargs)
+        self.cosmology = cosmology_instance(self._cosmology_kwargs)
         self.halo_mass_function = None
         self.geometry = None
 
@@ -83,10 +82,10 @@ class pyHaloBase(object):
             if 'mass_function_model' not in self._halo_mass_function_args.keys():
                 self._halo_mass_function_args.update({'mass_function_model': cosmo_default.default_mass_function})
 
-            self.halo_mass_function = LensingMassFunction(self.cosmology, self.zlens, self.zsource,
-                                                          10 ** logLOS_mlow, 10 ** logLOS_mhigh,
-                                                          cone_opening_angle=args['cone_opening_angle'],
-                                                          **self._halo_mass_function_args)
+            self.halo_mass_function = lensing_mass_function_instance(self.cosmology, self.zlens, self.zsource,
+                                                                     10 ** logLOS_mlow, 10 ** logLOS_mhigh,
+                                                                     args['cone_opening_angle'],
+                                                                     **self._halo_mass_function_args)
 
         return self.halo_mass_function
 
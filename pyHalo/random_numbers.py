@@ -0,0 +1,66 @@
+import numpy as np
+
+"""
+Every sampler in pyHalo takes a keyword argument rng, converted with random_state, and draws all of its random numbers
+from it. If rng is None, the samplers draw from the global numpy random state, so code that seeds numpy.random directly
+keeps working. The classes and functions that store rng or are called by the user (Realization, RealizationExtensions,
+the mass functions and rendering classes, pyHalo.render, and the functions in preset_models) also accept a seed, which
+they convert to a Generator once with random_generator, so that repeated draws continue one stream instead of starting
+it again from the seed. pyHalo.render spawns an independent Generator for each realization from a root seed
+(spawn_generators), so the realizations do not depend on the backend or the number of workers; without a seed, the
+serial backend uses the global numpy random state and the other backends spawn the generators from fresh entropy. The
+generator is stored in the realization (Realization.rng) and in its halos, which use it for random properties computed
+later, such as the scatter in the concentration and the infall redshift.
+"""
+
+def _is_seed(rng):
+    return isinstance(rng, (int, np.integer, np.random.SeedSequence))
+
+def random_generator(rng=None):
+
+    """
+    Converts the rng argument of a class or function that also accepts a seed
+    :param rng: an instance of numpy.random.Generator, a seed for a new Generator (an integer or an instance of
+    numpy.random.SeedSequence), or None
+    :return: a new Generator if rng is a seed, and rng itself otherwise
+    """
+    if _is_seed(rng):
+        return np.random.default_rng(rng)
+    return rng
+
+def random_state(rng=None):
+
+    """
+    Returns the random number generator used by the samplers in pyHalo
+    :param rng: an instance of numpy.random.Generator, or None; seeds are converted with random_generator where rng is
+    first passed in, and are not accepted here because a Generator created from a seed at each call would repeat the
+    same draws
+    :return: the numpy.random module (the global numpy random state) if rng is None, and rng itself otherwise
+
+    Note: the samplers only use the methods shared by the Generator and the numpy.random module (random, uniform,
+    normal, lognormal, poisson, choice), so either can be used interchangeably
+    """
+    if rng is None:
+        return np.random
+    elif _is_seed(rng):
+        raise ValueError('rng must be an instance of numpy.random.Generator or None; convert a seed with '
+                         'pyHalo.random_numbers.random_generator')
+    else:
+        return rng
+
+def spawn_generators(n, seed=None, rng=None):
+
+    """
+    Creates independent random number generators from a root seed
+    :param n: the number of generators
+    :param seed: the root seed, an integer or an instance of numpy.random.SeedSequence; if None, fresh entropy
+    :param rng: an instance of numpy.random.Generator from which the root seed is drawn; cannot be combined with seed
+    :return: a list of n instances of numpy.random.Generator with statistically independent streams
+    """
+    if rng is not None:
+        if seed is not None:
+            raise Exception('only one of seed and rng can be specified')
+        seed = np.random.SeedSequence(rng.integers(0, 2 ** 32, size=4))
+    elif not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return [np.random.default_rng(s) for s in seed.spawn(n)]
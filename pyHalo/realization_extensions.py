@@ -7,6 +7,7 @@ from pyHalo.Rendering.correlated_structure import CorrelatedStructure
 from pyHalo.Cosmology.geometry import Geometry
 from pyHalo.Rendering.MassFunctions.delta import DeltaFunction
 from pyHalo.Rendering.SpatialDistributions.uniform import Uniform
+from pyHalo.random_numbers import random_state, random_generator
 from copy import deepcopy
 
 
@@ -17,14 +18,18 @@ class RealizationExtensions(object):
     (see pyHalo.single_realization).
     """
 
-    def __init__(self, realization):
+    def __init__(self, realization, rng=None):
 
         """
 
         :param realization: an instance of Realization
+        :param rng: a numpy Generator or a seed; defaults to the generator of the realization (Realization.rng)
         """
 
         self._realization = realization
+        if rng is None:
+            rng = realization.rng
+        self._rng = random_generator(rng)
 
     def change_mass_definition(self, mdef, new_mdef, kwargs_new):
 
@@ -58,7 +63,8 @@ class RealizationExtensions(object):
         return Realization.from_halos(new_halos, lens_cosmo, prof_params,
                                       msheet_correction, rendering_classes,
                                       rendering_center_x, rendering_center_y,
-                                      self._realization.geometry)
+                                      self._realization.geometry, self._realization.halo_id_allocator,
+                                      self._realization.rng)
 
     def core_collapse_by_mass(self, mass_ranges_subhalos, mass_ranges_field_halos,
                               probabilities_subhalos, probabilities_field_halos):
@@ -83,9 +89,10 @@ class RealizationExtensions(object):
         assert len(mass_ranges_field_halos) == len(probabilities_field_halos)
 
         indexes = []
+        rng = random_state(self._rng)
 
         for i_halo, halo in enumerate(self._realization.halos):
-            u = np.random.rand()
+            u = rng.random()
             if halo.is_subhalo:
                 for i, mrange in enumerate(mass_ranges_subhalos):
                     if halo.mass >= 10**mrange[0] and halo.mass < 10**mrange[1]:
@@ -125,6 +132,7 @@ class RealizationExtensions(object):
         :return: the indexes of halos in the realization that are core-collaapsed
         """
         inds = []
+        rng = random_state(self._rng)
 
         for i, halo in enumerate(self._realization.halos):
 
@@ -148,7 +156,7 @@ class RealizationExtensions(object):
                                                   t_field,
                                                   collapse_time_width)
 
-            if np.random.rand() < p:
+            if rng.random() < p:
                 inds.append(i)
 
         return inds
@@ -194,7 +202,8 @@ class RealizationExtensions(object):
         return Realization.from_halos(new_halos, lens_cosmo, prof_params,
                                       msheet_correction, rendering_classes,
                                       rendering_center_x, rendering_center_y,
-                                      self._realization.geometry)
+                                      self._realization.geometry, self._realization.halo_id_allocator,
+                                      self._realization.rng)
 
     def add_ULDM_fluctuations(self, de_Broglie_wavelength, fluctuation_amplitude,
                               fluctuation_size, fluctuation_size_variance, n_cut, n_fluc_scale=1., shape='ring', args={'rmin':0.9,'rmax':1.1}):
@@ -229,7 +238,7 @@ class RealizationExtensions(object):
 
         # get number of fluctuations
         n_flucs = _get_number_flucs(self._realization,de_Broglie_wavelength,
-                                    fluctuation_size/de_Broglie_wavelength,n_fluc_scale,shape,args)
+                                    fluctuation_size/de_Broglie_wavelength,n_fluc_scale,shape,args,self._rng)
 
         # if zero fluctuations, return original realization
         if shape!='aperture':
@@ -252,7 +261,8 @@ class RealizationExtensions(object):
                                               fluctuation_size_variance,
                                               shape,
                                               n_flucs,
-                                              args)
+                                              args,
+                                              self._rng)
 
         # realization args
         lens_cosmo = self._realization.lens_cosmo
@@ -265,7 +275,8 @@ class RealizationExtensions(object):
         fluc_realization = Realization.from_halos(fluctuations, lens_cosmo, prof_params,
                                       msheet_correction, rendering_classes,
                                       rendering_center_x, rendering_center_y,
-                                      self._realization.geometry)
+                                      self._realization.geometry, self._realization.halo_id_allocator,
+                                      self._realization.rng)
 
         # join realization to dark substructure realization
         return self._realization.join(fluc_realization)
@@ -294,18 +305,18 @@ class RealizationExtensions(object):
 
         realization_copy = deepcopy(self._realization)
 
-        correlated_structure = CorrelatedStructure(kwargs_mass_function, self._realization, r_max_arcsec)
+        correlated_structure = CorrelatedStructure(kwargs_mass_function, self._realization, r_max_arcsec, self._rng)
 
         masses, x, y, r3d, redshifts, subhalo_flag, rescale_indicies, rescale_factor = correlated_structure.render(x_image_interp_list, y_image_interp_list,
                                                                                  arcsec_per_pixel)
 
         for index in np.unique(rescale_indicies):
-            realization_copy.halos[index].rescale_normalization(rescale_factor)
+            realization_copy._halo(index).rescale_normalization(rescale_factor)
 
         mdefs = [mass_definition] * len(masses)
         realization_pbh = Realization(masses, x, y, r3d, mdefs, redshifts, subhalo_flag,
                                            self._realization.lens_cosmo,
-                               kwargs_realization=self._realization._prof_params)
+                               kwargs_realization=self._realization._prof_params, rng=self._realization.rng)
 
         new_realization = realization_copy.join(realization_pbh)
 
@@ -354,27 +365,32 @@ class RealizationExtensions(object):
         ycoords = np.array([])
         redshifts = np.array([])
 
+        # the volume element, comoving distance, rendering radius, and kpc per arcsec of each lens plane
+        z_planes = np.array(plane_redshifts, dtype=float)
+        volumes = geometry.volume_element_comoving(z_planes, delta_z)
+        comoving_distances = geometry._cosmo.D_C_transverse(z_planes)
+        rendering_radii = r_max_arcsec * geometry.rendering_scale(z_planes)
+        kpc_per_arcsec = geometry.kpc_per_arcsec(z_planes)
+
         for x_image_interp, y_image_interp in zip(x_image_interp_list, y_image_interp_list):
-            for zi, delta_zi in zip(plane_redshifts, delta_z):
+            for zi, volume, d, rendering_radius, kpc_per_asec in zip(plane_redshifts, volumes, comoving_distances,
+                                                                   rendering_radii, kpc_per_arcsec):
 
-                d = geometry._cosmo.D_C_transverse(zi)
                 angle_x, angle_y = x_image_interp(d), y_image_interp(d)
-                rendering_radius = r_max_arcsec * geometry.rendering_scale(zi)
                 spatial_distribution_model_smooth = Uniform(rendering_radius, geometry)
 
                 if kwargs_pbh_mass_function['mass_function_type'] == 'DELTA':
                     rho_smooth = mass_fraction_smooth * self._realization.lens_cosmo.cosmo.rho_dark_matter_crit
-                    volume = geometry.volume_element_comoving(zi, delta_zi)
                     mass_function_smooth = DeltaFunction(10 ** kwargs_pbh_mass_function['logM'],
-                                                         volume, rho_smooth)
+                                                         volume, rho_smooth, rng=self._rng)
                 else:
                     raise Exception('no mass function type for PBH currently implemented besides DELTA')
 
                 m_smooth = mass_function_smooth.draw()
                 if len(m_smooth) > 0:
-                    kpc_per_asec = geometry.kpc_per_arcsec(zi)
                     x_kpc, y_kpc = spatial_distribution_model_smooth.draw(len(m_smooth), zi,
-                                                                          center_x=angle_x, center_y=angle_y)
+                                                                          center_x=angle_x, center_y=angle_y,
+                                                                          rng=self._rng)
                     x_arcsec, y_arcsec = x_kpc / kpc_per_asec, y_kpc / kpc_per_asec
                     masses = np.append(masses, m_smooth)
                     xcoords = np.append(xcoords, x_arcsec)
@@ -385,7 +401,8 @@ class RealizationExtensions(object):
         r3d = np.array([None] * len(masses))
         subhalo_flag = [False] * len(masses)
         realization_smooth = Realization(masses, xcoords, ycoords, r3d, mdefs, redshifts, subhalo_flag,
-                                          self._realization.lens_cosmo, kwargs_realization=self._realization._prof_params)
+                                          self._realization.lens_cosmo, kwargs_realization=self._realization._prof_params,
+                                         rng=self._realization.rng)
 
         kwargs_pbh_mass_function['mass_fraction'] = mass_fraction_clumpy
         realization_with_clustering = self.add_correlated_structure(kwargs_pbh_mass_function, mass_definition, x_image_interp_list, y_image_interp_list,
@@ -393,7 +410,7 @@ class RealizationExtensions(object):
 
         return realization_with_clustering.join(realization_smooth)
 
-def _get_number_flucs(realization, de_Broglie_wavelength, fluctuation_size_scale, n_fluc_scale, shape, args):
+def _get_number_flucs(realization, de_Broglie_wavelength, fluctuation_size_scale, n_fluc_scale, shape, args, rng=None):
     """
     This function returns the number of fluctuations to place in the realization.
 
@@ -403,8 +420,10 @@ def _get_number_flucs(realization, de_Broglie_wavelength, fluctuation_size_scale
     :param n_fluc_scale: rescales the total number of fluctuations
     :param shape: keyword argument for fluctuation geometry, see 'add_ULDM_fluctuations'
     :param args: properties of the given shape, see 'add_ULDM_fluctuations'
+    :param rng: a numpy Generator; defaults to pyHalo.random_numbers.random_state
     """
 
+    rng = random_state(rng)
     D_d = realization.lens_cosmo.cosmo.D_A_z(realization._zlens)
     arcsec = realization.lens_cosmo.cosmo.arcsec
     fluc_area=np.pi*(de_Broglie_wavelength * fluctuation_size_scale)**2 #de Broglie area
@@ -415,14 +434,14 @@ def _get_number_flucs(realization, de_Broglie_wavelength, fluctuation_size_scale
         rmin_kpc,rmax_kpc = args['rmin'] * to_kpc, args['rmax'] * to_kpc #args in kpc
         area_ring = np.pi*(rmax_kpc**2-rmin_kpc**2) # volume of ring
         n_flucs_expected=n_fluc_scale*area_ring/fluc_area # number of fluctuations in ring
-        n_flucs = np.random.poisson(n_flucs_expected)
+        n_flucs = rng.poisson(n_flucs_expected)
 
     if shape=='ellipse': # fluctuations in a elliptical slice (for visualization purposes)
 
         amin_kpc,bmin_kpc,amax_kpc,bmax_kpc=args['amin'] * to_kpc, args['bmin'] * to_kpc, args['amax'] * to_kpc, args['bmax'] * to_kpc #args in kpc
         area_ellipse=np.pi*(amax_kpc*bmax_kpc - amin_kpc*bmin_kpc) # volume of ellipse
         n_flucs_expected=n_fluc_scale*area_ellipse/fluc_area # number of fluctuations in ellipse
-        n_flucs = np.random.poisson(n_flucs_expected)
+        n_flucs = rng.poisson(n_flucs_expected)
 
     if shape=='aperture': # fluctuations around lensing images (for computation)
 
@@ -430,12 +449,13 @@ def _get_number_flucs(realization, de_Broglie_wavelength, fluctuation_size_scale
         r_kpc = args['aperture'] * to_kpc #aperture in kpc
         area_aperture = np.pi*r_kpc**2 # aperture area
         n_flucs_expected = n_fluc_scale*area_aperture/fluc_area #number of expected fluctuations per aperture
-        n_flucs = np.random.poisson(n_flucs_expected,n_images) #draw number of fluctuations from poisson distribution for each image
+        n_flucs = rng.poisson(n_flucs_expected,n_images) #draw number of fluctuations from poisson distribution for each image
         n_flucs = n_flucs[n_flucs!=0] #get rid of aperture if zero fluctuations within it
 
     return n_flucs
 
-def _get_fluctuation_halos(realization, fluctuation_amplitude, fluctuation_size, fluctuation_size_variance, shape, n_flucs, args):
+def _get_fluctuation_halos(realization, fluctuation_amplitude, fluctuation_size, fluctuation_size_variance, shape, n_flucs, args,
+                           rng=None):
     """
     This function creates 'n_flucs' Gaussian fluctuations and places them according to 'shape'.
 
@@ -448,33 +468,35 @@ def _get_fluctuation_halos(realization, fluctuation_amplitude, fluctuation_size,
     :param shape: keyword argument for fluctuation geometry, see 'add_ULDM_fluctuations'
     :param n_flucs: Number of fluctuations to make
     :param args: properties of the given shape, see 'add_ULDM_fluctuations'
+    :param rng: a numpy Generator; defaults to pyHalo.random_numbers.random_state
     """
 
+    rng = random_state(rng)
     kpc_per_arcsec = realization.lens_cosmo.cosmo.kpc_proper_per_asec(realization._zlens)
     fluc_var_angle = fluctuation_size / kpc_per_arcsec # gaussian variance in arcsec
     fluctuation_size_variance_angle = fluctuation_size_variance / kpc_per_arcsec
 
     if shape != 'aperture':
 
-        sigs = np.abs(np.random.normal(fluc_var_angle,fluctuation_size_variance_angle,n_flucs)) #random widths
+        sigs = np.abs(rng.normal(fluc_var_angle,fluctuation_size_variance_angle,n_flucs)) #random widths
 
-        kappa0 = np.random.normal(0, fluctuation_amplitude, n_flucs)
+        kappa0 = rng.normal(0, fluctuation_amplitude, n_flucs)
 
         # kappa0 = amp / (2 * np.pi * sigma ** 2)
         amps = kappa0 * 2 * np.pi * sigs ** 2
 
     if shape=='ring':
 
-        angles = np.random.uniform(0,2*np.pi,n_flucs)  # random angles
-        radii = args['rmin'] + np.sqrt(np.random.uniform(0,1,n_flucs))*(args['rmax']-args['rmin']) #random radii
+        angles = rng.uniform(0,2*np.pi,n_flucs)  # random angles
+        radii = args['rmin'] + np.sqrt(rng.uniform(0,1,n_flucs))*(args['rmax']-args['rmin']) #random radii
         xs = radii*np.cos(angles) #random x positions
         ys = radii*np.sin(angles) #random y positions
 
     if shape=='ellipse':
 
-        angles = np.random.uniform(0,2*np.pi,n_flucs)  # random angles
-        aa = np.sqrt(np.random.uniform(0,1,n_flucs))*(args['amax']-args['amin']) + args['amin'] #random axis 1
-        bb = np.sqrt(np.random.uniform(0,1,n_flucs))*(args['bmax']-args['bmin']) + args['bmin'] #random axis 1
+        angles = rng.uniform(0,2*np.pi,n_flucs)  # random angles
+        aa = np.sqrt(rng.uniform(0,1,n_flucs))*(args['amax']-args['amin']) + args['amin'] #random axis 1
+        bb = np.sqrt(rng.uniform(0,1,n_flucs))*(args['bmax']-args['bmin']) + args['bmin'] #random axis 1
         xs = aa*np.cos(angles)*np.cos(args['angle'])-bb*np.sin(angles)*np.sin(args['angle']) #random x positions
         ys = aa*np.cos(angles)*np.sin(args['angle'])+bb*np.sin(angles)*np.cos(args['angle']) #random y positions
 
@@ -484,14 +506,14 @@ def _get_fluctuation_halos(realization, fluctuation_amplitude, fluctuation_size,
 
         for i in range(0, len(n_flucs)): #loop through each image
 
-            sigs_i = np.random.normal(fluc_var_angle,fluctuation_size_variance_angle,n_flucs[i])
+            sigs_i = rng.normal(fluc_var_angle,fluctuation_size_variance_angle,n_flucs[i])
             sigs_i = np.absolute(sigs_i)
 
-            kappa0 = np.random.normal(0, fluctuation_amplitude, n_flucs[i])
+            kappa0 = rng.normal(0, fluctuation_amplitude, n_flucs[i])
             amps_i = kappa0 * 2*np.pi*sigs_i**2
 
-            angles_i = np.random.uniform(0, 2*np.pi, n_flucs[i])  # random angles
-            r = np.random.uniform(0, args['aperture'] ** 2, int(n_flucs[i]))
+            angles_i = rng.uniform(0, 2*np.pi, n_flucs[i])  # random angles
+            r = rng.uniform(0, args['aperture'] ** 2, int(n_flucs[i]))
             xs_i = r ** 0.5 * np.sin(angles_i) + args['x_images'][i]
             ys_i = r ** 0.5 * np.cos(angles_i) + args['y_images'][i]
             amps, sigs, xs, ys= np.append(amps, amps_i), np.append(sigs, sigs_i), np.append(xs, xs_i), np.append(ys, ys_i)
@@ -501,7 +523,8 @@ def _get_fluctuation_halos(realization, fluctuation_amplitude, fluctuation_size,
     #sigma_crit = realization.lens_cosmo.sigmacrit # in units M_sun / arcsec^2
     masses = np.absolute(amps)
     #masses = [10 ** 8.0] * len(xs)
+    unique_tags = realization.halo_id_allocator.allocate(len(amps))
     fluctuations = [Gaussian(masses[i], xs[i], ys[i], None, 'GAUSSIAN', realization._zlens,
-                             True, realization.lens_cosmo,args_fluc[i],np.random.rand()) for i in range(len(amps))]
+                             True, realization.lens_cosmo,args_fluc[i],unique_tags[i]) for i in range(len(amps))]
 
     return fluctuations
@@ -1,6 +1,7 @@
 from scipy.interpolate import interp1d
 from pyHalo.defaults import *
-from pyHalo.Cosmology.cosmology import Cosmology
+from pyHalo.instance_cache import cosmology_instance
+from pyHalo.random_numbers import random_generator
 from pyHalo.Halos.lens_cosmo import LensCosmo
 from pyHalo.Halos.HaloModels.NFW import NFWSubhhalo, NFWFieldHalo
 from pyHalo.Halos.HaloModels.TNFW import TNFWFieldHalo, TNFWSubhalo
@@ -10,7 +11,48 @@ from pyHalo.Halos.HaloModels.coreTNFW import coreTNFWFieldHalo, coreTNFWSubhalo
 from pyHalo.Halos.HaloModels.ULDM import ULDMFieldHalo, ULDMSubhalo
 from pyHalo.Halos.HaloModels.gaussian import Gaussian
 import numpy as np
-from copy import deepcopy
+from copy import deepcopy, copy
+from itertools import count
+
+# mass definitions are stored in a Realization as integer codes that index this tuple; it is fixed so that the codes
+# mean the same thing in every process
+_mdef_names = ('NFW', 'TNFW', 'PT_MASS', 'PJAFFE', 'coreTNFW', 'ULDM', 'GAUSSIAN_KAPPA', 'GAUSSIAN', 'SPL_CORE')
+# halos with these mass definitions are not moved by Realization.shift_background_to_source
+_fixed_position_mdefs = ['GAUSSIAN_KAPPA', 'GAUSSIAN']
+# halo classes whose lenstronomy keyword arguments are computed for all halos at once in
+# Realization.lenstronomy_kwargs_table; subclasses are excluded as they may define a different profile
+_batched_halo_classes = {'NFW': (NFWFieldHalo, NFWSubhhalo), 'TNFW': (TNFWFieldHalo, TNFWSubhalo)}
+# each new lineage of realizations takes the next number from this counter
+_lineage_counter = count()
+
+
+class HaloIDAllocator(object):
+    """
+    Assigns integer IDs to halos. Every realization created from arrays of halo properties (or from a list of halos)
+    starts a new lineage with its own allocator; realizations derived from it (through filter, join,
+    shift_background_to_source, split_at_z, etc.) keep the same allocator, so the IDs of the halos they share are the
+    same, and new halos added to the lineage never reuse an ID.
+
+    The ID of the k-th halo in lineage L is L * 2^32 + k, so IDs from different lineages never collide.
+    """
+
+    def __init__(self):
+
+        self.lineage = next(_lineage_counter)
+        self._next_id = 0
+
+    def allocate(self, n):
+        """
+        :param n: number of new IDs
+        :return: an int64 array of n new IDs
+        """
+        ids = (np.int64(self.lineage) << 32) + np.arange(self._next_id, self._next_id + n, dtype=np.int64)
+        self._next_id += n
+        return ids
+
+    def __deepcopy__(self, memo):
+        # copies of a realization belong to the same lineage, and must not hand out the same IDs twice
+        return self
 
 
 def realization_at_z(realization, z, angular_coordinate_x=None, angular_coordinate_y=None, max_range=None,
@@ -27,28 +69,73 @@ def realization_at_z(realization, z, angular_coordinate_x=None, angular_coordina
     :return: a new instance of Realization, and the indexes of halos that were kept from the original realization
     """
 
-    _halos, _indexes = realization.halos_at_z(z)
-    halos = []
-    indexes = []
+    indexes = realization._plane_indexes(z)
 
     if max_range is not None:
-        for i, halo in enumerate(_halos):
-            dx, dy = halo.x - angular_coordinate_x, halo.y - angular_coordinate_y
-            dr = (dx ** 2 + dy ** 2) ** 0.5
-            if dr < max_range:
-                halos.append(halo)
-                indexes.append(_indexes[i])
-    else:
-        halos = _halos
-        indexes = _indexes
+        dx = realization.x[indexes] - angular_coordinate_x
+        dy = realization.y[indexes] - angular_coordinate_y
+        dr = (dx ** 2 + dy ** 2) ** 0.5
+        indexes = indexes[np.where(dr < max_range)[0]]
 
     centerx, centery = realization.rendering_center
 
-    return Realization.from_halos(halos, realization.lens_cosmo,
-                                  realization._prof_params,
-                                  mass_sheet_correction,
-                                  realization.rendering_classes,
-                                  centerx, centery), indexes
+    return Realization.from_columns(realization._column_slice(indexes), realization._halo_cache,
+                                    realization.lens_cosmo, realization._prof_params,
+                                    mass_sheet_correction,
+                                    realization.rendering_classes,
+                                    centerx, centery,
+                                    halo_id_allocator=realization.halo_id_allocator,
+                                    rng=realization.rng), indexes.tolist()
+
+def _mdef_to_codes(mdefs):
+    """
+    Converts a list of mass definitions to the integer codes used to store them in a Realization
+    :param mdefs: a list of mass definitions
+    :return: an array of integer codes
+    """
+    if len(mdefs) == 0:
+        return np.array([], dtype=int)
+    names, inverse = np.unique(np.array(mdefs, dtype=str), return_inverse=True)
+    for name in names:
+        if name not in _mdef_names:
+            raise ValueError('halo profile ' + str(name) + ' not recognized; must be one of ' + str(list(_mdef_names)))
+    codes = np.array([_mdef_names.index(name) for name in names], dtype=int)
+    return codes[inverse]
+
+def _shifted_halo(halo, x, y):
+    """
+    Returns a copy of a halo moved to the angular coordinates (x, y)
+    :param halo: an instance of Halo
+    :param x: new x coordinate in arcsec
+    :param y: new y coordinate in arcsec
+    :return: a copy of halo at the new position
+    """
+    new_halo = copy(halo)
+    new_halo.x = x
+    new_halo.y = y
+    # lenstronomy keywords contain the halo position, and must be recomputed
+    for attr in ['_kwargs_lenstronomy', '_lenstronomy_params', '_lenstronomy_args']:
+        if attr in new_halo.__dict__:
+            delattr(new_halo, attr)
+    return new_halo
+
+def _merge_halo_caches(realizations):
+    """
+    Combines the halo caches of several realizations
+    :param realizations: a list of instances of Realization; for halos present in more than one cache, the halo from
+    the last realization in the list is kept
+    :return: a dictionary of halo class instances indexed by their unique tag
+    """
+    halo_caches = []
+    for realization in realizations:
+        if not any([realization._halo_cache is cache for cache in halo_caches]):
+            halo_caches.append(realization._halo_cache)
+    if len(halo_caches) == 1:
+        return halo_caches[0]
+    halo_cache = {}
+    for cache in halo_caches:
+        halo_cache.update(cache)
+    return halo_cache
 
 class Realization(object):
 
@@ -60,7 +147,7 @@ class Realization(object):
     def __init__(self, masses, x, y, r3d, mdefs, z, subhalo_flag, lens_cosmo,
                  halos=None, kwargs_realization={}, mass_sheet_correction=True,
                  rendering_classes=None, rendering_center_x=None, rendering_center_y=None,
-                 geometry=None):
+                 geometry=None, rng=None):
 
         """
 
@@ -89,40 +176,42 @@ class Realization(object):
         :param rendering_center_y: same as rendering_center_x, but for the y angular coordinate
         :param geometry: (optional, only relevant is subtract_exact_mass_sheets=True is specified in kwargs_realization)
         an instance of Geometry (pyHalo.Cosmology.geometry) that defines the rendering volume
+        :param rng: a numpy Generator or a seed; defaults to pyHalo.random_numbers.random_state
         """
 
+        self.rng = random_generator(rng)
         self.apply_mass_sheet_correction = mass_sheet_correction
         self.geometry = geometry
         self.lens_cosmo = lens_cosmo
         self._zlens, self._zsource = self.lens_cosmo.z_lens, self.lens_cosmo.z_source
         self.astropy_instance = self.lens_cosmo.cosmo.astropy
-        self.halos = []
         self._loaded_models = {}
         self._has_been_shifted = False
         self._prof_params = set_default_kwargs(kwargs_realization, self._zsource)
+        self.halo_id_allocator = HaloIDAllocator()
 
         if halos is None:
 
-            for mi, xi, yi, r3di, mdefi, zi, sub_flag in zip(masses, x, y, r3d,
-                           mdefs, z, subhalo_flag):
-
-                unique_tag = np.random.rand()
-                model = self._load_halo_model(mi, xi, yi, r3di, mdefi, zi, sub_flag, self.lens_cosmo,
-                                              self._prof_params, unique_tag)
-                self.halos.append(model)
-
+            if masses is None:
+                masses, x, y, r3d, mdefs, z, subhalo_flag = [], [], [], [], [], [], []
+            # as with zip, only the first n entries are used if the input lists have different lengths
+            n = min([len(column) for column in [masses, x, y, r3d, mdefs, z, subhalo_flag]])
+            masses, x, y, r3d, mdefs, z, subhalo_flag = [column[0:n] for column in
+                                                        [masses, x, y, r3d, mdefs, z, subhalo_flag]]
+            unique_tags = self.halo_id_allocator.allocate(len(masses))
+            self._set_columns(masses, x, y, r3d, _mdef_to_codes(mdefs), z, subhalo_flag, unique_tags)
+            self._halo_cache = {}
+            self._reset()
 
         else:
 
-            self.halos = halos
-
-        self._reset()
+            self._set_halos(halos)
 
         self.set_rendering_classes(rendering_classes)
 
         if rendering_center_x is None or rendering_center_y is None:
             _z = np.linspace(0, self._zsource, 100)
-            d = [self.lens_cosmo.cosmo.D_C_transverse(zi) for zi in _z]
+            d = self.lens_cosmo.cosmo.D_C_transverse(_z)
             angle = np.zeros_like(d)
             rendering_center_x = interp1d(d, angle)
             rendering_center_y = interp1d(d, angle)
@@ -132,7 +221,8 @@ class Realization(object):
 
     @classmethod
     def from_halos(cls, halos, lens_cosmo, prof_params, msheet_correction, rendering_classes,
-                   rendering_center_x=None, rendering_center_y=None, geometry=None):
+                   rendering_center_x=None, rendering_center_y=None, geometry=None, halo_id_allocator=None,
+                   rng=None):
 
         """
 
@@ -147,19 +237,87 @@ class Realization(object):
         :param rendering_center_y: same as rendering_center_x, but for the y angular coordinate
         :param geometry: (optional, only relevant is subtract_exact_mass_sheets=True is specified in kwargs_realization)
         an instance of Geometry (pyHalo.Cosmology.geometry) that defines the rendering volume
+        :param halo_id_allocator: an instance of HaloIDAllocator; if specified, the new realization belongs to the same
+        lineage as the realizations that use it. Halos whose unique_tag is not an integer ID are assigned a new ID.
+        :param rng: a numpy Generator or a seed; defaults to pyHalo.random_numbers.random_state
         :return: an instance of Realization created directly from the halo class instances
         """
 
         realization = Realization(None, None, None, None, None, None, None, lens_cosmo,
-                                  halos=halos, kwargs_realization=prof_params,
+                                  kwargs_realization=prof_params,
+                                  mass_sheet_correction=msheet_correction,
+                                  rendering_classes=rendering_classes,
+                                  rendering_center_x=rendering_center_x,
+                                  rendering_center_y=rendering_center_y,
+                                  geometry=geometry,
+                                  rng=rng)
+        if halo_id_allocator is not None:
+            realization.halo_id_allocator = halo_id_allocator
+        realization._set_halos(halos)
+
+        return realization
+
+    @classmethod
+    def from_columns(cls, columns, halo_cache, lens_cosmo, prof_params, msheet_correction, rendering_classes,
+                     rendering_center_x=None, rendering_center_y=None, geometry=None, halo_id_allocator=None,
+                     rng=None):
+
+        """
+        Creates a realization directly from the arrays that store the halo properties, without creating any halo
+        class instances
+
+        :param columns: a tuple of arrays (masses, x, y, r3d, mdef_codes, z, subhalo_flags, unique_tags) as returned by
+        the _column_slice method
+        :param halo_cache: a dictionary of halo class instances indexed by their unique tag; halos that have already been
+        created by a parent realization are taken from here so that their (possibly random) properties are preserved
+        :param lens_cosmo: an instance of LensCosmo (see Halos.lens_cosmo)
+        :param prof_params: keyword arguments for the realization
+        :param msheet_correction: whether or not to apply a mass sheet correction
+        :param rendering_classes: a list of rendering classes
+        :param rendering_center_x: an instance of scipy.interp1d that returns an angular position given a comoving distance
+        :param rendering_center_y: same as rendering_center_x, but for the y angular coordinate
+        :param geometry: an instance of Geometry (pyHalo.Cosmology.geometry) that defines the rendering volume
+        :param halo_id_allocator: the instance of HaloIDAllocator of the lineage the halos belong to; if None, the
+        realization starts a new lineage
+        :param rng: a numpy Generator or a seed; defaults to pyHalo.random_numbers.random_state
+        :return: an instance of Realization
+        """
+
+        realization = Realization(None, None, None, None, None, None, None, lens_cosmo,
+                                  kwargs_realization=prof_params,
                                   mass_sheet_correction=msheet_correction,
                                   rendering_classes=rendering_classes,
                                   rendering_center_x=rendering_center_x,
                                   rendering_center_y=rendering_center_y,
-                                  geometry=geometry)
+                                  geometry=geometry,
+                                  rng=rng)
+        if halo_id_allocator is not None:
+            realization.halo_id_allocator = halo_id_allocator
+        realization._set_columns(*columns)
+        realization._halo_cache = halo_cache
+        realization._reset()
 
         return realization
 
+    @property
+    def halos(self):
+
+        """
+        Returns a list of halo class instances, one for each halo in the realization. The instances are created the
+        first time they are requested and are then stored, so repeated calls return the same list of objects.
+        """
+        if self._halos_list is None:
+            self._halos_list = [self._halo(i) for i in range(0, len(self.masses))]
+        return self._halos_list
+
+    @property
+    def mdefs(self):
+
+        """
+        Returns the mass definition of each halo in the realization
+        """
+        return [_mdef_names[code] for code in self._mdef_codes]
+
     @property
     def rendering_center(self):
 
@@ -212,81 +370,99 @@ class Realization(object):
 
         :return: A new instance of Realization with the cuts on position and mass applied
         """
-        halos = []
+        indexes = []
 
         if zmax is None:
             zmax = self._zsource
         if zmin is None:
             zmin = 0
 
-        for plane_index, zi in enumerate(self.unique_redshifts):
-
-            plane_halos, _ = self.halos_at_z(zi)
+        if aperture_units == 'ANGLES':
+            aperture_scale = 1.
+        elif aperture_units == 'MPC':
+            aperture_scale = self.lens_cosmo.cosmo.D_C_z(0.5)
+        else:
+            raise Exception('aperture units must be either MPC or ANGLES')
 
-            inds_at_z = np.where(self.redshifts == zi)[0]
-            x_at_z = self.x[inds_at_z]
-            y_at_z = self.y[inds_at_z]
-            masses_at_z = np.absolute(self.masses[inds_at_z])
+        for plane_index, zi in enumerate(self.unique_redshifts):
 
             if zi < zmin:
                 continue
             if zi > zmax:
                 continue
 
+            inds_at_z = self._z_sort[self._plane_offsets[plane_index]:self._plane_offsets[plane_index + 1]]
+            masses_at_z = np.absolute(self.masses[inds_at_z])
+
             comoving_distance_z = self.lens_cosmo.cosmo.D_C_z(zi)
 
             if zi <= self._zlens:
 
-                minimum_mass_everywhere = deepcopy(log_mass_allowed_global_front)
-                minimum_mass_in_window = deepcopy(log_mass_allowed_in_aperture_front)
-                aperture_radius_arcsec = deepcopy(aperture_radius_front)
+                minimum_mass_everywhere = log_mass_allowed_global_front
+                minimum_mass_in_window = log_mass_allowed_in_aperture_front
+                aperture_radius_arcsec = aperture_radius_front
 
             else:
 
-                minimum_mass_everywhere = deepcopy(log_mass_allowed_global_back)
-                minimum_mass_in_window = deepcopy(log_mass_allowed_in_aperture_back)
-                aperture_radius_arcsec = deepcopy(aperture_radius_back)
+                minimum_mass_everywhere = log_mass_allowed_global_back
+                minimum_mass_in_window = log_mass_allowed_in_aperture_back
+                aperture_radius_arcsec = aperture_radius_back
 
             keep_inds_mass = np.where(masses_at_z >= 10 ** minimum_mass_everywhere)[0]
             inds_m_low = np.where(masses_at_z < 10 ** minimum_mass_everywhere)[0]
-            keep_inds_dr = []
-
-            for idx in inds_m_low:
 
-                for k, (interp_x, interp_y) in enumerate(zip(interpolated_x_angle, interpolated_y_angle)):
+            in_aperture = self._in_aperture(inds_at_z[inds_m_low], comoving_distance_z,
+                                            aperture_radius_arcsec * aperture_scale, interpolated_x_angle,
+                                            interpolated_y_angle, aperture_units)
+            keep_inds = np.append(keep_inds_mass, inds_m_low[in_aperture]).astype(int)
 
-                    dx = x_at_z[idx] - interp_x(comoving_distance_z)
-                    dy = y_at_z[idx] - interp_y(comoving_distance_z)
+            tempmasses = masses_at_z[keep_inds]
 
-                    if aperture_units == 'ANGLES':
-                        dr_cut = aperture_radius_arcsec
+            keep_inds = keep_inds[np.where(tempmasses >= 10 ** minimum_mass_in_window)[0]]
 
-                    elif aperture_units == 'MPC':
-                        dx *= comoving_distance_z
-                        dy *= comoving_distance_z
-                        dr_cut = aperture_radius_arcsec * self.lens_cosmo.cosmo.D_C_z(0.5)
-                    else:
-                        raise Exception('aperture units must be either MPC or ANGLES')
+            indexes.append(inds_at_z[keep_inds])
 
-                    dr = np.sqrt(dx ** 2 + dy ** 2)
+        if len(indexes) > 0:
+            indexes = np.concatenate(indexes)
 
-                    if dr <= dr_cut:
-                        keep_inds_dr.append(idx)
-                        break
+        return Realization.from_columns(self._column_slice(indexes), self._halo_cache, self.lens_cosmo,
+                                        self._prof_params, self.apply_mass_sheet_correction, self.rendering_classes,
+                                        self._rendering_center_x, self._rendering_center_y, self.geometry,
+                                        self.halo_id_allocator, self.rng)
 
-            keep_inds = np.append(keep_inds_mass, np.array(keep_inds_dr)).astype(int)
+    def _in_aperture(self, indexes, comoving_distance_z, dr_cut, interpolated_x_angle, interpolated_y_angle,
+                     aperture_units):
 
-            tempmasses = np.absolute(masses_at_z[keep_inds])
+        """
+        Determines which halos lie inside a circular aperture around at least one light ray
 
-            keep_inds = keep_inds[np.where(tempmasses >= 10 ** minimum_mass_in_window)[0]]
+        :param indexes: the indexes of the halos to check; they must all be at the lens plane with comoving distance
+        comoving_distance_z
+        :param comoving_distance_z: the comoving distance to the lens plane
+        :param dr_cut: the aperture radius (in arcsec if aperture_units is 'ANGLES', otherwise arcsec * Mpc)
+        :param interpolated_x_angle: a list of scipy.interp1d that retuns the x angular position of a ray in
+        arcsec given a comoving distance
+        :param interpolated_y_angle: a list of scipy.interp1d that retuns the y angular position of a ray in
+        arcsec given a comoving distance
+        :param aperture_units: either 'ANGLES' or 'MPC'
+        :return: a boolean array that is True for halos inside the aperture around any ray
+        """
+        if len(indexes) == 0 or len(interpolated_x_angle) == 0:
+            return np.zeros(len(indexes), dtype=bool)
 
-            for halo_index in keep_inds:
-                halos.append(plane_halos[halo_index])
+        # each ray is evaluated once at this lens plane
+        ray_x = np.array([interp_x(comoving_distance_z) for interp_x in interpolated_x_angle])
+        ray_y = np.array([interp_y(comoving_distance_z) for interp_y in interpolated_y_angle])
 
+        # shape (number of rays, number of halos)
+        dx = self.x[indexes][np.newaxis, :] - ray_x[:, np.newaxis]
+        dy = self.y[indexes][np.newaxis, :] - ray_y[:, np.newaxis]
+        if aperture_units == 'MPC':
+            dx *= comoving_distance_z
+            dy *= comoving_distance_z
+        dr = np.sqrt(dx ** 2 + dy ** 2)
 
-        return Realization.from_halos(halos, self.lens_cosmo, self._prof_params,
-                                      self.apply_mass_sheet_correction, self.rendering_classes,
-                                      self._rendering_center_x, self._rendering_center_y, self.geometry)
+        return np.any(dr <= dr_cut, axis=0)
 
     def set_rendering_classes(self, rendering_classes):
 
@@ -320,24 +496,15 @@ class Realization(object):
         :return: a new realization that contains all unique halos from self and real
         """
 
-        halos = []
-
-        tags = self._tags(self.halos)
-        real_tags = self._tags(real.halos)
-        if len(tags) >= len(real_tags):
-            long, short = tags, real_tags
-            halos_long, halos_short = self.halos, real.halos
+        if len(self.masses) >= len(real.masses):
+            real_long, real_short = self, real
         else:
-            long, short = real_tags, tags
-            halos_long, halos_short = real.halos, self.halos
-
-        for halo in halos_short:
-            halos.append(halo)
-
-        for i, tag in enumerate(long):
+            real_long, real_short = real, self
 
-            if tag not in short:
-                halos.append(halos_long[i])
+        keep_long = np.logical_not(np.isin(real_long._halo_tags, real_short._halo_tags))
+        columns = [np.append(column_short, column_long[keep_long]) for (column_short, column_long) in
+                   zip(real_short._column_slice(), real_long._column_slice())]
+        halo_cache = _merge_halo_caches([real_long, real_short])
 
         if join_rendering_classes:
             rendering_class_self = self.rendering_classes
@@ -347,9 +514,46 @@ class Realization(object):
             rendering_classes = self.rendering_classes
 
         centerx, centery = self.rendering_center
-        return Realization.from_halos(halos, self.lens_cosmo, self._prof_params,
-                                      self.apply_mass_sheet_correction, rendering_classes,
-                                      centerx, centery, self.geometry)
+        return Realization.from_columns(columns, halo_cache, self.lens_cosmo, self._prof_params,
+                                        self.apply_mass_sheet_correction, rendering_classes,
+                                        centerx, centery, self.geometry, self.halo_id_allocator, self.rng)
+
+    @classmethod
+    def concatenate(cls, realizations, join_rendering_classes=False):
+
+        """
+        Combines any number of realizations in a single step, keeping only the unique halos (as identified by their
+        unique tags) between them. If the same halo appears in more than one realization, the first occurence is kept.
+
+        :param realizations: a list of instances of Realization
+        :param join_rendering_classes: If True, the rendering classes associated with the new realization will include
+        the rendering classes of every realization in the list; otherwise only those of the first realization
+        :return: a new realization that contains all unique halos from the realizations in the list; the other
+        properties (lens_cosmo, keyword arguments, rendering center, geometry) are taken from the first realization
+        """
+
+        if len(realizations) == 0:
+            raise Exception('must specify at least one realization to concatenate')
+
+        first = realizations[0]
+        columns = [np.concatenate(column) for column in
+                   zip(*[realization._column_slice() for realization in realizations])]
+        _, keep = np.unique(columns[-1], return_index=True)
+        keep = np.sort(keep)
+        columns = [column[keep] for column in columns]
+        halo_cache = _merge_halo_caches(realizations[::-1])
+
+        if join_rendering_classes:
+            rendering_classes = []
+            for realization in realizations:
+                rendering_classes += realization.rendering_classes
+        else:
+            rendering_classes = first.rendering_classes
+
+        centerx, centery = first.rendering_center
+        return Realization.from_columns(columns, halo_cache, first.lens_cosmo, first._prof_params,
+                                        first.apply_mass_sheet_correction, rendering_classes,
+                                        centerx, centery, first.geometry, first.halo_id_allocator, first.rng)
 
     def shift_background_to_source(self, ray_interp_x, ray_interp_y):
 
@@ -367,24 +571,28 @@ class Realization(object):
         if self._has_been_shifted:
             return self
 
-        halos = []
-
-        for halo in self.halos:
-
-            if halo.fixed_position:
-                halos.append(halo)
-                continue
-
-            comoving_distance_z = self.lens_cosmo.cosmo.D_C_z(halo.z)
-
-            xshift, yshift = ray_interp_x(comoving_distance_z), ray_interp_y(comoving_distance_z)
-
-            halo.x += xshift
-            halo.y += yshift
-            halos.append(halo)
-
-        new_realization = Realization.from_halos(halos, self.lens_cosmo, self._prof_params, self.apply_mass_sheet_correction,
-                                                 self.rendering_classes, ray_interp_x, ray_interp_y, self.geometry)
+        comoving_distance_z = self.lens_cosmo.cosmo.D_C_z(self.redshifts)
+        xshift, yshift = ray_interp_x(comoving_distance_z), ray_interp_y(comoving_distance_z)
+        fixed_position = np.isin(self._mdef_codes, _mdef_to_codes(_fixed_position_mdefs))
+        xshift[fixed_position] = 0.
+        yshift[fixed_position] = 0.
+
+        (masses, x, y, r3d, mdef_codes, z, subhalo_flags, unique_tags) = self._column_slice()
+        x = x + xshift
+        y = y + yshift
+
+        # halos that were already created by this realization are moved to the new positions, and the moved copies
+        # are stored in a new cache so that the halos in the original realization are not modified
+        halo_cache = {}
+        for i, tag in enumerate(unique_tags):
+            if tag in self._halo_cache:
+                halo_cache[tag] = _shifted_halo(self._halo_cache[tag], x[i], y[i])
+
+        new_realization = Realization.from_columns((masses, x, y, r3d, mdef_codes, z, subhalo_flags, unique_tags),
+                                                   halo_cache, self.lens_cosmo, self._prof_params,
+                                                   self.apply_mass_sheet_correction,
+                                                   self.rendering_classes, ray_interp_x, ray_interp_y, self.geometry,
+                                                   self.halo_id_allocator, self.rng)
 
         new_realization._has_been_shifted = True
 
@@ -408,7 +616,22 @@ class Realization(object):
         redshift_array = []
         numerical_interp = None
 
-        for i, halo in enumerate(self.halos):
+        halos = self.halos
+        kwargs_table = self.lenstronomy_kwargs_table(halos)
+        kwargs_batched = {}
+        for lens_model_name, table in kwargs_table.items():
+            keys = [key for key in table.keys() if key not in ['index', 'z']]
+            for j, index in enumerate(table['index']):
+                kwargs_batched[index] = (lens_model_name, {key: table[key][j] for key in keys})
+
+        for i, halo in enumerate(halos):
+
+            if i in kwargs_batched:
+                lens_model_name, kwargs_halo = kwargs_batched[i]
+                lens_model_list.append(lens_model_name)
+                kwargs_lens.append(kwargs_halo)
+                redshift_array.append(halo.z)
+                continue
 
             lens_model_name = halo.lenstronomy_ID
             kwargs_halo, interp_class = halo.lenstronomy_params
@@ -434,6 +657,128 @@ class Realization(object):
 
         return lens_model_list, redshift_array, kwargs_lens, numerical_interp
 
+    def lenstronomy_kwargs_table(self, halos=None):
+
+        """
+        Computes the lenstronomy keyword arguments of all NFW and TNFW halos in the realization with array operations,
+        rather than halo by halo. The values are the same as those returned by the lenstronomy_params property of each
+        halo.
+
+        :param halos: the list of halo class instances in the realization (optional, these are created if not specified)
+        :return: a dictionary with keys 'NFW' and 'TNFW' (only for mass definitions present in the realization); each
+        entry is a dictionary of arrays with the lenstronomy keyword arguments (alpha_Rs, Rs, center_x, center_y, and
+        r_trunc for TNFW), the halo redshift 'z', and the index of each halo in the realization 'index'
+        """
+
+        if halos is None:
+            halos = self.halos
+        kwargs_table = {}
+        self._compute_concentrations(halos)
+        self._compute_truncation_radii(halos)
+
+        for mdef in _batched_halo_classes.keys():
+
+            indexes = self._batched_halo_indexes(halos, [mdef])
+            if len(indexes) == 0:
+                continue
+
+            m, z = self.masses[indexes], self.redshifts[indexes]
+            profile_args = [halos[i].profile_args for i in indexes]
+            rescale_norm = np.array([halos[i]._rescale_norm for i in indexes])
+
+            if mdef == 'TNFW':
+                concentration = np.array([args[0] for args in profile_args])
+            else:
+                concentration = np.array(profile_args)
+
+            Rs_angle, theta_Rs = self.lens_cosmo.nfw_physical2angle(m, concentration, z)
+            Rs_angle = np.round(Rs_angle, 10)
+            theta_Rs = np.round(theta_Rs, 10)
+
+            table = {'alpha_Rs': rescale_norm * theta_Rs, 'Rs': Rs_angle,
+                     'center_x': np.round(self.x[indexes], 4), 'center_y': np.round(self.y[indexes], 4)}
+            if mdef == 'TNFW':
+                rt = np.array([args[1] for args in profile_args])
+                table['r_trunc'] = rt / self.lens_cosmo.cosmo.kpc_proper_per_asec(z)
+            table['z'] = z
+            table['index'] = indexes
+
+            kwargs_table[mdef] = table
+
+        return kwargs_table
+
+    @property
+    def concentrations(self):
+
+        """
+        Returns the concentration of each NFW and TNFW halo in the realization (nan for other halos). Concentrations
+        that have not yet been computed are evaluated for all halos at once (see _compute_concentrations).
+        """
+        halos = self.halos
+        self._compute_concentrations(halos)
+        concentrations = np.full(len(halos), np.nan)
+        for i in self._batched_halo_indexes(halos):
+            concentrations[i] = halos[i].c
+        return concentrations
+
+    def _batched_halo_indexes(self, halos, mdefs=None):
+
+        """
+        :param halos: the list of halo class instances in the realization
+        :param mdefs: a list of mass definitions (keys of _batched_halo_classes), defaults to all of them
+        :return: the indexes of halos whose properties can be computed for many halos at once
+        """
+        if mdefs is None:
+            mdefs = list(_batched_halo_classes.keys())
+        indexes = []
+        for mdef in mdefs:
+            for i in np.where(self._mdef_codes == _mdef_names.index(mdef))[0]:
+                if type(halos[i]) in _batched_halo_classes[mdef]:
+                    indexes.append(i)
+        return np.sort(np.array(indexes, dtype=int))
+
+    def _compute_concentrations(self, halos):
+
+        """
+        Computes the concentrations of all NFW and TNFW halos that do not have one yet with one call to
+        LensCosmo.NFW_concentration for each set of halo keyword arguments, and stores them in each halo
+        :param halos: the list of halo class instances in the realization
+        """
+        groups = {}
+        for i in self._batched_halo_indexes(halos):
+            if not hasattr(halos[i], '_c'):
+                groups.setdefault(id(halos[i]._args), []).append(halos[i])
+
+        for group in groups.values():
+            args = group[0]._args
+            m = np.array([halo.mass for halo in group])
+            z_eval = np.array([halo.z_eval for halo in group])
+            c = self.lens_cosmo.NFW_concentration(m, z_eval, args['mc_model'], args['mc_mdef'], args['log_mc'],
+                                                  args['c_scatter'], args['c_scatter_dex'],
+                                                  args['kwargs_suppression'], args['suppression_model'],
+                                                  rng=self.rng)
+            for halo, ci in zip(group, c):
+                halo._c = ci
+
+    def _compute_truncation_radii(self, halos):
+
+        """
+        Computes the truncation radii of all TNFW field halos that have not yet been evaluated with one call to
+        LensCosmo.LOS_truncation_rN for each set of halo keyword arguments, and stores them in each halo
+        :param halos: the list of halo class instances in the realization
+        """
+        groups = {}
+        for i in self._batched_halo_indexes(halos, ['TNFW']):
+            if type(halos[i]) is TNFWFieldHalo and not hasattr(halos[i], '_profile_args'):
+                groups.setdefault(id(halos[i]._args), []).append(halos[i])
+
+        for group in groups.values():
+            m = np.array([halo.mass for halo in group])
+            z = np.array([halo.z for halo in group])
+            truncation_radius = self.lens_cosmo.LOS_truncation_rN(m, z, group[0]._args['LOS_truncation_factor'])
+            for halo, rt in zip(group, truncation_radius):
+                halo._profile_args = (halo.c, rt)
+
     def split_at_z(self, z):
         """
         Splits the realization at redshift z, returning one instance at Realization containing all halos with
@@ -444,20 +789,18 @@ class Realization(object):
         :return: two instances at Realization divided at redshift z
         """
 
-        halos_1, halos_2 = [], []
-        for halo in self.halos:
-            if halo.z <= z:
-                halos_1.append(halo)
-            else:
-                halos_2.append(halo)
+        inds_1 = np.where(self.redshifts <= z)[0]
+        inds_2 = np.where(self.redshifts > z)[0]
 
         centerx, centery = self.rendering_center
-        realization_1 = Realization.from_halos(halos_1, self.lens_cosmo,
-                                               self._prof_params, self.apply_mass_sheet_correction, self.rendering_classes,
-                                               centerx, centery, self.geometry)
-        realization_2 = Realization.from_halos(halos_2, self.lens_cosmo,
-                                               self._prof_params, self.apply_mass_sheet_correction, self.rendering_classes,
-                                               centerx, centery, self.geometry)
+        realization_1 = Realization.from_columns(self._column_slice(inds_1), self._halo_cache, self.lens_cosmo,
+                                                 self._prof_params, self.apply_mass_sheet_correction,
+                                                 self.rendering_classes, centerx, centery, self.geometry,
+                                                 self.halo_id_allocator, self.rng)
+        realization_2 = Realization.from_columns(self._column_slice(inds_2), self._halo_cache, self.lens_cosmo,
+                                                 self._prof_params, self.apply_mass_sheet_correction,
+                                                 self.rendering_classes, centerx, centery, self.geometry,
+                                                 self.halo_id_allocator, self.rng)
 
         return realization_1, realization_2
 
@@ -467,18 +810,10 @@ class Realization(object):
         :param halos: a list of halos
         :return: the comoving (x, y) position, mass, and redshift of each halo in the realization
         """
-        xcoords, ycoords, masses, redshifts = [], [], [], []
+        D = self.lens_cosmo.cosmo.D_C_z(self.redshifts)
+        xcoords, ycoords = D * self.x, D * self.y
 
-        for halo in self.halos:
-            D = self.lens_cosmo.cosmo.D_C_z(halo.z)
-            x_arcsec, y_arcsec = halo.x, halo.y
-            x_comoving, y_comoving = D * x_arcsec, D * y_arcsec
-            xcoords.append(x_comoving)
-            ycoords.append(y_comoving)
-            masses.append(halo.mass)
-            redshifts.append(halo.z)
-
-        return np.array(xcoords), np.array(ycoords), np.log10(masses), np.array(redshifts)
+        return np.array(xcoords), np.array(ycoords), np.log10(self.masses), np.array(self.redshifts)
 
     def halos_at_z(self, z):
         """
@@ -486,13 +821,8 @@ class Realization(object):
         :param z: redshift
         :return: all halos in the realization that are at redshift z
         """
-        halos = []
-        index = []
-        for i, halo in enumerate(self.halos):
-            if halo.z != z:
-                continue
-            halos.append(halo)
-            index.append(i)
+        index = self._plane_indexes(z).tolist()
+        halos = [self._halo(i) for i in index]
 
         return halos, index
 
@@ -504,8 +834,10 @@ class Realization(object):
         :return: total mass rendered at z
         """
 
-        inds = np.where(self.redshifts == z)
-        m_exact = np.sum(self.masses[inds])
+        plane_index = self._plane_index(z)
+        if plane_index is None:
+            return 0.
+        m_exact = self._plane_masses[plane_index]
         return m_exact
 
     def number_of_halos_before_redshift(self, z):
@@ -515,10 +847,7 @@ class Realization(object):
         :param z: redshift
         :return: number of halos with redshift < z
         """
-        n = 0
-        for halo in self.halos:
-            if halo.z < z:
-                n += 1
+        n = int(np.searchsorted(self._sorted_redshifts, z, side='left'))
         return n
 
     def number_of_halos_after_redshift(self, z):
@@ -528,10 +857,7 @@ class Realization(object):
         :param z: redshift
         :return: number of halos with redshift > z
         """
-        n = 0
-        for halo in self.halos:
-            if halo.z > z:
-                n += 1
+        n = len(self._sorted_redshifts) - int(np.searchsorted(self._sorted_redshifts, z, side='right'))
         return n
 
     def number_of_halos_at_redshift(self, z):
@@ -542,10 +868,7 @@ class Realization(object):
         :return: number of halos at z
         """
 
-        n = 0
-        for halo in self.halos:
-            if halo.z == z:
-                n += 1
+        n = len(self._plane_indexes(z))
         return n
 
     def _mass_sheet_correction(self, rendering_classes, z_mass_sheet_max, kwargs_mass_sheet_correction):
@@ -569,9 +892,11 @@ class Realization(object):
 
         if self._prof_params['subtract_exact_mass_sheets']:
 
-            for zi in self.unique_redshifts:
-                area = self.geometry.angle_to_physical_area(0.5 * self.geometry.cone_opening_angle, zi)
-                kwargs_mass_sheets += [{'kappa_ext': -self.mass_at_z_exact(zi) / self.lens_cosmo.sigma_crit_mass(zi, area)}]
+            z_planes = np.array(self.unique_redshifts, dtype=float)
+            area = self.geometry.angle_to_physical_area(0.5 * self.geometry.cone_opening_angle, z_planes)
+            sigma_crit_mass = self.lens_cosmo.sigma_crit_mass(z_planes, area)
+            for mass_at_z, sigma_crit_mass_at_z in zip(self._plane_masses, sigma_crit_mass):
+                kwargs_mass_sheets += [{'kappa_ext': -mass_at_z / sigma_crit_mass_at_z}]
 
             redshifts = self.unique_redshifts
 
@@ -698,7 +1023,7 @@ class Realization(object):
         halo in the realization
         """
         if halos is None:
-            halos = self.halos
+            return list(self._halo_tags)
         tags = []
 
         for halo in halos:
@@ -707,38 +1032,123 @@ class Realization(object):
 
         return tags
 
+    def _halo(self, index):
+
+        """
+        Returns the halo class instance for the halo stored at position index, creating it from the stored arrays
+        if it does not yet exist
+        :param index: the index of the halo in the realization
+        :return: an instance of Halo
+        """
+        tag = self._halo_tags[index]
+        if tag not in self._halo_cache:
+            r3d = self.r3d[index]
+            if np.isnan(r3d):
+                r3d = None
+            self._halo_cache[tag] = self._load_halo_model(self.masses[index], self.x[index], self.y[index], r3d,
+                                                          _mdef_names[self._mdef_codes[index]], self.redshifts[index],
+                                                          bool(self.subhalo_flags[index]), self.lens_cosmo,
+                                                          self._prof_params, tag)
+            self._halo_cache[tag].rng = self.rng
+        return self._halo_cache[tag]
+
+    def _set_columns(self, masses, x, y, r3d, mdef_codes, z, subhalo_flags, unique_tags):
+
+        """
+        Sets the arrays that store the properties of each halo in the realization
+        """
+        self.masses = np.array(masses, dtype=float)
+        self.x = np.array(x, dtype=float)
+        self.y = np.array(y, dtype=float)
+        # halos without a three dimensional position (r3d = None) are stored as nan
+        self.r3d = np.array(r3d, dtype=float)
+        self._mdef_codes = np.array(mdef_codes, dtype=int)
+        self.redshifts = np.array(z, dtype=float)
+        self.subhalo_flags = np.array(subhalo_flags, dtype=bool)
+        self._halo_tags = np.array(unique_tags, dtype=np.int64)
+
+    def _column_slice(self, indexes=None):
+
+        """
+        :param indexes: the indexes of halos to keep; if None, all halos are kept
+        :return: the arrays that store the properties of each halo in the realization, evaluated at indexes
+        """
+        columns = (self.masses, self.x, self.y, self.r3d, self._mdef_codes, self.redshifts,
+                   self.subhalo_flags, self._halo_tags)
+        if indexes is None:
+            return columns
+        indexes = np.array(indexes, dtype=int)
+        return tuple([column[indexes] for column in columns])
+
+    def _set_halos(self, halos):
+
+        """
+        Sets the arrays that store the properties of each halo from a list of halo class instances. Halos whose
+        unique_tag is not an integer ID (e.g. halos created directly by the user) are replaced by a shallow copy with a
+        new ID from self.halo_id_allocator, so the halos passed in are not modified.
+        :param halos: a list of halo class instances
+        """
+        masses, x, y, r3d, mdefs, z, subhalo_flags, unique_tags = [], [], [], [], [], [], [], []
+        for halo in halos:
+            masses.append(halo.mass)
+            x.append(halo.x)
+            y.append(halo.y)
+            r3d.append(halo.r3d)
+            mdefs.append(halo.mdef)
+            z.append(halo.z)
+            subhalo_flags.append(halo.is_subhalo)
+            unique_tags.append(halo.unique_tag)
+
+        halos = list(halos)
+        no_id = [i for i, tag in enumerate(unique_tags) if not isinstance(tag, (int, np.integer))]
+        for i, new_id in zip(no_id, self.halo_id_allocator.allocate(len(no_id))):
+            halos[i] = copy(halos[i])
+            halos[i].unique_tag = new_id
+            unique_tags[i] = new_id
+
+        self._set_columns(masses, x, y, r3d, _mdef_to_codes(mdefs), z, subhalo_flags, unique_tags)
+        self._halo_cache = {halo.unique_tag: halo for halo in halos}
+        self._reset()
+
     def _reset(self):
         """
         Resets all class attributes to the current set of halos contained in the realization
         :return:
         """
 
-        self.x = []
-        self.y = []
-        self.masses = []
-        self.redshifts = []
-        self.r3d = []
-        self.mdefs = []
-        self._halo_tags = []
-        self.subhalo_flags = []
-
-        for halo in self.halos:
-            self.masses.append(halo.mass)
-            self.x.append(halo.x)
-            self.y.append(halo.y)
-            self.redshifts.append(halo.z)
-            self.r3d.append(halo.r3d)
-            self.mdefs.append(halo.mdef)
-            self._halo_tags.append(halo.unique_tag)
-            self.subhalo_flags.append(halo.is_subhalo)
-
-        self.masses = np.array(self.masses)
-        self.x = np.array(self.x)
-        self.y = np.array(self.y)
-        self.r3d = np.array(self.r3d)
-        self.redshifts = np.array(self.redshifts)
-
-        self.unique_redshifts = np.sort(np.unique(self.redshifts))
+        # halos are indexed by lens plane through a stable sort by redshift, so the halos at the i-th plane in
+        # unique_redshifts are self._z_sort[self._plane_offsets[i]:self._plane_offsets[i+1]] in their original order
+        self._z_sort = np.argsort(self.redshifts, kind='stable')
+        self._sorted_redshifts = self.redshifts[self._z_sort]
+        self.unique_redshifts, plane_starts = np.unique(self._sorted_redshifts, return_index=True)
+        self._plane_offsets = np.append(plane_starts, len(self._sorted_redshifts))
+        if len(plane_starts) > 0:
+            self._plane_masses = np.add.reduceat(self.masses[self._z_sort], plane_starts)
+        else:
+            self._plane_masses = np.array([])
+        self._halos_list = None
+
+    def _plane_index(self, z):
+
+        """
+        :param z: redshift
+        :return: the index of the lens plane at redshift z in unique_redshifts, or None if there are no halos at z
+        """
+        plane_index = int(np.searchsorted(self.unique_redshifts, z))
+        if plane_index < len(self.unique_redshifts) and self.unique_redshifts[plane_index] == z:
+            return plane_index
+        return None
+
+    def _plane_indexes(self, z):
+
+        """
+        :param z: redshift
+        :return: the indexes of all halos at redshift z
+        """
+        plane_index = self._plane_index(z)
+        if plane_index is None:
+            return np.array([], dtype=int)
+        return self._z_sort[self._plane_offsets[plane_index]:self._plane_offsets[plane_index + 1]]
 
     def __eq__(self, other_reealization):
 
@@ -747,13 +1157,7 @@ class Realization(object):
         :param other_reealization:
         :return:
         """
-        tags = self._tags(self.halos)
-        other_tags = other_reealization._tags()
-        for tag in other_tags:
-            if tag not in tags:
-                return False
-        else:
-            return True
+        return bool(np.all(np.isin(other_reealization._halo_tags, self._halo_tags)))
 
 class SingleHalo(Realization):
 
@@ -777,7 +1181,7 @@ class SingleHalo(Realization):
         :param cosmo: an instance of Cosmology(); if none is provided a default cosmology will be used
         """
         if cosmo is None:
-            cosmo = Cosmology()
+            cosmo = cosmology_instance()
 
         lens_cosmo = LensCosmo(zlens, zsource, cosmo)
 
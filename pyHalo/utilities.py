@@ -1,12 +1,13 @@
 import numpy as np
 from pyHalo.defaults import lenscone_default
 from scipy.interpolate import interp1d
-from pyHalo.Cosmology.cosmology import Cosmology
+from pyHalo.instance_cache import cosmology_instance
 from scipy.integrate import quad
 from pyHalo.Halos.lens_cosmo import LensCosmo
 from scipy.special import jv
 from scipy.integrate import simps
 from multiprocessing.pool import Pool
+from pyHalo.random_numbers import random_state
 
 
 def interpolate_ray_paths(x_coordinates, y_coordinates, lens_model, kwargs_lens, zsource,
@@ -36,7 +37,7 @@ def interpolate_ray_paths(x_coordinates, y_coordinates, lens_model, kwargs_lens,
     angle_y = []
 
     if cosmo is None:
-        cosmo = Cosmology()
+        cosmo = cosmology_instance()
 
     for i, (xpos, ypos) in enumerate(zip(x_coordinates, y_coordinates)):
 
@@ -97,7 +98,7 @@ def compute_comoving_ray_path(x_coordinate, y_coordinate, lens_model, kwargs_len
         """
 
         if cosmo is None:
-            cosmo = Cosmology()
+            cosmo = cosmology_instance()
 
         redshift_list = lens_model.redshift_list + [zsource]
         zstep = lenscone_default.default_z_step
@@ -134,7 +135,7 @@ def compute_comoving_ray_path(x_coordinate, y_coordinate, lens_model, kwargs_len
 
         return np.array(x_list), np.array(y_list), np.array(distances)
 
-def sample_density(probability_density, Nsamples, pixel_scale, x_0, y_0, Rmax, smoothing_scale=4):
+def sample_density(probability_density, Nsamples, pixel_scale, x_0, y_0, Rmax, smoothing_scale=4, rng=None):
     """
 
     :param probability_density:
@@ -144,8 +145,10 @@ def sample_density(probability_density, Nsamples, pixel_scale, x_0, y_0, Rmax, s
     :param y_0:
     :param Rmax:
     :param smoothing_scale:
+    :param rng: a numpy Generator; defaults to pyHalo.random_numbers.random_state
     :return:
     """
+    rng = random_state(rng)
 
     probnorm = probability_density / probability_density.sum()
 
@@ -161,7 +164,7 @@ def sample_density(probability_density, Nsamples, pixel_scale, x_0, y_0, Rmax, s
     while ndraw > 0:
         ndraw = Nsamples - len(x_out)
 
-        inds = np.random.choice(values, p=p, size=ndraw, replace=True)
+        inds = rng.choice(values, p=p, size=ndraw, replace=True)
 
         pairs = np.indices(dimensions=(s, s)).T
 
@@ -175,8 +178,8 @@ def sample_density(probability_density, Nsamples, pixel_scale, x_0, y_0, Rmax, s
         # smooth on sub-pixel scale
         pixel_smoothing_kernel = pixel_scale / smoothing_scale
         # apply smoothing to remove artificial tiling
-        x_sample_arcsec += np.random.normal(0, pixel_smoothing_kernel, ndraw)
-        y_sample_arcsec += np.random.normal(0, pixel_smoothing_kernel, ndraw)
+        x_sample_arcsec += rng.normal(0, pixel_smoothing_kernel, ndraw)
+        y_sample_arcsec += rng.normal(0, pixel_smoothing_kernel, ndraw)
 
         # keep circular symmetry
         r = np.sqrt(x_sample_arcsec ** 2 + y_sample_arcsec ** 2)
@@ -187,7 +190,7 @@ def sample_density(probability_density, Nsamples, pixel_scale, x_0, y_0, Rmax, s
     # originally this returned coord_x and coord_y, shouldn't it return x_out and y_out?
     return x_out, y_out
 
-def sample_circle(max_rendering_range, Nsmooth, center_x, center_y):
+def sample_circle(max_rendering_range, Nsmooth, center_x, center_y, rng=None):
     """
     This function distributes points smoothly accross a plane.
 
@@ -197,6 +200,7 @@ def sample_circle(max_rendering_range, Nsmooth, center_x, center_y):
     Nsmooth : number of points to render
     center_x : center x coordinate of image
     center_y : center y coordinate of image
+    rng : a numpy Generator; defaults to pyHalo.random_numbers.random_state
 
 
     Returns
@@ -206,15 +210,16 @@ def sample_circle(max_rendering_range, Nsmooth, center_x, center_y):
 
 
     """
+    rng = random_state(rng)
     # SAMPLE UNIFORM POINTS IN A CIRCLE
-    radii = np.random.uniform(0, max_rendering_range ** 2, Nsmooth)
+    radii = rng.uniform(0, max_rendering_range ** 2, Nsmooth)
     # note you have to sample out to r^2 and then take sqrt
-    angles = np.random.uniform(0, 2 * np.pi, Nsmooth)
+    angles = rng.uniform(0, 2 * np.pi, Nsmooth)
     coord_x_smooth = radii ** 0.5 * np.cos(angles) + center_x
     coord_y_smooth = radii ** 0.5 * np.sin(angles) + center_y
     return coord_x_smooth, coord_y_smooth
 
-def sample_clustered(lens_model, kwargs_lens, center_x, center_y, n_samples, max_rendering_range, npix):
+def sample_clustered(lens_model, kwargs_lens, center_x, center_y, n_samples, max_rendering_range, npix, rng=None):
     """
     This function distributes points to cluster in areas of higher mass.
 
@@ -227,6 +232,7 @@ def sample_clustered(lens_model, kwargs_lens, center_x, center_y, n_samples, max
     Nclumpy : number of points to render
     max_rendering_range : radius of rendering area (already scaled) (arcsec)
     npix : number of pixels on one axis
+    rng : a numpy Generator; defaults to pyHalo.random_numbers.random_state
 
 
     Returns
@@ -244,7 +250,7 @@ def sample_clustered(lens_model, kwargs_lens, center_x, center_y, n_samples, max
     xcoords, ycoords = xx_base + center_x, yy_base + center_y
     projected_mass = lens_model.kappa(xcoords.ravel() + center_x, ycoords.ravel() + center_y, kwargs_lens).reshape(shape0)
     coord_x, coord_y = sample_density(projected_mass, n_samples, pixel_scale,
-                                                     center_x, center_y, max_rendering_range)
+                                                     center_x, center_y, max_rendering_range, rng=rng)
     return coord_x, coord_y
 
 def de_broglie_wavelength(log10_m_uldm,v):
@@ -0,0 +1,22 @@
+import os
+import pytest
+from pyHalo.defaults import cache_default
+
+@pytest.fixture(scope='session', autouse=True)
+def cache_directory(tmp_path_factory):
+
+    """
+    Stores the lookup tables computed while running the tests in a temporary directory, rather than in the user's
+    cache directory
+    """
+    directory = str(tmp_path_factory.mktemp('pyHalo_cache'))
+    environ_directory = os.environ.get('PYHALO_CACHE_DIR')
+    default_directory = cache_default.directory
+    os.environ['PYHALO_CACHE_DIR'] = directory
+    cache_default.directory = directory
+    yield directory
+    cache_default.directory = default_directory
+    if environ_directory is None:
+        del os.environ['PYHALO_CACHE_DIR']
+    else:
+        os.environ['PYHALO_CACHE_DIR'] = environ_directory
@@ -0,0 +1,62 @@
+import numpy as np
+import numpy.testing as npt
+import pytest
+import os
+import tempfile
+from scipy.interpolate import interp1d
+from pyHalo.Rendering.SpatialDistributions.compute_nfw_fast import LookupProjected, _stack_inverse_cdfs, \
+    _evaluate_inverse_cdfs, load_lookup_table
+from pyHalo.defaults import cache_default
+from pyHalo.Rendering.SpatialDistributions.nfw_core import local_path
+
+
+class TestComputeNFWFast(object):
+
+    def setup(self):
+
+        self.lookup = LookupProjected(local_path)
+        self.domains = np.loadtxt(local_path + 'domains_2D.txt')
+        self.cdfs = np.loadtxt(local_path + 'cdfs_2D.txt')
+
+    def test_inverse_cdfs(self):
+
+        table = _stack_inverse_cdfs(self.cdfs, self.domains)
+        u = np.random.rand(500)
+        rows = np.random.randint(0, self.cdfs.shape[0], 500)
+        x = _evaluate_inverse_cdfs(u, rows, *table)
+        for i in range(0, 500):
+            x_true = interp1d(self.cdfs[rows[i]], self.domains[rows[i]])(u[i])
+            npt.assert_almost_equal(x[i], x_true, 8)
+
+    def test_sample_projected(self):
+
+        c = 8.
+        x2d = self.lookup.sample(c, 20000)
+        npt.assert_equal(len(x2d), 20000)
+        npt.assert_array_less(x2d, c + 1e-9)
+        npt.assert_array_less(0., x2d)
+
+        idx = np.argmin(np.absolute(c - np.loadtxt(local_path + 'c_values_2D.txt')))
+        cdf_true = interp1d(self.domains[idx], self.cdfs[idx])
+        for x in [0.5, 1., 2., 4.]:
+            npt.assert_almost_equal(np.sum(x2d < x) / len(x2d), cdf_true(x), 2)
+
+        x2d = self.lookup(c)
+        npt.assert_equal(x2d < c, True)
+
+    def test_load_lookup_table(self):
+
+        cache_directory = cache_default.directory
+        cache_default.directory = tempfile.mkdtemp()
+        try:
+            cdfs = load_lookup_table(local_path, 'cdfs_2D')
+            npt.assert_equal(isinstance(cdfs, np.memmap), True)
+            npt.assert_almost_equal(cdfs, self.cdfs)
+            npt.assert_equal(len(os.listdir(os.path.join(cache_default.directory, 'nfw_tables'))), 1)
+            cdfs = load_lookup_table(local_path, 'cdfs_2D')
+            npt.assert_almost_equal(cdfs, self.cdfs)
+        finally:
+            cache_default.directory = cache_directory
+
+if __name__ == '__main__':
+    pytest.main()
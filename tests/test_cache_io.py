@@ -0,0 +1,65 @@
+import pytest
+import os
+import tempfile
+from threading import Thread
+import numpy as np
+import numpy.testing as npt
+from pyHalo.cache_io import load_table, save_table, cached_table
+
+class TestCacheIO(object):
+
+    def setup(self):
+
+        self.cache_directory = tempfile.mkdtemp()
+        self.fname = os.path.join(self.cache_directory, 'tables', 'table.npy')
+        self.table = np.arange(12.).reshape(3, 4)
+
+    def test_save_load(self):
+
+        npt.assert_equal(load_table(self.fname), None)
+        npt.assert_equal(save_table(self.fname, self.table), True)
+        table = load_table(self.fname)
+        npt.assert_equal(isinstance(table, np.memmap), True)
+        npt.assert_almost_equal(table, self.table)
+        npt.assert_equal(load_table(self.fname, valid=lambda t: t.shape == (4, 3)), None)
+        npt.assert_equal(os.listdir(os.path.dirname(self.fname)), ['table.npy'])
+
+        with open(self.fname, 'w') as f:
+            f.write('not a table')
+        npt.assert_equal(load_table(self.fname), None)
+
+    def test_save_threads(self):
+
+        tables = [self.table + i for i in range(0, 8)]
+        threads = [Thread(target=save_table, args=(self.fname, table)) for table in tables]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        npt.assert_equal(os.listdir(os.path.dirname(self.fname)), ['table.npy'])
+        table = load_table(self.fname)
+        npt.assert_equal(any([np.array_equal(table, t) for t in tables]), True)
+
+    def test_cached_table(self):
+
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return self.table
+
+        table = cached_table(self.fname, compute)
+        npt.assert_almost_equal(table, self.table)
+        table = cached_table(self.fname, compute)
+        npt.assert_equal(isinstance(table, np.memmap), True)
+        npt.assert_equal(len(calls), 1)
+
+        # a table that fails the check is computed again
+        table = cached_table(self.fname, compute, valid=lambda t: t.shape == (4, 3))
+        npt.assert_equal(len(calls), 2)
+
+        npt.assert_equal(cached_table(os.path.join(self.cache_directory, 'none.npy'), lambda: None), None)
+        npt.assert_equal(os.path.exists(os.path.join(self.cache_directory, 'none.npy')), False)
+
+if __name__ == '__main__':
+    pytest.main()
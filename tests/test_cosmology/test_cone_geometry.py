@@ -3,6 +3,7 @@ from pyHalo.Cosmology.geometry import Geometry
 from pyHalo.Cosmology.cosmology import Cosmology
 import pytest
 import numpy as np
+from scipy.integrate import quad
 
 class TestConeGeometry(object):
 
@@ -118,6 +119,47 @@ class TestConeGeometry(object):
         volume_true = 1./3 * np.pi * radius_radians ** 2 * dz ** 2 * ds
         npt.assert_almost_equal(volume_true, volume_pyhalo, 3)
 
+    def test_volume_planes(self):
+
+        geo = Geometry(self.cosmo, 0.5, 1.5, 4., 'DOUBLE_CONE', angle_pad=0.8)
+        z = np.array([0.1, 0.45, 0.5, 1.2, 1.3])
+        delta_z = np.array([0.02, 0.1, 0.02, 1e-5, 0.2])
+        volumes = geo.volume_element_comoving(z, delta_z)
+        npt.assert_equal(volumes.shape, z.shape)
+        for (zi, dzi, volume) in zip(z, delta_z, volumes):
+            if dzi > geo._delta_z_min:
+                volume_quad = quad(geo._volume_integrand_comoving, zi, zi + dzi, args=(2.,), points=[0.5],
+                                   limit=100)[0]
+            else:
+                volume_quad = geo._volume_integrand_comoving(zi, 2.) * dzi
+            npt.assert_almost_equal(volume / volume_quad, 1, 8)
+            npt.assert_almost_equal(geo.volume_element_comoving(zi, dzi) / volume, 1, 12)
+
+        # the volume elements of a list of planes are computed once
+        npt.assert_equal(geo.volume_element_comoving(z, delta_z) is volumes, True)
+        npt.assert_equal(volumes.flags.writeable, False)
+        npt.assert_equal(geo.volume_element_comoving(z, delta_z, radius=1.) is volumes, False)
+
+        scale = geo.rendering_scale(z)
+        for (zi, scale_i) in zip(z, scale):
+            npt.assert_almost_equal(geo.rendering_scale(zi), scale_i)
+
+    def test_array_inputs(self):
+
+        geo = self.geometry_double_cone
+        z = np.array([0.2, 0.7, 1., 1.4, 1.9])
+        scale = geo.rendering_scale(z)
+        radius = geo.angle_to_physicalradius(self.angle_radius, z)
+        area = geo.angle_to_physical_area(self.angle_radius, z)
+        arcsec_radius = geo._angle_to_arcsec_radius(self.angle_radius, z)
+        for i, zi in enumerate(z):
+            npt.assert_almost_equal(geo.rendering_scale(zi), scale[i])
+            npt.assert_almost_equal(geo.angle_to_physicalradius(self.angle_radius, zi), radius[i])
+            npt.assert_almost_equal(geo.angle_to_physical_area(self.angle_radius, zi), area[i])
+        npt.assert_almost_equal(area, np.pi * radius ** 2)
+        arcsec_radius_astropy = geo.angle_to_comovingradius(self.angle_radius, z) * 1000 * \
+                                self.cosmo.astropy.arcsec_per_kpc_comoving(z).value
+        npt.assert_almost_equal(arcsec_radius / arcsec_radius_astropy, 1, 5)
 
 if __name__ == '__main__':
       pytest.main()
@@ -4,6 +4,9 @@ from pyHalo.Cosmology.cosmology import Cosmology
 import astropy.units as un
 import numpy as np
 import pytest
+import pickle
+from threading import Barrier
+from concurrent.futures import ThreadPoolExecutor
 
 class TestCosmology(object):
 
@@ -87,5 +90,84 @@ class TestCosmology(object):
 
         npt.assert_almost_equal(self.cosmo.scale_factor(0.7), self.cosmo.astropy.scale_factor(0.7))
 
+    def test_lazy_tables(self):
+
+        cosmo = Cosmology()
+        npt.assert_equal(cosmo._DM_interp_table is None, True)
+        z = np.array([0.3, 1.1, 2.7])
+        npt.assert_almost_equal(cosmo.D_A_z(z) / cosmo.astropy.angular_diameter_distance(z).value, 1, 5)
+        npt.assert_equal(cosmo._DM_interp_table is None, False)
+        npt.assert_almost_equal(cosmo.D_C_z(z) / cosmo.astropy.comoving_transverse_distance(z).value, 1, 5)
+        kpc_per_arcsec_true = cosmo.astropy.kpc_proper_per_arcmin(z).value / 60
+        npt.assert_almost_equal(cosmo.kpc_proper_per_asec(z) / kpc_per_arcsec_true, 1, 5)
+
+    def test_angular_diameter_distance(self):
+
+        z1 = np.array([0., 0.2, 0.5, 1.4])
+        z2 = np.array([0.1, 1.5, 0.6, 3.2])
+        da = self.cosmo.D_A(z1, z2)
+        da_astropy = self.cosmo.astropy.angular_diameter_distance_z1z2(z1, z2).value
+        npt.assert_almost_equal(da / da_astropy, 1, 5)
+        npt.assert_almost_equal(self.cosmo.D_A(0.5, 1.5), self.cosmo.astropy.angular_diameter_distance_z1z2(0.5, 1.5).value, 3)
+        # redshifts outside the interpolation table
+        npt.assert_almost_equal(self.cosmo.D_A(0.5, 6.), self.cosmo.astropy.angular_diameter_distance_z1z2(0.5, 6.).value)
+
+        d_d, d_s, d_ds = self.cosmo.lensing_distances(z1[1:], z2[1:])
+        npt.assert_almost_equal(d_d, self.cosmo.D_A_z(z1[1:]))
+        npt.assert_almost_equal(d_s, self.cosmo.D_A_z(z2[1:]))
+        npt.assert_almost_equal(d_ds, da[1:])
+
+        from astropy.cosmology import LambdaCDM
+        cosmo_curved = Cosmology(astropy_instance=LambdaCDM(H0=70., Om0=0.3, Ode0=0.6))
+        npt.assert_almost_equal(cosmo_curved.D_A(0.5, 1.5),
+                                cosmo_curved.astropy.angular_diameter_distance_z1z2(0.5, 1.5).value)
+        npt.assert_almost_equal(cosmo_curved.D_A_z(1.5) / cosmo_curved.astropy.angular_diameter_distance(1.5).value, 1, 5)
+
+    def test_table_extension(self):
+
+        cosmo = Cosmology(z_max_table=2., z_step_table=0.01)
+        npt.assert_almost_equal(cosmo.D_A_z(1.5) / cosmo.astropy.angular_diameter_distance(1.5).value, 1, 6)
+        npt.assert_equal(cosmo.table_extensions, 0)
+        z = np.array([1., 5., 7.])
+        npt.assert_almost_equal(cosmo.D_C_z(z) / cosmo.astropy.comoving_transverse_distance(z).value, 1, 6)
+        npt.assert_equal(cosmo.table_extensions, 1)
+        npt.assert_equal(cosmo._z_max_table, 8.)
+        kpc_per_arcsec_true = cosmo.astropy.kpc_proper_per_arcmin(6.).value / 60
+        npt.assert_almost_equal(cosmo.kpc_proper_per_asec(6.) / kpc_per_arcsec_true, 1, 6)
+        npt.assert_equal(cosmo.exact_evaluations, 0)
+
+        cosmo.D_C_z(-0.1)
+        npt.assert_equal(cosmo.exact_evaluations, 1)
+
+    def test_table_threads(self):
+
+        cosmo = Cosmology(z_max_table=0.25, z_step_table=0.01)
+        nthreads = 8
+        barrier = Barrier(nthreads)
+        z_max = np.linspace(0.3, 12., nthreads)
+
+        def evaluate(i):
+            barrier.wait()
+            out = []
+            for z_max_i in np.linspace(0.2, z_max[i], 25):
+                z = np.linspace(0., z_max_i, 50)
+                out.append(cosmo.D_C_z(z) / cosmo.astropy.comoving_transverse_distance(z).value)
+            return out
+
+        with ThreadPoolExecutor(max_workers=nthreads) as executor:
+            ratios = list(executor.map(evaluate, range(0, nthreads)))
+        for ratio in ratios:
+            npt.assert_almost_equal(np.array(ratio)[:, 1:], 1, 6)
+        npt.assert_equal(cosmo._z_max_table, 16.)
+
+        cosmo_copy = pickle.loads(pickle.dumps(cosmo))
+        npt.assert_almost_equal(cosmo_copy.D_C_z(3.), cosmo.D_C_z(3.))
+
+    def test_default_instance(self):
+
+        from pyHalo.instance_cache import cosmology_instance
+        from pyHalo.Halos.lens_cosmo import LensCosmo
+        npt.assert_equal(LensCosmo(None, None).cosmo is cosmology_instance(), True)
+
 if __name__ == '__main__':
      pytest.main()
@@ -83,5 +83,22 @@ class TestConeGeometry(object):
         volume = np.pi * r ** 2 * d
         npt.assert_almost_equal(volume/volume_pyhalo, 1, 3)
 
+    def test_array_inputs(self):
+
+        geo = self.geometry_cylinder
+        z = np.array([0.2, 0.7, 1., 1.4, 1.9])
+        scale = geo.rendering_scale(z)
+        radius = geo.angle_to_physicalradius(self.angle_radius, z)
+        area = geo.angle_to_physical_area(self.angle_radius, z)
+        arcsec_radius = geo._angle_to_arcsec_radius(self.angle_radius, z)
+        for i, zi in enumerate(z):
+            npt.assert_almost_equal(geo.rendering_scale(zi), scale[i])
+            npt.assert_almost_equal(geo.angle_to_physicalradius(self.angle_radius, zi), radius[i])
+            npt.assert_almost_equal(geo.angle_to_physical_area(self.angle_radius, zi), area[i])
+        npt.assert_almost_equal(area, np.pi * radius ** 2)
+        arcsec_radius_astropy = geo.angle_to_comovingradius(self.angle_radius, z) * 1000 * \
+                                self.cosmo.astropy.arcsec_per_kpc_comoving(z).value
+        npt.assert_almost_equal(arcsec_radius / arcsec_radius_astropy, 1, 5)
+
 if __name__ == '__main__':
       pytest.main()
@@ -5,6 +5,8 @@ from pyHalo.Rendering.MassFunctions.power_law import GeneralPowerLaw
 import pytest
 from scipy.integrate import quad
 import numpy as np
+import os
+import tempfile
 
 class TestLensingMassFunction(object):
 
@@ -185,5 +187,79 @@ class TestLensingMassFunction(object):
         norm_model = coefs_model[1]
         npt.assert_almost_equal(10**(norm_model - norm_theory) / volume_element, 1, 1)
 
+    def test_vectorized_fit(self):
+
+        m = np.logspace(6, 10, 20)
+        z = np.array([0.1, 0.7, 1.4])
+        dndm = self.lmf_no_lookup_ShethTormen._dN_dMdV_comoving_grid(m, z)
+        norm, plaw_index = self.lmf_no_lookup_ShethTormen._mass_function_params(m, z)
+        for i, zi in enumerate(z):
+            dndm_z = self.lmf_no_lookup_ShethTormen.dN_dMdV_comoving(m, zi)
+            npt.assert_almost_equal(dndm[i] / dndm_z, 1)
+            coeffs = np.polyfit(np.log10(m / 10 ** 8), np.log10(dndm_z), 1)
+            npt.assert_almost_equal(plaw_index[i], coeffs[0])
+            npt.assert_almost_equal(norm[i] / 10 ** coeffs[1], 1)
+
+    def test_cached_table(self):
+
+        cache_directory = tempfile.mkdtemp()
+        lmf = LensingMassFunction(self.cosmo, 0.5, 1.5, 10 ** 6, 10 ** 10, self.cone_opening_angle, m_pivot=10 ** 7)
+        norm, plaw_index, z_range, delta_z = lmf._build_from_cache(10 ** 6, 10 ** 10, 1.5, cache_directory)
+        fname = os.path.join(cache_directory, lmf._table_filename(10 ** 6, 10 ** 10, 1.5))
+        npt.assert_equal(os.path.exists(fname), True)
+        norm_loaded, plaw_index_loaded, z_range_loaded, _ = lmf._build_from_cache(10 ** 6, 10 ** 10, 1.5,
+                                                                                  cache_directory)
+        npt.assert_equal(isinstance(norm_loaded.base, np.memmap), True)
+        npt.assert_almost_equal(norm_loaded, norm)
+        npt.assert_almost_equal(plaw_index_loaded, plaw_index)
+        npt.assert_almost_equal(z_range_loaded, z_range)
+
+        lmf_exact = LensingMassFunction(self.cosmo, 0.5, 1.5, 10 ** 6, 10 ** 10, self.cone_opening_angle,
+                                        m_pivot=10 ** 7, use_lookup_table=False)
+        npt.assert_almost_equal(norm, lmf_exact._norm_z_dV)
+        npt.assert_almost_equal(plaw_index, lmf_exact._plaw_index_z)
+        npt.assert_almost_equal(lmf.norm_at_z_density(0.7, -1.9, 10 ** 7) /
+                                lmf_exact.norm_at_z_density(0.7, -1.9, 10 ** 7), 1)
+
+        npt.assert_equal(lmf._table_filename(10 ** 6, 10 ** 10, 1.5) == lmf._table_filename(10 ** 6, 10 ** 10, 2.5),
+                         False)
+        npt.assert_equal(lmf._table_filename(10 ** 6, 10 ** 10, 1.5) ==
+                         lmf_exact._table_filename(10 ** 6, 10 ** 10, 1.5), True)
+
+    def test_lookup_cosmology(self):
+
+        # the table shipped with pyHalo is only used for the default cosmology
+        npt.assert_equal(self.lmf_lookup_ShethTormen._default_cosmology(), True)
+        npt.assert_equal(hasattr(self.lmf_lookup_ShethTormen, '_norm_z_dV'), False)
+
+        cosmo = Cosmology(cosmo_kwargs={'H0': 70., 'sigma8': 0.9})
+        lmf = LensingMassFunction(cosmo, 0.5, 1.5, 10 ** 6, 10 ** 10, self.cone_opening_angle, m_pivot=10 ** 8)
+        lmf_exact = LensingMassFunction(cosmo, 0.5, 1.5, 10 ** 6, 10 ** 10, self.cone_opening_angle, m_pivot=10 ** 8,
+                                        use_lookup_table=False)
+        npt.assert_equal(lmf._default_cosmology(), False)
+        npt.assert_almost_equal(lmf._norm_z_dV, lmf_exact._norm_z_dV)
+        npt.assert_almost_equal(lmf._plaw_index_z, lmf_exact._plaw_index_z)
+        npt.assert_equal(lmf.norm_at_z_density(0.7, -1.9, 10 ** 8) /
+                         self.lmf_lookup_ShethTormen.norm_at_z_density(0.7, -1.9, 10 ** 8) > 1.01, True)
+        Cosmology()
+
+    def test_two_halo_boost_table(self):
+
+        cache_directory = tempfile.mkdtemp()
+        lmf = self.lmf_no_lookup_ShethTormen
+        correlation_integral = lmf.correlation_function_integral(cache_directory)
+        npt.assert_equal(lmf.correlation_function_integral(cache_directory) is correlation_integral, True)
+        npt.assert_equal(len(os.listdir(cache_directory)), 1)
+
+        for (m_halo, z, rmin, rmax) in [(10 ** 13, 0.5, 0.5, 60.), (10 ** 12, 1.2, 0.2, 0.4), (10 ** 13.5, 0.3, 0.5, 150.)]:
+            boost = lmf.two_halo_boost(m_halo, z, rmin, rmax)
+            boost_quad = 1 + 2 * quad(lmf.twohaloterm, rmin, rmax, args=(m_halo, z))[0] / (rmax - rmin)
+            npt.assert_almost_equal(boost / boost_quad, 1, 5)
+
+        # distances outside the table are integrated directly
+        boost = lmf.two_halo_boost(10 ** 13, 0.5, 0.5, 400.)
+        boost_quad = 1 + 2 * quad(lmf.twohaloterm, 0.5, 400., args=(10 ** 13, 0.5))[0] / 399.5
+        npt.assert_almost_equal(boost, boost_quad)
+
 if __name__ == '__main__':
        pytest.main()
@@ -0,0 +1,81 @@
+import pytest
+import os
+import tempfile
+import numpy as np
+import numpy.testing as npt
+from colossus.halo.concentration import concentration
+from pyHalo.Cosmology.cosmology import Cosmology
+from pyHalo.Halos.lens_cosmo import LensCosmo
+from pyHalo.Halos.concentration import Concentration
+from pyHalo.Halos.concentration_table import ConcentrationTable, concentration_table
+
+
+class TestConcentrationTable(object):
+
+    def setup(self):
+
+        cosmo = Cosmology()
+        self.lenscosmo = LensCosmo(0.5, 1.5, cosmo)
+        self.concentration = Concentration(self.lenscosmo)
+        self.cache_directory = tempfile.mkdtemp()
+
+    def test_cache(self):
+
+        table = ConcentrationTable.from_cache('diemer19', '200c', self.cache_directory)
+        fname = os.path.join(self.cache_directory, ConcentrationTable.filename('diemer19', '200c'))
+        npt.assert_equal(os.path.exists(fname), True)
+
+        table_loaded = ConcentrationTable.from_cache('diemer19', '200c', self.cache_directory)
+        m_h, z = np.logspace(6, 10, 20), np.linspace(0.1, 3., 20)
+        npt.assert_almost_equal(table_loaded(m_h, z), table(m_h, z))
+
+        npt.assert_equal(ConcentrationTable.filename('diemer19', '200c') ==
+                         ConcentrationTable.filename('diemer19', 'vir'), False)
+
+    def test_tolerance(self):
+
+        table = ConcentrationTable.from_cache('diemer19', '200c', self.cache_directory)
+        m_h = 10 ** np.random.uniform(4, 12, 50)
+        z = np.random.uniform(0., 6., 50)
+        c_exact = np.array([concentration(mi, mdef='200c', model='diemer19', z=zi) for (mi, zi) in zip(m_h, z)])
+        npt.assert_array_less(np.absolute(table(m_h, z) / c_exact - 1), ConcentrationTable.tolerance)
+
+        c = table(10 ** 8, 0.5)
+        npt.assert_equal(isinstance(c, float), True)
+
+        # outside the domain of the table
+        c_exact = concentration(10 ** 14, mdef='200c', model='diemer19', z=0.5)
+        npt.assert_equal(table(10 ** 14, 0.5), c_exact)
+        c_exact = concentration(10 ** 8, mdef='200c', model='diemer19', z=11.)
+        npt.assert_equal(table(10 ** 8, 11.), c_exact)
+        m_h = np.array([10 ** 8, 10 ** 14, 10 ** 15, 10 ** 2, 10 ** 9])
+        z = np.array([0.5, 0.5, 1., 0.5, 12.])
+        c_exact = np.array([concentration(mi, mdef='200c', model='diemer19', z=zi) for (mi, zi) in zip(m_h, z)])
+        c = table(m_h, z)
+        npt.assert_almost_equal(c[1:] / c_exact[1:], 1., 12)
+        npt.assert_array_less(np.absolute(c[0] / c_exact[0] - 1), ConcentrationTable.tolerance)
+
+    def test_nfw_concentration(self):
+
+        m, z = np.logspace(6, 10, 10), np.linspace(0.2, 1., 10)
+        c_table = self.concentration.nfw_concentration(m, z, 'diemer19', '200c', None, False, 0.1,
+                                                       None, None, lookup_table=True)
+        c_exact = self.concentration.nfw_concentration(m, z, 'diemer19', '200c', None, False, 0.1,
+                                                       None, None, lookup_table=False)
+        npt.assert_array_less(np.absolute(c_table / c_exact - 1), ConcentrationTable.tolerance)
+
+        c_table = self.concentration.nfw_concentration(m, 0.5, 'diemer19', '200c', None, False, 0.1,
+                                                       None, None, lookup_table=True)
+        for i, mi in enumerate(m):
+            ci = self.concentration.nfw_concentration(float(mi), 0.5, 'diemer19', '200c', None, False, 0.1,
+                                                      None, None, lookup_table=True)
+            npt.assert_almost_equal(ci / c_table[i], 1., 12)
+
+        npt.assert_equal(concentration_table('diemer19', '200c') is concentration_table('diemer19', '200c'), True)
+
+        # the table is only used when requested
+        c_default = self.concentration.nfw_concentration(m, z, 'diemer19', '200c', None, False, 0.1, None, None)
+        npt.assert_almost_equal(c_default / c_exact, 1., 12)
+
+if __name__ == '__main__':
+    pytest.main()
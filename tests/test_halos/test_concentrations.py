@@ -43,7 +43,7 @@ class TestConcentration(object):
         for i, ci in enumerate(c_array):
             _c = self.concentration.nfw_concentration(m_array_2[i], z_array_2[i], 'diemer19', '200c', None, False,
                                                        0.1, kwargs_suppresion, suppression_model)
-            npt.assert_equal(_c, ci)
+            npt.assert_almost_equal(_c / ci, 1., 12)
 
         kwargs_suppresion, suppression_model = {'a_mc': 0.5, 'b_mc': 0.8}, 'hyperbolic'
         cwdm = self.concentration.nfw_concentration(m, z, 'diemer19', '200c', 8., False, 0.1, kwargs_suppresion, suppression_model)
@@ -75,5 +75,27 @@ class TestConcentration(object):
         npt.assert_raises(Exception, WDM_concentration_suppresion_factor, 10 ** 8, 0.1, 7., suppression_model,
                           kwargs_suppresion)
 
+    def test_concentration_grouped_by_redshift(self):
+
+        kwargs_suppresion, suppression_model = {'c_scale': 60., 'c_power': -0.17, 'c_power_inner': 1.}, 'polynomial'
+        m_array = np.logspace(6, 10, 12)
+        z_array = np.array([0.2, 0.6, 0.2, 1.0] * 3)
+        model_custom = {'custom': True, 'c0': 10., 'beta': 0.9, 'zeta': -0.1}
+        for model, mdef in zip(['diemer19', model_custom], ['200c', None]):
+            c_array = self.concentration.nfw_concentration(m_array, z_array, model, mdef, 7.5, False,
+                                                           0.1, kwargs_suppresion, suppression_model)
+            npt.assert_equal(len(c_array), len(m_array))
+            for i, ci in enumerate(c_array):
+                _c = self.concentration.nfw_concentration(float(m_array[i]), z_array[i], model, mdef, 7.5, False,
+                                                          0.1, kwargs_suppresion, suppression_model)
+                npt.assert_almost_equal(ci / _c, 1., 12)
+
+        np.random.seed(1)
+        c_scatter = self.concentration.nfw_concentration(m_array, z_array, 'diemer19', '200c', None, True,
+                                                         0.1, kwargs_suppresion, suppression_model)
+        c_median = self.concentration.nfw_concentration(m_array, z_array, 'diemer19', '200c', None, False,
+                                                        0.1, kwargs_suppresion, suppression_model)
+        npt.assert_equal(np.all(c_scatter != c_median), True)
+
 if __name__ == '__main__':
     pytest.main()
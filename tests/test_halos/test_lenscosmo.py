@@ -45,6 +45,11 @@ class TestLensCosmo(object):
         sigma_crit = self.lens_cosmo.get_sigma_crit_lensing(0.7, 1.7)
         npt.assert_almost_equal(sigma_crit_mass, sigma_crit * area)
 
+        z = np.array([0.2, 0.7, 1.3])
+        sigma_crit = self.lens_cosmo.get_sigma_crit_lensing(z, 1.7)
+        for i, zi in enumerate(z):
+            npt.assert_almost_equal(sigma_crit[i] / self.lens_cosmo.get_sigma_crit_lensing(zi, 1.7), 1)
+
     def test_colossus(self):
 
         colossus = self.lens_cosmo.colossus
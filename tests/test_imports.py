@@ -0,0 +1,34 @@
+import pytest
+import numpy.testing as npt
+import subprocess
+import sys
+import json
+
+class TestImports(object):
+
+    def setup(self):
+
+        # importing the modules needed to create and use realizations should not import these packages, which are
+        # imported when they are first used
+        self.modules = ['pyHalo.pyhalo', 'pyHalo.single_realization', 'pyHalo.preset_models',
+                        'pyHalo.realization_extensions']
+        self.lazy_dependencies = ['astropy', 'colossus', 'lenstronomy']
+
+    def _import_in_new_process(self, module):
+
+        code = 'import sys, json\n' \
+               'import ' + module + '\n' \
+               'print(json.dumps(sorted(set(m.split(".")[0] for m in sys.modules))))'
+        output = subprocess.run([sys.executable, '-W', 'ignore', '-c', code], capture_output=True, text=True,
+                                check=True).stdout
+        return json.loads(output.splitlines()[-1])
+
+    def test_lazy_imports(self):
+
+        for module in self.modules:
+            imported = self._import_in_new_process(module)
+            for dependency in self.lazy_dependencies:
+                npt.assert_equal(dependency in imported, False)
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,77 @@
+import pytest
+import pickle
+import numpy.testing as npt
+from pyHalo.instance_cache import InstanceCache, cosmology_instance, lens_cosmo_instance, \
+    lensing_mass_function_instance, cache_info, clear_caches
+from pyHalo.pyhalo import pyHalo
+from colossus.cosmology import cosmology as colossus_cosmology
+
+class TestInstanceCache(object):
+
+    def setup(self):
+
+        clear_caches()
+
+    def test_lru(self):
+
+        cache = InstanceCache(2)
+        a = cache.get('a', lambda: [1])
+        npt.assert_equal(cache.get('a', lambda: [2]) is a, True)
+        cache.get('b', lambda: [3])
+        cache.get('c', lambda: [4])
+        info = cache.cache_info()
+        npt.assert_equal(info.hits, 1)
+        npt.assert_equal(info.misses, 3)
+        npt.assert_equal(info.currsize, 2)
+        # 'a' was least recently used and has been removed
+        npt.assert_equal(cache.get('a', lambda: [5]), [5])
+        cache_copy = pickle.loads(pickle.dumps(cache))
+        npt.assert_equal(cache_copy.get('c', lambda: [6]), [4])
+        cache.clear()
+        npt.assert_equal(cache.cache_info().currsize, 0)
+        npt.assert_equal(cache.cache_info().misses, 0)
+
+    def test_cosmology(self):
+
+        cosmo = cosmology_instance({})
+        npt.assert_equal(cosmology_instance({}) is cosmo, True)
+        cosmo_2 = cosmology_instance({'cosmo_kwargs': {'H0': 70., 'Om0': 0.3}})
+        npt.assert_equal(cosmo_2 is cosmo, False)
+        npt.assert_equal(colossus_cosmology.getCurrent() is cosmo_2.colossus, True)
+        npt.assert_equal(cosmology_instance({}) is cosmo, True)
+        npt.assert_equal(colossus_cosmology.getCurrent() is cosmo.colossus, True)
+        info = cache_info()['cosmology']
+        npt.assert_equal(info.hits, 2)
+        npt.assert_equal(info.misses, 2)
+
+    def test_lens_cosmo(self):
+
+        cosmo = cosmology_instance({})
+        lens_cosmo = lens_cosmo_instance(0.5, 2., cosmo)
+        npt.assert_equal(lens_cosmo_instance(0.5, 2., cosmo) is lens_cosmo, True)
+        npt.assert_equal(lens_cosmo_instance(0.6, 2., cosmo) is lens_cosmo, False)
+        npt.assert_equal(cache_info()['lens_cosmo'].hits, 1)
+
+    def test_lensing_mass_function(self):
+
+        cosmo = cosmology_instance({})
+        mfunc = lensing_mass_function_instance(cosmo, 0.5, 2., 10 ** 6, 10 ** 10, 6.)
+        npt.assert_equal(lensing_mass_function_instance(cosmo, 0.5, 2., 10 ** 6, 10 ** 10, 6.) is mfunc, True)
+        mfunc_2 = lensing_mass_function_instance(cosmo, 0.5, 2., 10 ** 6, 10 ** 10, 8.)
+        npt.assert_equal(mfunc_2 is mfunc, False)
+
+    def test_pyhalo(self):
+
+        kwargs = {'cone_opening_angle': 6., 'log_mlow': 6., 'log_mhigh': 10., 'mass_func_type': 'POWER_LAW',
+                  'LOS_normalization': 1.}
+        pyhalo = pyHalo(0.5, 2.)
+        pyhalo_2 = pyHalo(0.5, 2.)
+        npt.assert_equal(pyhalo.cosmology is pyhalo_2.cosmology, True)
+        mfunc = pyhalo.build_LOS_mass_function(kwargs)
+        npt.assert_equal(pyhalo_2.build_LOS_mass_function(kwargs) is mfunc, True)
+        info = cache_info()
+        npt.assert_equal(info['cosmology'].hits, 1)
+        npt.assert_equal(info['lensing_mass_function'].hits, 1)
+
+if __name__ == '__main__':
+    pytest.main()
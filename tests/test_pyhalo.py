@@ -0,0 +1,108 @@
+import pytest
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import numpy.testing as npt
+from pyHalo.pyhalo import pyHalo
+from pyHalo.instance_cache import clear_caches
+from pyHalo.defaults import halo_default, cache_default
+from pyHalo.Halos import concentration_table
+from pyHalo.Rendering.MassFunctions import power_law
+
+class TestpyHalo(object):
+
+    def setup(self):
+
+        self.pyhalo = pyHalo(0.5, 2.)
+        self.kwargs = {'cone_opening_angle': 4., 'sigma_sub': 0.02, 'log_mlow': 7., 'log_mhigh': 10.,
+                       'LOS_normalization': 1., 'mdef_los': 'TNFW', 'mdef_subs': 'TNFW', 'log_m_host': 13.,
+                       'host_c': 6., 'r_tidal': '0.5Rs', 'power_law_index': -1.9, 'c_scatter_dex': 0.2}
+        self.model_list = ['SUBHALOS', 'LINE_OF_SIGHT']
+
+    def test_render_backends(self):
+
+        realizations_serial = self.pyhalo.render(self.model_list, self.kwargs, nrealizations=3, seed=10)
+        npt.assert_equal(len(realizations_serial), 3)
+        npt.assert_equal(np.array_equal(realizations_serial[0].masses, realizations_serial[1].masses), False)
+
+        for backend in ['threads', 'processes']:
+            realizations = self.pyhalo.render(self.model_list, self.kwargs, nrealizations=3, backend=backend,
+                                              nworkers=2, seed=10)
+            for real, real_serial in zip(realizations, realizations_serial):
+                npt.assert_almost_equal(real.masses, real_serial.masses)
+                npt.assert_almost_equal(real.x, real_serial.x)
+                npt.assert_almost_equal(real.redshifts, real_serial.redshifts)
+                npt.assert_equal(real.subhalo_flags, real_serial.subhalo_flags)
+            tags = np.concatenate([real._halo_tags for real in realizations])
+            npt.assert_equal(len(np.unique(tags)), len(tags))
+
+        realizations = self.pyhalo.render(self.model_list, self.kwargs, nrealizations=1,
+                                          seed=np.random.SeedSequence(10))
+        npt.assert_almost_equal(realizations[0].masses, realizations_serial[0].masses)
+
+        npt.assert_raises(Exception, self.pyhalo.render, self.model_list, self.kwargs, 1, True, 'not_a_backend')
+
+    def test_render_rng(self):
+
+        state = np.random.get_state()
+        realization = self.pyhalo.render(self.model_list, self.kwargs, rng=np.random.default_rng(5))[0]
+        realization_2 = self.pyhalo.render(self.model_list, self.kwargs, rng=np.random.default_rng(5))[0]
+        npt.assert_equal(isinstance(realization.rng, np.random.Generator), True)
+        npt.assert_almost_equal(realization.masses, realization_2.masses)
+        npt.assert_almost_equal(realization.y, realization_2.y)
+        npt.assert_almost_equal(realization.concentrations, realization_2.concentrations)
+        npt.assert_almost_equal(realization.halos[-1].z_infall, realization_2.halos[-1].z_infall)
+        # the global numpy random state is not used
+        npt.assert_equal(np.random.get_state()[1], state[1])
+
+        realization_3 = self.pyhalo.render(self.model_list, self.kwargs, rng=np.random.default_rng(6))[0]
+        npt.assert_equal(np.array_equal(realization.masses, realization_3.masses), False)
+
+        npt.assert_raises(Exception, self.pyhalo.render, self.model_list, self.kwargs, 1, True, 'serial', None, 1,
+                          np.random.default_rng(5))
+
+    def test_render_threads_cold_caches(self):
+
+        kwargs = dict(self.kwargs)
+        kwargs.update({'log_mc': 7.5, 'a_wdm': 1., 'b_wdm': 0.8, 'c_wdm': -1.3})
+        lookup_table, directory = halo_default.mc_lookup_table, cache_default.directory
+        halo_default.mc_lookup_table, cache_default.directory = True, tempfile.mkdtemp()
+
+        def clear():
+            clear_caches()
+            concentration_table._tables.clear()
+            power_law._suppressed_power_law_tables.clear()
+
+        try:
+            clear()
+            realizations_serial = pyHalo(0.5, 2.).render(self.model_list, kwargs, nrealizations=16, seed=4)
+            concentrations_serial = [real.concentrations for real in realizations_serial]
+            clear()
+            realizations = pyHalo(0.5, 2.).render(self.model_list, kwargs, nrealizations=16, backend='threads',
+                                                  nworkers=8, seed=4)
+            concentration_table._tables.clear()
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                concentrations = list(executor.map(lambda real: real.concentrations, realizations))
+        finally:
+            halo_default.mc_lookup_table, cache_default.directory = lookup_table, directory
+            clear()
+
+        for real, real_serial, c, c_serial in zip(realizations, realizations_serial, concentrations,
+                                                  concentrations_serial):
+            npt.assert_almost_equal(real.masses, real_serial.masses)
+            npt.assert_almost_equal(real.x, real_serial.x)
+            npt.assert_almost_equal(real.redshifts, real_serial.redshifts)
+            npt.assert_almost_equal(c, c_serial)
+
+    def test_render_iter(self):
+
+        realizations = self.pyhalo.render_iter(self.model_list, self.kwargs, nrealizations=5, backend='threads',
+                                               nworkers=2, seed=3)
+        n = 0
+        for real in realizations:
+            npt.assert_equal(len(real.halos) > 0, True)
+            n += 1
+        npt.assert_equal(n, 5)
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,43 @@
+import pytest
+import numpy as np
+import numpy.testing as npt
+from pyHalo.random_numbers import random_state, random_generator, spawn_generators
+
+class TestRandomNumbers(object):
+
+    def setup(self):
+
+        self.rng = np.random.default_rng(1)
+
+    def test_random_state(self):
+
+        npt.assert_equal(random_state(None) is np.random, True)
+        npt.assert_equal(random_state(self.rng) is self.rng, True)
+        npt.assert_equal(random_state(np.random) is np.random, True)
+        npt.assert_raises(ValueError, random_state, 4)
+        npt.assert_raises(ValueError, random_state, np.random.SeedSequence(4))
+
+    def test_random_generator(self):
+
+        npt.assert_equal(random_generator(None), None)
+        npt.assert_equal(random_generator(self.rng) is self.rng, True)
+        npt.assert_almost_equal(random_generator(4).random(5), np.random.default_rng(4).random(5))
+        npt.assert_almost_equal(random_generator(np.random.SeedSequence(4)).random(5),
+                                np.random.default_rng(4).random(5))
+
+    def test_spawn_generators(self):
+
+        generators = spawn_generators(3, seed=10)
+        npt.assert_equal(len(generators), 3)
+        npt.assert_equal(np.allclose(generators[0].random(5), generators[1].random(5)), False)
+        generators_2 = spawn_generators(3, seed=np.random.SeedSequence(10))
+        npt.assert_almost_equal(generators_2[2].random(5), spawn_generators(3, seed=10)[2].random(5))
+
+        generators_rng = spawn_generators(2, rng=np.random.default_rng(3))
+        generators_rng_2 = spawn_generators(2, rng=np.random.default_rng(3))
+        npt.assert_almost_equal(generators_rng[1].random(5), generators_rng_2[1].random(5))
+
+        npt.assert_raises(Exception, spawn_generators, 2, 10, self.rng)
+
+if __name__ == '__main__':
+    pytest.main()
@@ -1,5 +1,5 @@
 import pytest
-from pyHalo.single_realization import SingleHalo
+from pyHalo.single_realization import SingleHalo, Realization
 from pyHalo.realization_extensions import RealizationExtensions
 from pyHalo.Cosmology.cosmology import Cosmology
 from scipy.interpolate import interp1d
@@ -16,6 +16,29 @@ class TestRealizationExtensions(object):
         lens_model_list = new.lensing_quantities()[0]
         npt.assert_string_equal(lens_model_list[0], 'SPL_CORE')
 
+    def test_seeded_draws(self):
+
+        cosmo = Cosmology()
+        realization = SingleHalo(10 ** 7, 0.5, -0.1, 'TNFW', 0.5, 0.5, 1.5, subhalo_flag=True, cosmo=cosmo)
+        for i in range(0, 49):
+            realization = realization.join(SingleHalo(10 ** 7, 0.5, -0.1, 'TNFW', 0.5, 0.5, 1.5, subhalo_flag=True,
+                                                      cosmo=cosmo))
+
+        # a seed is converted to a Generator once, so consecutive draws differ
+        ext = RealizationExtensions(realization, rng=3)
+        inds_1 = ext.core_collapse_by_mass([[6, 8]], [[6, 8]], [0.5], [0.5])
+        inds_2 = ext.core_collapse_by_mass([[6, 8]], [[6, 8]], [0.5], [0.5])
+        npt.assert_equal(inds_1 == inds_2, False)
+        ext = RealizationExtensions(realization, rng=3)
+        npt.assert_equal(ext.core_collapse_by_mass([[6, 8]], [[6, 8]], [0.5], [0.5]), inds_1)
+
+        realization_seeded = Realization([10 ** 7] * 2, [0.1] * 2, [0.1] * 2, [None] * 2, ['TNFW'] * 2, [0.5] * 2,
+                                         [False] * 2, realization.lens_cosmo,
+                                         kwargs_realization=realization._prof_params, rng=3)
+        npt.assert_equal(isinstance(realization_seeded.rng, np.random.Generator), True)
+        ext = RealizationExtensions(realization_seeded)
+        npt.assert_equal(ext._rng is realization_seeded.rng, True)
+
     def core_collapsed_halos(self):
 
         def p_short(*args, **kwargs):
@@ -1,7 +1,10 @@
 import numpy.testing as npt
 import pytest
-from pyHalo.Rendering.MassFunctions.power_law import GeneralPowerLaw
-from pyHalo.Rendering.MassFunctions.mass_function_utilities import integrate_power_law_quad, integrate_power_law_analytic
+from pyHalo.Rendering.MassFunctions.power_law import GeneralPowerLaw, GeneralPowerLawPlanes, SuppressedPowerLawTable, \
+    suppressed_power_law_table
+from pyHalo.Rendering.MassFunctions.mass_function_utilities import integrate_power_law_quad, integrate_power_law_analytic, \
+    WDM_suppression
+from scipy.integrate import quad
 import numpy as np
 
 class TestGeneralPowerLaw(object):
@@ -36,6 +39,30 @@ class TestGeneralPowerLaw(object):
         m = self.func_wdm.draw()
         npt.assert_almost_equal(np.sum(m)/mtheory, 1, 2)
 
+    def test_rng(self):
+
+        m = []
+        for i in range(0, 2):
+            func = GeneralPowerLaw(self.log_mlow, self.log_mhigh, self.plaw_index, draw_poisson=True,
+                                   normalization=self.norm, log_mc=7.5, a_wdm=2., b_wdm=0.5, c_wdm=-1.3,
+                                   rng=np.random.default_rng(2))
+            m.append(func.draw())
+        npt.assert_almost_equal(m[0], m[1])
+
+        # a seed is converted to a Generator once, so consecutive draws differ
+        func = GeneralPowerLaw(self.log_mlow, self.log_mhigh, self.plaw_index, draw_poisson=True,
+                               normalization=self.norm, log_mc=7.5, a_wdm=2., b_wdm=0.5, c_wdm=-1.3, rng=7)
+        m_1, m_2 = func.draw(), func.draw()
+        npt.assert_equal(len(m_1) == len(m_2) and np.allclose(m_1, m_2), False)
+        func = GeneralPowerLaw(self.log_mlow, self.log_mhigh, self.plaw_index, draw_poisson=True,
+                               normalization=self.norm, log_mc=7.5, a_wdm=2., b_wdm=0.5, c_wdm=-1.3, rng=7)
+        npt.assert_almost_equal(func.draw(), m_1)
+
+        func = GeneralPowerLawPlanes(self.log_mlow, self.log_mhigh, [self.plaw_index] * 2, True, [self.norm] * 2,
+                                     None, None, None, None, rng=np.random.default_rng(2))
+        m_planes, plane_index = func.draw()
+        npt.assert_equal(len(m_planes), len(plane_index))
+
     def test_number_of_halos(self):
 
         n_model = self.func_cdm._nhalos_mean_unbroken
@@ -43,5 +70,80 @@ class TestGeneralPowerLaw(object):
         npt.assert_almost_equal(n_model/ntheory, 1, 5)
 
 
+    def test_draw_planes(self):
+
+        norm = np.array([self.norm, 10 ** 5, 10 ** 10])
+        plaw_index = np.array([self.plaw_index, -1., -1.8])
+        func = GeneralPowerLawPlanes(self.log_mlow, self.log_mhigh, plaw_index, False, norm, None, None, None, None)
+        m, plane_index = func.draw()
+        npt.assert_equal(len(m), len(plane_index))
+        for i in range(0, 3):
+            mtheory = integrate_power_law_analytic(norm[i], 10 ** self.log_mlow, 10 ** self.log_mhigh, 1,
+                                                   plaw_index[i])
+            npt.assert_almost_equal(np.sum(m[plane_index == i]) / mtheory, 1, 1)
+            n_theory = integrate_power_law_analytic(norm[i], 10 ** self.log_mlow, 10 ** self.log_mhigh, 0,
+                                                    plaw_index[i])
+            npt.assert_equal(np.sum(plane_index == i), np.round(n_theory))
+
+        npt.assert_almost_equal(func._nhalos_mean_unbroken[0], self.func_cdm._nhalos_mean_unbroken)
+
+        func_wdm = GeneralPowerLawPlanes(self.log_mlow, self.log_mhigh, [self.plaw_index] * 2, False,
+                                         [self.norm] * 2, 7.5, 2., 0.5, -1.3)
+        m, plane_index = func_wdm.draw()
+        mtheory = integrate_power_law_quad(self.norm, 10 ** self.log_mlow, 10 ** self.log_mhigh, 7.5, 1,
+                                           self.plaw_index, a_wdm=2., b_wdm=0.5, c_wdm=-1.3)
+        npt.assert_almost_equal(np.sum(m[plane_index == 1]) / mtheory, 1, 2)
+
+        npt.assert_raises(Exception, GeneralPowerLawPlanes, 6., 8., [-1.9, -1.9], False, [1., -1.],
+                          None, None, None, None)
+
+    def test_suppressed_power_law_table(self):
+
+        for (log_mc, a_wdm, b_wdm, c_wdm) in [(7.5, 2., 0.5, -1.3), (8.5, 4.2, 2.5, -0.2), (8.6, 1., 0.8, -1.3)]:
+            table = SuppressedPowerLawTable(self.log_mlow, self.log_mhigh, self.plaw_index, log_mc, a_wdm, b_wdm,
+                                            c_wdm)
+            n_theory = integrate_power_law_quad(1., 10 ** self.log_mlow, 10 ** self.log_mhigh, log_mc, 0,
+                                                self.plaw_index, a_wdm, b_wdm, c_wdm)
+            npt.assert_almost_equal(table.integral / n_theory, 1, 4)
+
+            m = table.sample(np.random.default_rng(3).random(200000))
+            npt.assert_equal(np.all(m >= 10 ** self.log_mlow), True)
+            npt.assert_equal(np.all(m <= 10 ** self.log_mhigh), True)
+            for log_m in [6.5, 7.5, 8.]:
+                cdf_theory = integrate_power_law_quad(1., 10 ** self.log_mlow, 10 ** log_m, log_mc, 0,
+                                                      self.plaw_index, a_wdm, b_wdm, c_wdm) / n_theory
+                npt.assert_almost_equal(np.mean(m < 10 ** log_m), cdf_theory, 2)
+
+        # without suppression the table reproduces the power law exactly
+        table = SuppressedPowerLawTable(self.log_mlow, self.log_mhigh, self.plaw_index, 7.5, 2., 0.5, 0.)
+        u = np.linspace(0., 1., 11)
+        p = self.plaw_index + 1
+        m_theory = (u * (10 ** (self.log_mhigh * p) - 10 ** (self.log_mlow * p)) + 10 ** (self.log_mlow * p)) ** (1 / p)
+        npt.assert_almost_equal(table.sample(u) / m_theory, 1, 8)
+        npt.assert_almost_equal(table.integral / self.func_cdm._nhalos_mean_unbroken * self.norm, 1, 8)
+
+        table = suppressed_power_law_table(self.log_mlow, self.log_mhigh, self.plaw_index, 7.5, 2., 0.5, -1.3)
+        npt.assert_equal(table is suppressed_power_law_table(self.log_mlow, self.log_mhigh, self.plaw_index, 7.5, 2.,
+                                                             0.5, -1.3), True)
+        npt.assert_equal(table is self.func_wdm._table, True)
+
+    def test_suppressed_power_law_histogram(self):
+
+        # a steep ULDM-like suppression of the mass function
+        (log_mlow, log_mhigh, log_mc, a_wdm, b_wdm, c_wdm) = (6., 10., 8., 1., 1.1, -2.2)
+        table = SuppressedPowerLawTable(log_mlow, log_mhigh, self.plaw_index, log_mc, a_wdm, b_wdm, c_wdm)
+        dn_dlogm = lambda log_m: np.exp(log_m) ** (self.plaw_index + 1) * WDM_suppression(np.exp(log_m), 10 ** log_mc,
+                                                                                           a_wdm, b_wdm, c_wdm)
+        bins = np.log(10 ** np.linspace(log_mlow, log_mhigh, 21))
+        n_bins = np.array([quad(dn_dlogm, bins[i], bins[i + 1], epsabs=0, epsrel=1e-10)[0]
+                           for i in range(0, len(bins) - 1)])
+        npt.assert_array_less(np.absolute(table.integral / np.sum(n_bins) - 1), 1e-4)
+
+        n_samples = 10 ** 6
+        m = table.sample(np.random.default_rng(7).random(n_samples))
+        counts, _ = np.histogram(np.log(m), bins)
+        n_expected = n_samples * n_bins / np.sum(n_bins)
+        npt.assert_array_less(np.absolute(counts - n_expected), 5 * np.sqrt(n_expected) + 1)
+
 if __name__ == '__main__':
     pytest.main()
@@ -125,6 +125,29 @@ class TestLOS(object):
             npt.assert_almost_equal(slope, slope_theory)
             npt.assert_almost_equal(norm_theory, norm)
 
+    def test_norm_slope_planes(self):
+
+        norm, slope = self.rendering_class._normalization_slope_planes()
+        npt.assert_equal(len(norm), len(self.lens_plane_redshifts))
+        for i in [0, 10, 20, len(self.lens_plane_redshifts) - 1]:
+            norm_i, slope_i = self.rendering_class._normalization_slope(self.lens_plane_redshifts[i],
+                                                                       self.delta_zs[i])
+            npt.assert_almost_equal(norm[i] / norm_i, 1.)
+            npt.assert_almost_equal(slope[i], slope_i)
+
+    def test_render_masses_planes(self):
+
+        m, plane_index = self.rendering_class.render_masses_planes()
+        npt.assert_equal(len(m), len(plane_index))
+        npt.assert_equal(np.all(np.diff(plane_index) >= 0), True)
+        for i in [10, 20]:
+            m_i = self.rendering_class.render_masses_at_z(self.lens_plane_redshifts[i], self.delta_zs[i])
+            npt.assert_equal(np.sum(plane_index == i), len(m_i))
+
+        m, plane_index = self.rendering_class_delta.render_masses_planes()
+        npt.assert_equal(len(m), len(plane_index))
+        npt.assert_almost_equal(np.log10(m), self.logdelta_mass)
+
     def test_rendering(self):
 
         m = self.rendering_class.render_masses_at_z(0.7, 0.02)
@@ -148,6 +171,12 @@ class TestLOS(object):
 
         npt.assert_equal(True, len(self.realization_cdm.halos) == len(m))
 
+        z_planes = np.array(self.lens_plane_redshifts)
+        for z in [z_planes[5], z_planes[-5]]:
+            inds = np.where(redshifts == z)[0]
+            rmax_theory = 0.5 * self.kwargs_cdm['cone_opening_angle'] * self.geometry.rendering_scale(z)
+            npt.assert_array_less(np.hypot(x[inds], y[inds]), rmax_theory)
+
     def test_convergence_correction(self):
 
         idx = 20
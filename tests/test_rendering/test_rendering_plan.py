@@ -0,0 +1,112 @@
+import pytest
+import numpy.testing as npt
+import numpy as np
+import os
+import tempfile
+from pyHalo.pyhalo import pyHalo
+from pyHalo.Rendering.rendering_plan import RenderingPlan
+
+class TestRenderingPlan(object):
+
+    def setup(self):
+
+        self.pyhalo = pyHalo(0.5, 2.)
+        self.kwargs = {'cone_opening_angle': 4., 'sigma_sub': 0.02, 'log_mlow': 7., 'log_mhigh': 10.,
+                       'LOS_normalization': 1., 'mdef_los': 'TNFW', 'mdef_subs': 'TNFW', 'log_m_host': 13.,
+                       'host_c': 6., 'r_tidal': '0.5Rs', 'power_law_index': -1.9, 'c_scatter_dex': 0.2,
+                       'log_mc': 7.5, 'a_wdm': 1., 'b_wdm': 0.8, 'c_wdm': -1.3}
+        self.model_list = ['SUBHALOS', 'LINE_OF_SIGHT', 'TWO_HALO']
+        self.plan = self.pyhalo.rendering_plan(self.model_list, self.kwargs)
+
+    def test_plan(self):
+
+        npt.assert_equal(self.plan.model_plans[0], {})
+        plan_los = self.plan.model_plans[1]
+        nplanes = len(self.plan.plane_redshifts)
+        for key in ['volume_element', 'rendering_scale', 'norm', 'plaw_index', 'log_mlow', 'log_mhigh']:
+            npt.assert_equal(len(plan_los[key]), nplanes)
+        npt.assert_equal(len(plan_los['sheet_kappa']), len(plan_los['sheet_redshifts']))
+        for key in ['norm', 'slope', 'log_mlow', 'log_mhigh']:
+            npt.assert_equal(key in self.plan.model_plans[2], True)
+
+        plan_no_sheets = self.pyhalo.rendering_plan(self.model_list, self.kwargs, convergence_sheet_correction=False)
+        npt.assert_equal('sheet_kappa' in plan_no_sheets.model_plans[1], False)
+
+    def test_render(self):
+
+        realizations = self.pyhalo.render(self.model_list, self.kwargs, nrealizations=2, seed=5)
+        realizations_plan = self.pyhalo.render(self.model_list, self.kwargs, nrealizations=2, seed=5,
+                                               rendering_plan=self.plan)
+        for real, real_plan in zip(realizations, realizations_plan):
+            npt.assert_almost_equal(real.masses, real_plan.masses)
+            npt.assert_almost_equal(real.x, real_plan.x)
+            npt.assert_almost_equal(real.redshifts, real_plan.redshifts)
+            _, redshifts, kwargs_lens, _ = real.lensing_quantities()
+            _, redshifts_plan, kwargs_lens_plan, _ = real_plan.lensing_quantities()
+            npt.assert_almost_equal(redshifts, redshifts_plan)
+            for kwargs, kwargs_plan in zip(kwargs_lens, kwargs_lens_plan):
+                if 'kappa' in kwargs:
+                    npt.assert_almost_equal(kwargs['kappa'], kwargs_plan['kappa'])
+
+        npt.assert_raises(Exception, self.pyhalo.render, ['SUBHALOS', 'LINE_OF_SIGHT'], self.kwargs, 1,
+                          rendering_plan=self.plan)
+        npt.assert_raises(Exception, pyHalo(0.6, 2.).render, self.model_list, self.kwargs, 1,
+                          rendering_plan=self.plan)
+
+    def test_fingerprint(self):
+
+        kwargs = dict(self.kwargs)
+        kwargs.update({'log_mlow': 6., 'LOS_normalization': 10.})
+        npt.assert_raises(Exception, self.pyhalo.render, self.model_list, kwargs, 1, rendering_plan=self.plan)
+        npt.assert_raises(Exception, pyHalo(0.5, 2., cosmology_kwargs={'cosmo_kwargs': {'H0': 70.}}).render, self.model_list,
+                          self.kwargs, 1, rendering_plan=self.plan)
+        npt.assert_raises(Exception, self.plan.check, self.plan.zlens, self.plan.zsource, self.model_list,
+                          self.plan.plane_redshifts, 'not_the_fingerprint')
+        self.plan.check(self.plan.zlens, self.plan.zsource, self.model_list, self.plan.plane_redshifts,
+                        self.plan.fingerprint)
+
+        # keyword arguments that are set to their default values give the same plan
+        kwargs = dict(self.kwargs)
+        kwargs['draw_poisson'] = True
+        npt.assert_equal(self.pyhalo.rendering_plan(self.model_list, kwargs).fingerprint, self.plan.fingerprint)
+
+    def test_single_realization(self):
+
+        # a single realization does not compute a plan for the other realizations
+        pyhalo = _CountPlans(0.5, 2.)
+        realization = pyhalo.render(self.model_list, self.kwargs, seed=5)[0]
+        npt.assert_equal(pyhalo.num_plans, 0)
+        realization_plan = pyhalo.render(self.model_list, self.kwargs, seed=5, rendering_plan=self.plan)[0]
+        npt.assert_almost_equal(realization.masses, realization_plan.masses)
+        pyhalo.render(self.model_list, self.kwargs, nrealizations=2, seed=5)
+        npt.assert_equal(pyhalo.num_plans, 1)
+
+    def test_save_load(self):
+
+        fname = os.path.join(tempfile.mkdtemp(), 'plan.npz')
+        self.plan.save(fname)
+        plan = RenderingPlan.load(fname)
+        npt.assert_equal(plan.population_model_list, self.model_list)
+        npt.assert_almost_equal(plan.zlens, self.plan.zlens)
+        npt.assert_almost_equal(plan.plane_redshifts, self.plan.plane_redshifts)
+        npt.assert_almost_equal(plan.delta_z, self.plan.delta_z)
+        npt.assert_equal(plan.fingerprint, self.plan.fingerprint)
+        for model_plan, model_plan_saved in zip(plan.model_plans, self.plan.model_plans):
+            npt.assert_equal(sorted(model_plan.keys()), sorted(model_plan_saved.keys()))
+            for key in model_plan.keys():
+                npt.assert_almost_equal(model_plan[key], model_plan_saved[key])
+
+        realization = self.pyhalo.render(self.model_list, self.kwargs, seed=3, rendering_plan=plan)[0]
+        realization_saved = self.pyhalo.render(self.model_list, self.kwargs, seed=3, rendering_plan=self.plan)[0]
+        npt.assert_almost_equal(realization.masses, realization_saved.masses)
+
+class _CountPlans(pyHalo):
+
+    num_plans = 0
+
+    def _rendering_plan(self, *args, **kwargs):
+        self.num_plans += 1
+        return super(_CountPlans, self)._rendering_plan(*args, **kwargs)
+
+if __name__ == '__main__':
+    pytest.main()
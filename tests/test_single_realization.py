@@ -162,8 +162,8 @@ class TestSingleRealization(object):
         idx1 = 0
         idx2 = 1
 
-        self.realization_cdm.halos[idx1].unique_tag = self.realization_cdm2.halos[idx2_1].unique_tag
-        self.realization_cdm.halos[idx2].unique_tag = self.realization_cdm2.halos[idx2_2].unique_tag
+        self.realization_cdm._halo_tags[idx1] = self.realization_cdm2._halo_tags[idx2_1]
+        self.realization_cdm._halo_tags[idx2] = self.realization_cdm2._halo_tags[idx2_2]
 
         new_realization = self.realization_cdm.join(self.realization_cdm2)
         npt.assert_equal(len(new_realization.halos), length-2)
@@ -177,6 +177,27 @@ class TestSingleRealization(object):
             if mi not in new_realization.masses:
                 npt.assert_equal(True, xi not in new_realization.x)
 
+    def test_concatenate(self):
+
+        new_realization = Realization.concatenate([self.realization_cdm, self.realization_cdm2,
+                                                   self.realization_cdm])
+        npt.assert_equal(len(new_realization.halos), len(self.masses) + 3)
+        npt.assert_equal(new_realization.masses, np.append(self.realization_cdm.masses,
+                                                           self.realization_cdm2.masses))
+        npt.assert_equal(new_realization.mdefs, self.realization_cdm.mdefs + self.realization_cdm2.mdefs)
+        npt.assert_equal(True, new_realization == self.realization_cdm)
+        npt.assert_equal(True, new_realization == self.realization_cdm2)
+        npt.assert_equal(False, self.realization_cdm == new_realization)
+        npt.assert_equal(len(new_realization.rendering_classes), 1)
+
+        joined = self.realization_cdm.join(self.realization_cdm2)
+        npt.assert_equal(True, joined == new_realization)
+        npt.assert_equal(True, new_realization == joined)
+
+        new_realization = Realization.concatenate([self.realization_cdm, self.realization_cdm2],
+                                                  join_rendering_classes=True)
+        npt.assert_equal(len(new_realization.rendering_classes), 2)
+
     def test_shift_background_to_source(self):
 
         dmax = self.halo_mass_function.geometry._cosmo.D_C_transverse(2.)
@@ -386,6 +407,124 @@ class TestSingleRealization(object):
         npt.assert_almost_equal(y[0], self.realization_cdm.y[0] * d1)
         npt.assert_almost_equal(10**logm[0], self.realization_cdm.masses[0])
 
+    def test_columns(self):
+
+        npt.assert_equal(self.realization_cdm.mdefs, ['NFW'] * len(self.masses))
+        npt.assert_equal(self.realization_cdm.subhalo_flags, self.subflags)
+        npt.assert_equal(self.realization_cdm.r3d, self.r3d)
+
+        realization_1, realization_2 = self.realization_cdm.split_at_z(0.3)
+        halo_1 = realization_1.halos[0]
+        halo_0 = self.realization_cdm.halos[0]
+        npt.assert_equal(halo_1 is halo_0, True)
+        npt.assert_equal(halo_1.is_subhalo, False)
+
+        realization = Realization.from_columns(self.realization_cdm._column_slice([1, 3]),
+                                               self.realization_cdm._halo_cache, self.lens_cosmo,
+                                               self.kwargs_cdm, False, None)
+        npt.assert_equal(len(realization.halos), 2)
+        npt.assert_equal(realization.halos[1] is self.realization_cdm.halos[3], True)
+        npt.assert_equal(realization.mdefs, ['NFW', 'NFW'])
+
+        single_halo = SingleHalo(10 ** 8, 0.5, 0.5, 'TNFW', 0.5, 0.5, 1.5)
+        npt.assert_equal(single_halo.halos[0].r3d, None)
+
+        npt.assert_raises(ValueError, Realization, [10 ** 8], [0.], [0.], [None], ['NOT_A_PROFILE'], [0.5], [False],
+                          self.lens_cosmo, kwargs_realization=self.kwargs_cdm, mass_sheet_correction=False)
+
+    def test_halo_ids(self):
+
+        tags = self.realization_cdm._tags()
+        npt.assert_equal(self.realization_cdm._halo_tags.dtype, np.int64)
+        npt.assert_equal(len(np.unique(tags)), len(tags))
+        npt.assert_equal(np.diff(tags), 1)
+        npt.assert_equal(tags, self.halo_tags)
+
+        # different lineages never share IDs
+        npt.assert_equal(np.any(np.isin(self.realization_cdm2._halo_tags, self.realization_cdm._halo_tags)), False)
+
+        realization_1, realization_2 = self.realization_cdm.split_at_z(0.3)
+        npt.assert_equal(realization_1.halo_id_allocator is self.realization_cdm.halo_id_allocator, True)
+        joined = realization_2.join(realization_1)
+        npt.assert_equal(np.sort(joined._tags()), tags)
+
+        d = np.linspace(0, 10000, 100)
+        ray_interp = interp1d(d, np.ones_like(d))
+        shifted = self.realization_cdm.shift_background_to_source(ray_interp, ray_interp)
+        npt.assert_equal(shifted._tags(), tags)
+
+        new_ids = self.realization_cdm.halo_id_allocator.allocate(2)
+        npt.assert_equal(new_ids, [tags[-1] + 1, tags[-1] + 2])
+
+        halos = SingleHalo(10 ** 8, 0.5, 0.5, 'TNFW', 0.5, 0.5, 1.5).halos
+        halos[0].unique_tag = 0.5
+        realization = Realization.from_halos(halos, self.lens_cosmo, self.kwargs_cdm, False, None,
+                                             halo_id_allocator=self.realization_cdm.halo_id_allocator)
+        npt.assert_equal(realization._tags(), [tags[-1] + 3])
+        npt.assert_equal(realization.halos[0].unique_tag, tags[-1] + 3)
+        npt.assert_equal(realization.halos is realization.halos, True)
+        # the halos passed in are not modified
+        npt.assert_equal(halos[0].unique_tag, 0.5)
+        realization_2 = Realization.from_halos(halos, self.lens_cosmo, self.kwargs_cdm, False, None,
+                                               halo_id_allocator=self.realization_cdm.halo_id_allocator)
+        npt.assert_equal(realization_2._tags(), [tags[-1] + 4])
+        npt.assert_equal(realization._tags(), [tags[-1] + 3])
+        npt.assert_equal(realization.halos[0].unique_tag, tags[-1] + 3)
+
+    def test_lenstronomy_kwargs_table(self):
+
+        realization = Realization(self.masses, self.x, self.y, self.r3d, ['TNFW', 'NFW'] * 3 + ['PT_MASS'],
+                                  self.redshifts, self.subflags, self.lens_cosmo,
+                                  kwargs_realization=self.kwargs_cdm, mass_sheet_correction=False)
+        kwargs_table = realization.lenstronomy_kwargs_table()
+        npt.assert_equal(kwargs_table['TNFW']['index'], [0, 2, 4])
+        npt.assert_equal(kwargs_table['NFW']['index'], [1, 3, 5])
+
+        for lens_model_name in ['TNFW', 'NFW']:
+            table = kwargs_table[lens_model_name]
+            for j, index in enumerate(table['index']):
+                halo = realization.halos[index]
+                kwargs_halo, _ = halo.lenstronomy_params
+                npt.assert_equal(halo.lenstronomy_ID, [lens_model_name])
+                npt.assert_equal(table['z'][j], halo.z)
+                for key in kwargs_halo[0].keys():
+                    npt.assert_almost_equal(table[key][j], kwargs_halo[0][key])
+
+        lens_model_list, _, kwargs_lens, _ = realization.lensing_quantities()
+        npt.assert_equal(lens_model_list, ['TNFW', 'NFW'] * 3 + ['POINT_MASS'])
+        for halo, kwargs in zip(realization.halos, kwargs_lens):
+            kwargs_halo, _ = halo.lenstronomy_params
+            npt.assert_equal(kwargs.keys(), kwargs_halo[0].keys())
+            for key in kwargs.keys():
+                npt.assert_almost_equal(kwargs[key], kwargs_halo[0][key])
+
+    def test_concentrations(self):
+
+        realization = Realization(self.masses, self.x, self.y, self.r3d, ['TNFW', 'NFW'] * 3 + ['PT_MASS'],
+                                  self.redshifts, self.subflags, self.lens_cosmo,
+                                  kwargs_realization=self.kwargs_cdm, mass_sheet_correction=False)
+        concentrations = realization.concentrations
+        npt.assert_equal(np.isnan(concentrations[-1]), True)
+        for c, halo in zip(concentrations[0:-1], realization.halos[0:-1]):
+            c_halo = self.lens_cosmo.NFW_concentration(halo.mass, halo.z_eval, self.kwargs_cdm['mc_model'],
+                                                       scatter=False)
+            npt.assert_almost_equal(c / c_halo, 1.)
+            npt.assert_equal(halo.c, c)
+
+    def test_redshift_planes(self):
+
+        redshifts = np.array(self.redshifts)
+        masses = np.array(self.masses)
+        for z in [0.05, 0.1, 0.3, 0.4, 0.5, 0.94, 1.5]:
+            npt.assert_equal(self.realization_cdm.number_of_halos_before_redshift(z), np.sum(redshifts < z))
+            npt.assert_equal(self.realization_cdm.number_of_halos_after_redshift(z), np.sum(redshifts > z))
+            npt.assert_equal(self.realization_cdm.number_of_halos_at_redshift(z), np.sum(redshifts == z))
+            npt.assert_almost_equal(self.realization_cdm.mass_at_z_exact(z), np.sum(masses[redshifts == z]))
+            halos, index = self.realization_cdm.halos_at_z(z)
+            npt.assert_equal(index, np.where(redshifts == z)[0])
+            for halo in halos:
+                npt.assert_equal(halo.z, z)
+
 if __name__ == '__main__':
     pytest.main()
 